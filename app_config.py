@@ -0,0 +1,59 @@
+"""用户配置
+
+保存为 JSON 文件:
+
+    Windows    %APPDATA%\\AdvancedPowerManager\\config.json
+    其他平台   $XDG_CONFIG_HOME/advanced-power-manager/config.json（默认 ~/.config）
+
+设置环境变量 APM_CONFIG_DIR 可以改用其他目录。文件不存在或无法解析时按空
+配置处理。
+"""
+import json
+import os
+import sys
+
+CONFIG_FILE = "config.json"
+
+
+def config_dir():
+    override = os.environ.get("APM_CONFIG_DIR")
+    if override:
+        return override
+    if sys.platform == "win32":
+        return os.path.join(os.environ.get("APPDATA") or os.path.expanduser("~"), "AdvancedPowerManager")
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "advanced-power-manager")
+
+
+def config_path():
+    return os.path.join(config_dir(), CONFIG_FILE)
+
+
+def load_config(path=None):
+    """读取配置，返回 dict"""
+    try:
+        with open(path or config_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"无法读取配置文件: {e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_config(data, path=None):
+    """写入配置（先写临时文件再替换）"""
+    path = path or config_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temp, path)
+
+
+def update_config(section, value, path=None):
+    """替换配置中的一节并保存"""
+    data = load_config(path)
+    data[section] = value
+    save_config(data, path)
@@ -0,0 +1,536 @@
+"""性能测试工具
+
+使用模拟电源后端和 offscreen Qt 平台运行界面的主要操作并统计耗时，
+可以在没有 Windows 的环境中测量程序自身的开销:
+
+    python benchmark.py --schemes 100 --latency 0.02
+    python benchmark.py --suite startup --suite scaling --scheme-counts 5,100,1000
+
+startup 测试组还在新进程中分别以托盘模式（--tray）和完整窗口启动，加载完成并
+空闲一段时间后记录峰值常驻内存（idle_peak_rss[...]，单位 MB）。
+
+指定 --history 时每次运行的结果追加到 JSON 历史文件，并与基准（默认为上一次
+记录，--baseline 指定标签时为带该标签的最近一次记录）比较中位数。某项比基准
+慢 --threshold 以上（且绝对差超过 --min-delta 毫秒）视为性能回退，退出码为 1:
+
+    python benchmark.py --history bench.json --label v1.4       # 记录基准
+    python benchmark.py --history bench.json --baseline v1.4 --threshold 0.25
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def wait_for_idle(app, executor, timeout=30.0):
+    """处理事件直到执行器中没有未完成的任务（debounce 的调用立即执行，不等待）"""
+    from PyQt6.QtCore import QEventLoop
+    deadline = time.perf_counter() + timeout
+    while executor.is_busy():
+        executor.flush()
+        if time.perf_counter() > deadline:
+            raise TimeoutError("等待后台任务超时")
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 5)
+    app.processEvents()
+
+
+def measure(func, repeat):
+    """重复运行 func，返回每次耗时（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(name, samples, unit="ms"):
+    return {
+        "name": name,
+        "runs": len(samples),
+        f"min_{unit}": round(min(samples), 3),
+        f"median_{unit}": round(statistics.median(samples), 3),
+        f"mean_{unit}": round(statistics.fmean(samples), 3),
+    }
+
+
+def unit_of(result):
+    """结果的单位: 耗时为 ms，内存为 mb"""
+    return "mb" if "median_mb" in result else "ms"
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存（MB）"""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        if not kernel32.K32GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            raise ctypes.WinError()
+        return counters.PeakWorkingSetSize / 2 ** 20
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位为 KB，macOS 上为字节
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def run_gui_benchmarks(args):
+    from PyQt6.QtWidgets import QApplication, QMessageBox
+
+    import gui
+    from power_backend import SimulatedPowerBackend
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    # 模态对话框会阻塞测试，这里直接跳过
+    QMessageBox.information = staticmethod(lambda *a, **k: QMessageBox.StandardButton.Ok)
+
+    backend = SimulatedPowerBackend(latency=args.latency, extra_schemes=args.schemes)
+    results = []
+    windows = []
+
+    def construct():
+        window = gui.PowerManager(backend)
+        wait_for_idle(app, window.executor)
+        windows.append(window)
+
+    results.append(summarize("window_construction", measure(construct, max(1, args.repeat // 5))))
+    window = windows[-1]
+
+    plans = list(window.power_guids)
+
+    def switch():
+        # 每次切换完成后再切换下一个，连续点击时后面的切换会取代排队中的
+        for plan in plans:
+            window.set_power_plan(plan)
+            wait_for_idle(app, window.executor)
+
+    samples = measure(switch, args.repeat)
+    results.append(summarize("set_power_plan", [s / len(plans) for s in samples]))
+
+    # 连续点击: 20 次切换与刷新，只执行必要的部分
+    window.executor.stats.clear()
+
+    def burst():
+        for plan in plans * 5:
+            window.set_power_plan(plan)
+            window.refresh_power_plans()
+            app.processEvents()
+        wait_for_idle(app, window.executor)
+
+    results.append(summarize(f"click_burst[{len(plans) * 5}]", measure(burst, args.repeat)))
+    print(f"后台任务合并: {({key: dict(counts) for key, counts in window.executor.stats.items()})}")
+
+    # 计划列表的增量更新: 一个方案改名，其余不变
+    from powercfg_parser import PowerScheme
+
+    schemes = window.scheme_cache.schemes()
+    renamed = list(schemes)
+    renamed[-1] = PowerScheme(schemes[-1].guid, schemes[-1].name + " *", schemes[-1].active)
+
+    def update_list():
+        window.populate_power_plans(renamed)
+        window.populate_power_plans(schemes)
+
+    samples = measure(update_list, args.repeat)
+    results.append(summarize(f"plan_list_update[{len(schemes)}]", [s / 2 for s in samples]))
+
+    # 切换界面语言（所有标签页都已创建）
+    for tab in list(window.tab_builders):
+        window.ensure_tab(tab)
+    wait_for_idle(app, window.executor)
+    languages = list(window.languages)
+
+    def switch_language():
+        for code in languages[1:] + languages[:1]:
+            window.set_language(code)
+
+    samples = measure(switch_language, args.repeat)
+    # 名称不含绑定数量，新增控件后仍能与历史记录比较
+    results.append(summarize("set_language", [s / len(languages) for s in samples]))
+    print(f"界面文本绑定: {len(window.i18n)}")
+
+    print(f"方案缓存: {dict(window.scheme_cache.stats)}")
+    for window in windows:
+        window.deleteLater()
+    app.processEvents()
+    return results, backend
+
+
+def run_scaling_benchmarks(args):
+    """不同方案数量下的刷新耗时（缓存有效时只更新列表；外部改动后重新读取）"""
+    from PyQt6.QtWidgets import QApplication
+
+    import gui
+    from power_backend import SimulatedPowerBackend
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = []
+    for count in args.scheme_counts:
+        # 模拟后端自带 3 个内置方案
+        backend = SimulatedPowerBackend(latency=args.latency, extra_schemes=max(0, count - 3))
+        window = gui.PowerManager(backend)
+        wait_for_idle(app, window.executor)
+        count = window.plan_model.rowCount()
+
+        def refresh():
+            window.refresh_power_plans()
+            wait_for_idle(app, window.executor)
+
+        # 外部改动使缓存失效后的刷新
+        def external_refresh():
+            window.scheme_cache.invalidate()
+            wait_for_idle(app, window.executor)
+
+        results.append(summarize(f"refresh_power_plans[{count}]", measure(refresh, args.repeat)))
+        results.append(summarize(f"refresh_after_external_change[{count}]", measure(external_refresh, args.repeat)))
+        window.shutdown()
+        window.deleteLater()
+        app.processEvents()
+    return results
+
+
+def startup_child(schemes, latency):
+    """冷启动测试的子进程: 按 gui.run_gui 的顺序启动，首次绘制与首次数据都完成后输出时间线（JSON）"""
+    from timeline import startup
+    from PyQt6.QtCore import QEventLoop
+    from PyQt6.QtWidgets import QApplication
+
+    import gui
+    from power_backend import SimulatedPowerBackend
+
+    startup.mark("import")
+    app = QApplication(sys.argv[:1])
+    startup.mark("qapplication")
+    window = gui.PowerManager(SimulatedPowerBackend(latency=latency, extra_schemes=schemes), startup)
+    startup.mark("window")
+    window.show()
+    startup.mark("show")
+    deadline = time.perf_counter() + 60
+    while "first_paint" not in startup or "first_data" not in startup:
+        if time.perf_counter() > deadline:
+            raise TimeoutError("等待首次绘制超时")
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 5)
+    json.dump({name: total for name, total, _ in startup.report()}, sys.stdout)
+    sys.stdout.flush()
+    window.shutdown()
+
+
+def idle_memory_child(mode, schemes, idle):
+    """空闲内存测试的子进程: 以托盘模式（tray）或完整窗口（window）启动，加载完成并空闲
+    idle 秒后输出峰值常驻内存（JSON）"""
+    from PyQt6.QtCore import QEventLoop
+    from PyQt6.QtWidgets import QApplication
+
+    from power_backend import SimulatedPowerBackend
+
+    app = QApplication(sys.argv[:1])
+    backend = SimulatedPowerBackend(extra_schemes=schemes)
+    if mode == "tray":
+        import tray
+        # 与 tray.run_tray 相同，只是不显示图标（offscreen 平台没有系统托盘）
+        owner = tray.TrayApp(backend)
+        close = owner.scheme_cache.close
+    else:
+        import gui
+        owner = gui.PowerManager(backend)
+        owner.show()
+        close = owner.shutdown
+    wait_for_idle(app, owner.executor)
+    deadline = time.perf_counter() + idle
+    while time.perf_counter() < deadline:
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 50)
+    json.dump({"peak_rss_mb": peak_rss_mb(), "gui": "gui" in sys.modules}, sys.stdout)
+    sys.stdout.flush()
+    close()
+
+
+def run_idle_memory(args, env, runs):
+    """托盘模式与完整窗口各自在新进程中空闲时的峰值常驻内存"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    code = "import sys, benchmark; benchmark.idle_memory_child(sys.argv[1], int(sys.argv[2]), 1.0)"
+    samples = {"tray": [], "window": []}
+    for _ in range(runs):
+        for mode in samples:
+            proc = subprocess.run([sys.executable, "-c", code, mode, str(args.schemes)],
+                                  cwd=root, env=env, capture_output=True, text=True)
+            if proc.returncode != 0 or not proc.stdout:
+                raise RuntimeError(f"空闲内存测试子进程失败（{mode}），退出码 {proc.returncode}")
+            data = json.loads(proc.stdout)
+            if mode == "tray" and data["gui"]:
+                raise RuntimeError("托盘模式导入了完整界面")
+            samples[mode].append(data["peak_rss_mb"])
+    return [summarize(f"idle_peak_rss[{mode}]", values, "mb") for mode, values in samples.items()]
+
+
+def run_startup_benchmarks(args):
+    """冷启动: 每次在新进程中启动界面，统计从进程创建到首次绘制、首次数据的时间；
+    另外比较托盘模式与完整窗口空闲时的峰值内存"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    # 时间线从子进程导入 timeline 时开始，解释器本身的启动时间由父进程测量
+    code = "import timeline, benchmark; benchmark.startup_child(int(sys.argv[1]), float(sys.argv[2]))"
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", APM_TELEMETRY="off")
+    samples = {"process": [], "first_paint": [], "first_data": []}
+    runs = max(1, args.repeat // 5)
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-c", "import sys; " + code, str(args.schemes), str(args.latency)],
+                                cwd=root, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        line = proc.stdout.readline()
+        elapsed = (time.perf_counter() - start) * 1000
+        proc.wait()
+        if not line:
+            raise RuntimeError(f"冷启动子进程失败，退出码 {proc.returncode}")
+        marks = json.loads(line)
+        samples["process"].append(elapsed)
+        samples["first_paint"].append(marks["first_paint"])
+        samples["first_data"].append(marks["first_data"])
+    return [summarize("cold_start[process]", samples["process"]),
+            summarize("cold_start[first_paint]", samples["first_paint"]),
+            summarize("cold_start[first_data]", samples["first_data"]),
+            *run_idle_memory(args, env, runs)]
+
+
+def run_parser_benchmarks(args):
+    from powercfg_parser import parse_query, parse_scheme_list
+
+    samples = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples", "powercfg")
+    locales = sorted(os.listdir(samples))
+    query = "".join(
+        open(os.path.join(samples, code, "query.txt"), encoding="utf-8", newline="").read()
+        for code in locales
+    )
+    scheme_list = "".join(
+        open(os.path.join(samples, code, "list.txt"), encoding="utf-8", newline="").read()
+        for code in locales
+    )
+
+    # 重复样本直到达到指定大小，模拟大量方案的 /Q 输出
+    dump = query * max(1, int(args.dump_mb * 1024 * 1024 / len(query)))
+    size = len(dump.encode("utf-8")) / (1024 * 1024)
+    return [
+        summarize(f"parse_scheme_list[{len(locales)} locales]",
+                  measure(lambda: parse_scheme_list(scheme_list), args.repeat)),
+        summarize(f"parse_query[{size:.1f} MB]", measure(lambda: parse_query(dump), max(1, args.repeat // 4))),
+    ]
+
+
+def run_search_benchmarks(args):
+    import search_index
+    from powercfg_parser import PowerScheme, parse_query
+
+    # 内置目录 + 五种语言的样本设置 + 额外的自定义方案
+    samples = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples", "powercfg")
+    subgroups = [subgroup for code in sorted(os.listdir(samples))
+                 for scheme in parse_query(open(os.path.join(samples, code, "query.txt"), encoding="utf-8").read())
+                 for subgroup in scheme.subgroups.values()]
+    schemes = [PowerScheme(f"00000000-0000-0000-0000-{i:012x}", f"Custom plan {i}") for i in range(args.schemes)]
+
+    def build():
+        index = search_index.build_index()
+        index.add_subgroups(subgroups)
+        index.update_schemes(schemes)
+        return index
+
+    index = build()
+    renamed = schemes[:-1] + [PowerScheme(schemes[-1].guid, "Renamed plan")] if schemes else schemes
+
+    def update():
+        index.update_schemes(renamed)
+        index.update_schemes(schemes)
+
+    # 逐字输入时每次按键的查询，最后一个词有拼写错误（模糊匹配）
+    typing = ["p", "pr", "pro", "proc", "proc m", "proc ma", "proc max", "高", "高性", "ausbal", "procesor"]
+    samples_typing = measure(lambda: [index.search(query) for query in typing], args.repeat * 10)
+    print(f"搜索索引: {len(index)} 个条目")
+    return [
+        summarize("search_index_build", measure(build, args.repeat)),
+        summarize(f"search_index_update[{len(schemes)}]", [s / 2 for s in measure(update, args.repeat)]),
+        summarize("search_keystroke", [s / len(typing) for s in samples_typing]),
+        summarize("search_fuzzy", measure(lambda: index.search("procesor stat"), args.repeat * 10)),
+    ]
+
+
+def run_registry_benchmarks(args):
+    from power_backend import PowerBackend, SimulatedPowerBackend
+    from registry_tweaks import TweakEngine
+
+    # 每项单独读取与一次批量读取的差别（模拟后端每次调用都有 latency 的延迟）
+    backend = SimulatedPowerBackend(latency=args.latency)
+    engine = TweakEngine(backend)
+    names = [(tweak.key, tweak.value_name) for tweak in engine.tweaks.values()]
+    single = measure(lambda: PowerBackend.read_registry_values(backend, names), args.repeat)
+    return [summarize(f"read_tweaks[{len(names)} single]", single),
+            summarize(f"read_tweaks[{len(names)} batched]", measure(engine.read, args.repeat))]
+
+
+def run_shell_benchmarks(args):
+    import subprocess
+
+    from shell_host import PythonDialect, ShellPool
+
+    # 以 Python 替身比较常驻会话与每次启动新进程的差别
+    pool = ShellPool(PythonDialect(), size=1)
+    pool.run("pass")
+    try:
+        warm = measure(lambda: pool.run("print('ok')"), args.repeat)
+    finally:
+        pool.close()
+    cold = measure(lambda: subprocess.run([sys.executable, "-c", "print('ok')"], capture_output=True),
+                   max(1, args.repeat // 4))
+    return [summarize("shell_command[persistent]", warm), summarize("shell_command[new process]", cold)]
+
+
+def load_history(path):
+    """读取历史记录（列表），文件不存在时返回空列表"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def save_history(path, history):
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump(history, f, ensure_ascii=False, indent=1)
+    os.replace(temp, path)
+
+
+def find_baseline(history, label=None):
+    """最近一次记录；指定 label 时为带该标签的最近一次记录，没有时返回 None"""
+    for run in reversed(history):
+        if label is None or run.get("label") == label:
+            return run
+    return None
+
+
+def compare(results, baseline, threshold, min_delta, min_delta_mb=1.0):
+    """与基准比较中位数，返回回退的项 [(名称, 基准, 当前, 变化比例, 单位)]
+
+    只比较两次都有的项；变化比例超过 threshold 且绝对差超过 min_delta（毫秒，
+    内存项为 min_delta_mb MB）才算回退，避免极短的测试项因噪声误报。
+    """
+    previous = {r["name"]: r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        unit = unit_of(r)
+        key = f"median_{unit}"
+        old = previous.get(r["name"])
+        if old is None or not old.get(key, 0) > 0:
+            continue
+        change = r[key] / old[key] - 1
+        if change > threshold and r[key] - old[key] > (min_delta_mb if unit == "mb" else min_delta):
+            regressions.append((r["name"], old[key], r[key], change, unit))
+    return regressions
+
+
+SUITES = {
+    "gui": run_gui_benchmarks,
+    "scaling": run_scaling_benchmarks,
+    "startup": run_startup_benchmarks,
+    "parser": run_parser_benchmarks,
+    "search": run_search_benchmarks,
+    "registry": run_registry_benchmarks,
+    "shell": run_shell_benchmarks,
+}
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="高级电源管理工具性能测试")
+    parser.add_argument("--schemes", type=int, default=0, help="额外生成的自定义方案数量")
+    parser.add_argument("--scheme-counts", default="5,100,1000",
+                        help="刷新测试使用的方案总数，逗号分隔（scaling 测试组）")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟后端每次调用的延迟（秒）")
+    parser.add_argument("--repeat", type=int, default=20, help="每项测试的重复次数")
+    parser.add_argument("--dump-mb", type=float, default=4.0, help="/Q 解析测试使用的输出大小（MB）")
+    parser.add_argument("--suite", action="append", choices=tuple(SUITES),
+                        help="只运行指定的测试组，可重复；默认全部")
+    parser.add_argument("--history", help="把结果追加到 JSON 历史文件，并与基准比较")
+    parser.add_argument("--label", help="本次记录的标签（如版本号），可作为以后的基准")
+    parser.add_argument("--baseline", help="与带此标签的最近一次记录比较，默认为上一次记录")
+    parser.add_argument("--threshold", type=float, default=0.2, help="中位数变慢超过此比例视为回退（默认 0.2）")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="忽略绝对差小于此值（毫秒）的变化")
+    parser.add_argument("--min-delta-mb", type=float, default=1.0, help="内存项忽略绝对差小于此值（MB）的变化")
+    parser.add_argument("--no-record", action="store_true", help="只与基准比较，不写入历史文件")
+    args = parser.parse_args(argv)
+    args.scheme_counts = [int(count) for count in args.scheme_counts.split(",") if count.strip()]
+
+    results = []
+    backend = None
+    for suite in args.suite or SUITES:
+        if suite == "gui":
+            # 模拟后端的调用次数用于估算 powercfg 本身的耗时
+            suite_results, backend = run_gui_benchmarks(args)
+            results += suite_results
+        else:
+            results += SUITES[suite](args)
+    settings = {name: value for name, value in vars(args).items()
+                if name in ("schemes", "scheme_counts", "latency", "repeat", "dump_mb")}
+
+    for unit in ("ms", "mb"):
+        rows = [r for r in results if unit_of(r) == unit]
+        if not rows:
+            continue
+        label = "ms" if unit == "ms" else "MB"
+        print(f"{'测试项':<40}{'次数':>6}{f'最小({label})':>12}{f'中位数({label})':>12}{f'平均({label})':>12}")
+        for r in rows:
+            print(f"{r['name']:<40}{r['runs']:>6}{r[f'min_{unit}']:>12}{r[f'median_{unit}']:>12}{r[f'mean_{unit}']:>12}")
+    memory = {r["name"]: r["median_mb"] for r in results if unit_of(r) == "mb"}
+    if "idle_peak_rss[tray]" in memory and "idle_peak_rss[window]" in memory:
+        tray, window = memory["idle_peak_rss[tray]"], memory["idle_peak_rss[window]"]
+        print(f"托盘模式空闲峰值内存: {tray:.1f} MB，完整窗口的 {tray / window:.0%}（少 {window - tray:.1f} MB）")
+
+    if backend is not None:
+        # 模拟延迟部分即 powercfg 本身的耗时，其余为程序自身的开销
+        calls = sum(backend.call_counts.values())
+        print(f"\n后端调用: {dict(backend.call_counts)}")
+        print(f"模拟 powercfg 耗时合计: {calls * args.latency * 1000:.1f} ms")
+
+    if not args.history:
+        return 0
+    history = load_history(args.history)
+    baseline = find_baseline(history, args.baseline)
+    regressions = []
+    if baseline is None:
+        print(f"\n没有可比较的基准{'（标签 ' + args.baseline + '）' if args.baseline else ''}")
+    else:
+        regressions = compare(results, baseline, args.threshold, args.min_delta, args.min_delta_mb)
+        print(f"\n基准: {baseline.get('label') or baseline['time']}，阈值 {args.threshold:.0%}")
+        if baseline.get("args") != settings:
+            print(f"注意: 基准的测试参数不同 ({baseline.get('args')})")
+        for name, old, new, change, unit in regressions:
+            unit = "ms" if unit == "ms" else "MB"
+            print(f"性能回退: {name} {old} {unit} -> {new} {unit} (+{change:.0%})")
+        if not regressions:
+            print("没有性能回退")
+    if not args.no_record:
+        history.append({
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "label": args.label,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": settings,
+            "results": results,
+        })
+        save_history(args.history, history)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,498 @@
+"""命令行接口
+
+不导入 PyQt6，也不会请求管理员权限，适合脚本和计划任务调用。结果以 JSON
+输出到标准输出；出错时向标准错误输出 {"error": ...} 并返回 1。
+
+    python main.py list
+    python main.py set high            # 快捷计划 ID、GUID、别名或方案名称
+    python main.py delete <GUID>
+    python main.py reg get PlatformAoAcOverride
+    python main.py reg set PlatformAoAcOverride 0
+    python main.py tweaks --apply HiberbootEnabled --revert PlatformAoAcOverride
+    python main.py export -o all.apmsnap
+    python main.py profile apply office.json         # - 表示从标准输入读取
+    python main.py fleet office.json --hosts hosts.txt --concurrency 16
+    python main.py govern --up 70 --down 30 --dwell 60
+    python main.py rules --rule "blender*=ultimate:10" --rule make=high
+    python main.py schedule --rule "high=mon-fri@09:00-18:00" --default eco
+    python main.py perf apply 低延迟                  # 性能配置（计划 + 进程优先级/CPU 亲和性）
+    python main.py perf restore
+    python main.py search proc max                   # 按名称（任意语言）、别名或 GUID 搜索方案与设置
+    python main.py service                           # 常驻服务（JSON-RPC，见 service.py）
+    python main.py --backend service set high        # 通过常驻服务切换
+    python main.py --metrics calls.prom list   # 同时导出本次调用的耗时（.json 或 Prometheus 文本）
+    python main.py list --metrics calls.json   # 全局选项也可以写在子命令之后
+"""
+import argparse
+import json
+import sys
+
+from plans import PlanError, delete_plan, resolve_plan, switch_plan
+from power_backend import POWER_KEY, REG_DWORD, REG_SZ, BackendError, create_backend
+from registry_tweaks import TweakEngine, TweakError
+from scheme_cache import SchemeCache
+
+
+def _scheme_json(scheme):
+    return {"guid": scheme.guid, "name": scheme.name, "active": scheme.active}
+
+
+def cmd_list(cache, backend, args):
+    return [_scheme_json(scheme) for scheme in cache.schemes()]
+
+
+def cmd_set(cache, backend, args):
+    return _scheme_json(switch_plan(cache, resolve_plan(cache, args.plan)))
+
+
+def cmd_delete(cache, backend, args):
+    scheme = delete_plan(cache, resolve_plan(cache, args.plan))
+    return {"deleted": scheme.guid, "name": scheme.name}
+
+
+def cmd_reg(cache, backend, args):
+    if args.action == "get":
+        try:
+            value = backend.get_registry_value(args.name, args.key)
+        except FileNotFoundError:
+            value = None
+        return {"key": args.key, "name": args.name, "value": value}
+    if args.action == "set":
+        value = int(args.value, 0) if args.type == "dword" else args.value
+        backend.set_registry_value(args.name, value, REG_DWORD if args.type == "dword" else REG_SZ, args.key)
+        return {"key": args.key, "name": args.name, "value": value}
+    backend.delete_registry_value(args.name, args.key)
+    return {"key": args.key, "name": args.name, "deleted": True}
+
+
+def cmd_tweaks(cache, backend, args):
+    engine = TweakEngine(backend)
+    desired = {}
+    for name in args.apply or ():
+        desired[name] = engine.tweak(name).value
+    for name in args.revert or ():
+        desired[name] = engine.tweak(name).default
+    if not desired or args.dry_run:
+        return [state.to_dict() for state in engine.states(desired) if state.changed or not desired]
+    return {"changed": [state.to_dict() for state in engine.apply(desired)]}
+
+
+def cmd_export(cache, backend, args):
+    # 快照模块会创建线程池，只在需要时导入
+    from snapshot import take_snapshot
+
+    guids = [resolve_plan(cache, name) for name in args.plans] or [s.guid for s in cache.schemes()]
+    snapshot = take_snapshot(backend, guids)
+    if args.output:
+        snapshot.save(args.output)
+        return {"output": args.output, "schemes": list(snapshot.schemes)}
+    return {
+        "created": snapshot.created,
+        "schemes": [
+            {
+                "guid": scheme.guid,
+                "name": scheme.name,
+                "settings": [
+                    {"subgroup": sub, "setting": setting, "name": snapshot.name_of(setting), "ac": ac, "dc": dc}
+                    for (sub, setting), (ac, dc) in scheme.values.items()
+                ],
+            }
+            for scheme in snapshot.schemes.values()
+        ],
+    }
+
+
+def cmd_profile(cache, backend, args):
+    from fleet import PowerProfile, apply_profile
+
+    if args.file == "-":
+        profile = PowerProfile.from_dict(json.load(sys.stdin))
+    else:
+        profile = PowerProfile.load(args.file)
+    return apply_profile(cache, backend, profile)
+
+
+def cmd_fleet(cache, backend, args):
+    import fleet
+
+    profile = fleet.PowerProfile.load(args.profile)
+    if args.loopback:
+        transport = fleet.LoopbackTransport.simulate(
+            args.loopback, latency=args.loopback_latency, failure_rate=args.loopback_failures
+        )
+        hosts = list(transport.backends)
+    else:
+        hosts = list(args.host or ())
+        if args.hosts:
+            with open(args.hosts, "r", encoding="utf-8") as f:
+                hosts += [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+        if not hosts:
+            raise ValueError("没有主机（使用 --host 或 --hosts 指定）")
+        transport = fleet.CommandTransport(args.command)
+
+    def log(result):
+        json.dump(result.to_dict(), sys.stderr)
+        sys.stderr.write("\n")
+        sys.stderr.flush()
+
+    report = fleet.run_fleet(transport, hosts, profile, concurrency=args.concurrency, timeout=args.timeout,
+                             retries=args.retries, on_result=log if args.verbose else None)
+    return report.to_dict()
+
+
+def cmd_service(cache, backend, args):
+    from service import PowerService
+
+    service = PowerService(backend, args.address)
+    service.start()
+    sys.stderr.write(f"电源服务已启动: {service.address}\n")
+    sys.stderr.flush()
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+    return {"stats": dict(service.stats)}
+
+
+def cmd_govern(cache, backend, args):
+    import governor
+
+    config = governor.GovernorConfig(
+        resolve_plan(cache, args.high), resolve_plan(cache, args.low), args.up / 100, args.down / 100,
+        args.window, args.dwell, args.interval
+    )
+
+    def log(decision):
+        json.dump(decision.to_dict(), sys.stdout)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+
+    if args.replay:
+        # 按给定负载逐个采样，时间按采样间隔推进，不等待
+        clock = [0.0]
+        samples = [float(v) / 100 for v in args.replay.split(",")]
+        gov = governor.LoadGovernor(cache, governor.ReplaySampler(samples), config, log, clock=lambda: clock[0])
+        for _ in samples:
+            gov.step()
+            clock[0] += config.interval
+    else:
+        gov = governor.LoadGovernor(cache, governor.create_sampler(), config, log)
+        try:
+            gov.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            gov.sampler.close()
+    active = cache.active_scheme()
+    return {"config": config.to_dict(), "stats": dict(gov.stats), "active": active and active.guid}
+
+
+def _parse_rule(text):
+    # PATTERN=PLAN[:PRIORITY]
+    pattern, sep, plan = text.rpartition("=")
+    if not sep:
+        raise ValueError(f"无效的进程规则: {text}")
+    priority = 0
+    name, sep, tail = plan.rpartition(":")
+    if sep and tail.lstrip("-").isdigit():
+        plan, priority = name, int(tail)
+    return pattern, plan, priority
+
+
+def cmd_rules(cache, backend, args):
+    import process_rules
+    from app_config import load_config
+
+    if args.rule:
+        rules = [process_rules.ProcessRule(*_parse_rule(text)) for text in args.rule]
+    else:
+        rules = process_rules.load_rules(load_config().get("process_rules", {}).get("rules"))
+    if not rules:
+        raise PlanError("没有进程规则（使用 --rule 指定，或在图形界面中添加）")
+    for rule in rules:
+        rule.plan = resolve_plan(cache, rule.plan)
+
+    def log(decision):
+        json.dump(decision.to_dict(), sys.stdout)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+
+    engine = process_rules.RuleEngine(cache, rules, process_rules.create_process_source(),
+                                      args.interval, args.settle, log)
+    if args.check:
+        # 只轮询一次，报告命中的进程，不切换
+        engine.watcher.poll()
+        matches = []
+        for pid, (name, path) in sorted((pid, info) for pid, info in engine.watcher.processes.items() if info):
+            rule = engine._match(name, path)
+            if rule is not None:
+                matches.append({"pid": pid, "name": name, "path": path, "rule": rule.pattern, "plan": rule.plan})
+        rule = next((r for r in engine.rules if any(m["rule"] == r.pattern for m in matches)), None)
+        return {"rules": [r.to_dict() for r in engine.rules], "matches": matches, "plan": rule and rule.plan}
+    try:
+        engine.run()
+    except KeyboardInterrupt:
+        pass
+    active = cache.active_scheme()
+    return {"stats": dict(engine.stats), "active": active and active.guid}
+
+
+def _parse_schedule_rule(text):
+    # PLAN=DAYS@HH:MM-HH:MM，DAYS 可省略
+    plan, sep, when = text.partition("=")
+    days, sep2, hours = when.rpartition("@")
+    start, sep3, end = hours.partition("-")
+    if not sep or not sep3:
+        raise ValueError(f"无效的时间表: {text}")
+    return plan, days or "*", start, end
+
+
+def cmd_schedule(cache, backend, args):
+    import datetime
+    import schedule
+    from app_config import load_config
+
+    section = load_config().get("schedule", {})
+    if args.rule:
+        rules = [schedule.ScheduleRule(*_parse_schedule_rule(text)) for text in args.rule]
+        sched = schedule.Schedule(rules, args.default)
+    else:
+        sched = schedule.load_schedule(section)
+        sched.default = args.default or sched.default
+    if not sched.rules:
+        raise PlanError("没有时间表（使用 --rule 指定，或在配置文件的 schedule 一节中添加）")
+
+    def log(decision):
+        json.dump(decision.to_dict(), sys.stdout)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+
+    clock = schedule.ManualClock(datetime.datetime.now()) if args.simulate else None
+    scheduler = schedule.PlanScheduler(cache, sched, clock, log)
+    sched = scheduler.schedule
+    if args.check:
+        rule = sched.rule_at(scheduler.now())
+        return {"schedule": sched.to_dict(), "rule": rule and rule.to_dict(), "plan": sched.plan_at(scheduler.now()),
+                "next": [{"time": when.isoformat(timespec="minutes"), "plan": plan}
+                         for when, plan in scheduler.next_transitions()]}
+    if args.simulate:
+        # 从现在开始模拟 N 小时，不等待
+        scheduler.run(until=clock.time() + args.simulate * 3600)
+    else:
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            pass
+    active = cache.active_scheme()
+    return {"stats": dict(scheduler.stats), "timers": dict(scheduler.timers.stats), "active": active and active.guid}
+
+
+def cmd_perf(cache, backend, args):
+    import os
+    import perf_profiles
+    from app_config import config_dir, load_config
+
+    profiles = perf_profiles.load_profiles(load_config().get("performance_profiles"))
+    if args.action == "list":
+        return [profile.to_dict() for profile in profiles]
+    manager = perf_profiles.ProfileManager(cache, state_path=os.path.join(config_dir(), perf_profiles.STATE_FILE))
+    if args.action == "status":
+        return manager.active and manager.active.to_dict()
+    if args.action == "restore":
+        errors = manager.deactivate()
+        if errors is None:
+            raise PlanError("没有生效的性能配置")
+        active = cache.active_scheme()
+        return {"errors": [{"pid": pid, "name": name, "error": error} for pid, name, error in errors],
+                "active": active and active.guid}
+    if not args.name:
+        raise PlanError("需要指定性能配置名称")
+    profile = next((p for p in profiles if p.name == args.name), None)
+    if profile is None:
+        raise PlanError(f"找不到性能配置: {args.name}")
+    if args.dry_run:
+        return {"profile": profile.to_dict(), "scheme": profile.scheme and resolve_plan(cache, profile.scheme),
+                "matches": [{"pid": pid, "name": name, "pattern": tuning.pattern}
+                            for pid, name, tuning in manager.matching_processes(profile)]}
+    return manager.activate(profile).to_dict()
+
+
+def cmd_search(cache, backend, args):
+    import search_index
+    from powercfg_parser import parse_query
+
+    index = search_index.build_index()
+    index.update_schemes(cache.schemes())
+    active = cache.active_scheme()
+    if active is not None and args.kind != "scheme":
+        # 当前方案的 /Q 输出包含系统语言的设置名称
+        for scheme in parse_query(backend.query_scheme(active.guid)):
+            index.add_subgroups(scheme.subgroups.values())
+    kinds = (args.kind,) if args.kind else None
+    return [entry.to_dict() for entry in index.search(" ".join(args.query), args.limit, kinds)]
+
+
+def _add_global_options(parser, default=None):
+    # 子命令中重复声明，默认值为 SUPPRESS，不会覆盖写在子命令之前的值
+    parser.add_argument("--backend", choices=("windows", "sim", "service"), default=default,
+                        help="电源后端，默认由 APM_BACKEND 决定；service 表示连接常驻服务")
+    parser.add_argument("--metrics", metavar="FILE", default=default,
+                        help="退出时把系统调用的耗时统计写入文件（.json 为 JSON，其余为 Prometheus 文本格式）")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="高级电源管理工具（命令行）")
+    _add_global_options(parser)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="列出电源计划").set_defaults(func=cmd_list)
+
+    p = commands.add_parser("set", help="切换电源计划")
+    p.add_argument("plan", help="eco / balanced / high / ultimate、GUID、别名或计划名称")
+    p.set_defaults(func=cmd_set)
+
+    p = commands.add_parser("delete", help="删除自定义电源计划")
+    p.add_argument("plan", help="GUID 或计划名称")
+    p.set_defaults(func=cmd_delete)
+
+    p = commands.add_parser("reg", help="读取或修改电源相关注册表值")
+    reg = p.add_subparsers(dest="action", required=True)
+    for action in ("get", "set", "delete"):
+        r = reg.add_parser(action)
+        r.add_argument("name", nargs=None if action == "set" else "?", default="PlatformAoAcOverride")
+        if action == "set":
+            r.add_argument("value")
+            r.add_argument("--type", choices=("dword", "sz"), default="dword")
+        r.add_argument("--key", default=POWER_KEY, help="HKEY_LOCAL_MACHINE 下的键路径")
+    p.set_defaults(func=cmd_reg)
+
+    p = commands.add_parser("tweaks", help="查看或应用电源相关的注册表调整（多项修改作为一个事务写入）")
+    p.add_argument("--apply", action="append", metavar="NAME", help="写入调整后的值，可重复")
+    p.add_argument("--revert", action="append", metavar="NAME", help="恢复默认值，可重复")
+    p.add_argument("--dry-run", action="store_true", help="只列出将要修改的项")
+    p.set_defaults(func=cmd_tweaks)
+
+    p = commands.add_parser("export", help="导出电源计划的全部设置")
+    p.add_argument("plans", nargs="*", help="要导出的计划，默认全部")
+    p.add_argument("-o", "--output", help="保存为快照文件（gzip 压缩），不指定时输出 JSON")
+    p.set_defaults(func=cmd_export)
+
+    p = commands.add_parser("profile", help="在本机应用电源配置（方案、设置值、注册表调整）")
+    p.add_argument("action", choices=("apply",))
+    p.add_argument("file", help="配置文件（JSON），- 表示标准输入")
+    p.set_defaults(func=cmd_profile)
+
+    p = commands.add_parser("fleet", help="把电源配置并行下发到多台主机")
+    p.add_argument("profile", help="配置文件（JSON）")
+    p.add_argument("--host", action="append", help="主机名，可重复")
+    p.add_argument("--hosts", help="主机列表文件，每行一个（# 开头为注释）")
+    p.add_argument("--command", default="ssh -o BatchMode=yes {host} python main.py profile apply -",
+                   help="在每台主机上执行的命令，{host} 替换为主机名，配置从标准输入传入")
+    p.add_argument("--concurrency", type=int, default=8, help="同时进行的主机数")
+    p.add_argument("--timeout", type=float, default=30, help="每次尝试的时限（秒）")
+    p.add_argument("--retries", type=int, default=2, help="连接失败或超时后的重试次数")
+    p.add_argument("--verbose", action="store_true", help="每台主机完成时向标准错误输出结果")
+    p.add_argument("--loopback", type=int, metavar="N", help="不连接真实主机，在本机模拟 N 台主机")
+    p.add_argument("--loopback-latency", type=float, default=0.05, help="模拟主机的响应延迟（秒）")
+    p.add_argument("--loopback-failures", type=float, default=0.0, help="模拟主机连接失败的概率（0~1）")
+    p.set_defaults(func=cmd_fleet)
+
+    p = commands.add_parser("service", help="作为常驻服务运行，通过命名管道或 Unix 套接字接受 JSON-RPC 请求")
+    p.add_argument("--address", help="管道名或套接字路径，默认由 APM_SERVICE_ADDRESS 决定")
+    p.set_defaults(func=cmd_service)
+
+    p = commands.add_parser("govern", help="按 CPU 负载自动切换电源计划（前台运行，Ctrl+C 停止）")
+    p.add_argument("--high", default="high", help="负载高时使用的计划")
+    p.add_argument("--low", default="balanced", help="负载低时使用的计划")
+    p.add_argument("--up", type=float, default=70, help="升档阈值（平均利用率 %%）")
+    p.add_argument("--down", type=float, default=30, help="降档阈值（平均利用率 %%）")
+    p.add_argument("--window", type=int, default=10, help="计算平均值的样本数")
+    p.add_argument("--dwell", type=float, default=60, help="两次切换之间的最短停留时间（秒）")
+    p.add_argument("--interval", type=float, default=1, help="采样间隔（秒）")
+    p.add_argument("--replay", help="用逗号分隔的利用率（%%）代替实际采样，用于测试")
+    p.set_defaults(func=cmd_govern)
+
+    p = commands.add_parser("rules", help="按运行中的进程切换电源计划（前台运行，Ctrl+C 停止）")
+    p.add_argument("--rule", action="append", metavar="PATTERN=PLAN[:PRIORITY]",
+                   help="进程名称或路径（可用通配符）= 计划，可重复；默认使用配置文件中的规则")
+    p.add_argument("--interval", type=float, default=2, help="轮询间隔（秒）")
+    p.add_argument("--settle", type=float, default=3, help="目标计划保持多久不变才切换（秒）")
+    p.add_argument("--check", action="store_true", help="只检查当前命中的进程，不切换")
+    p.set_defaults(func=cmd_rules)
+
+    p = commands.add_parser("schedule", help="按时间表切换电源计划（前台运行，Ctrl+C 停止）")
+    p.add_argument("--rule", action="append", metavar="PLAN=DAYS@HH:MM-HH:MM",
+                   help="时段，DAYS 与 cron 的星期字段相同（如 mon-fri，可省略），可重复；默认使用配置文件中的时间表")
+    p.add_argument("--default", help="不在任何时段内时使用的计划")
+    p.add_argument("--check", action="store_true", help="只显示当前应使用的计划与接下来的切换，不切换")
+    p.add_argument("--simulate", type=float, metavar="HOURS", help="用模拟时钟从现在起运行若干小时，立即输出所有切换")
+    p.set_defaults(func=cmd_schedule)
+
+    p = commands.add_parser("perf", help="启用或恢复性能配置（电源计划与进程优先级、CPU 亲和性）")
+    p.add_argument("action", choices=("list", "apply", "restore", "status"))
+    p.add_argument("name", nargs="?", help="配置名称（apply 时需要）")
+    p.add_argument("--dry-run", action="store_true", help="只列出将要调整的进程")
+    p.set_defaults(func=cmd_perf)
+
+    p = commands.add_parser("search", help="按名称（任意语言）、别名或 GUID 搜索方案、子组与设置，支持前缀与模糊匹配")
+    p.add_argument("query", nargs="+")
+    p.add_argument("--kind", choices=("scheme", "subgroup", "setting"), help="只返回该类型的结果")
+    p.add_argument("--limit", type=int, default=20, help="最多返回的结果数，0 表示不限")
+    p.set_defaults(func=cmd_search)
+    for sub in [*commands.choices.values(), *reg.choices.values()]:
+        _add_global_options(sub, argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        backend = create_backend(args.backend)
+    except OSError as e:
+        # 无法连接常驻服务
+        _error(str(e))
+        return 1
+    cache = SchemeCache(backend, watch=False)
+    try:
+        result = args.func(cache, backend, args)
+    except PermissionError:
+        _error("需要管理员权限")
+        return 1
+    except TweakError as e:
+        # 回滚失败的项需要用户手动处理
+        _error(str(e), [f"{state.tweak.name}: {error}" for state, error in e.rollback_errors] or None)
+        return 1
+    except BackendError as e:
+        _error(str(e), e.stderr.strip() or None)
+        return 1
+    except (PlanError, OSError, ValueError) as e:
+        _error(str(e))
+        return 1
+    finally:
+        if args.metrics:
+            _export_metrics(args.metrics)
+    json.dump(result, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+def _export_metrics(path):
+    from instrumentation import instruments
+
+    try:
+        if path.lower().endswith(".json"):
+            instruments.export_json(path)
+        else:
+            instruments.export_prometheus(path)
+    except OSError as e:
+        _error(f"无法写入统计文件: {e}")
+
+
+def _error(message, detail=None):
+    error = {"error": message}
+    if detail:
+        error["detail"] = detail
+    json.dump(error, sys.stderr)
+    sys.stderr.write("\n")
@@ -0,0 +1,179 @@
+import collections
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+
+class _TaskSignals(QObject):
+    """后台任务完成信号（QRunnable 本身不能携带信号）"""
+    finished = pyqtSignal(object, bool, object)
+
+
+class CommandTask(QRunnable):
+    """在线程池中运行的一条命令"""
+
+    def __init__(self, label, func, args, kwargs, on_success, on_error, mutating, key=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.label = label
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_success = on_success
+        self.on_error = on_error
+        self.mutating = mutating
+        self.key = key
+        self.signals = _TaskSignals()
+
+    def run(self):
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.finished.emit(self, False, e)
+        else:
+            self.signals.finished.emit(self, True, result)
+
+
+class CommandExecutor(QObject):
+    """异步命令执行器
+
+    只读命令（如 powercfg /L）直接交给全局线程池并发执行；会修改系统状态的
+    命令按提交顺序排队，同一时刻只运行一条。结果通过信号回到 GUI 线程，
+    再调用提交时给出的回调。
+
+    提交时给出 key 的命令会合并:
+
+        只读命令    同一 key 同时只运行一条；运行期间的请求合并为一条，在当前
+                    这条完成后再运行（使用最后一次请求的参数和回调）
+        修改命令    新的命令取代队列中尚未开始的同一 key 的命令（后来者为准），
+                    被取代的命令不会运行，也不会调用回调
+
+    debounce() 把短时间内的连续调用合并为最后一次。stats[key] 记录请求
+    （requested）、实际执行（executed）、被合并（coalesced）、被取代
+    （superseded）的次数，以及 debounce 收到的调用（events）。
+    """
+
+    # 是否有任务在运行
+    busy_changed = pyqtSignal(bool)
+    # 当前任务描述, 未完成任务数
+    progress = pyqtSignal(str, int)
+
+    def __init__(self, parent=None, max_workers=4):
+        super().__init__(parent)
+        # 命令大多在等待子进程，线程数不必受 CPU 核数限制
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(max_workers, QThreadPool.globalInstance().maxThreadCount()))
+        # 修改类命令使用独立的单线程池，避免被长时间运行的只读命令挤占
+        self.serial_pool = QThreadPool(self)
+        self.serial_pool.setMaxThreadCount(1)
+        self._queue = collections.deque()
+        self._running_mutation = None
+        self._active = set()
+        # 正在运行的只读命令 {key: 任务} 及其完成后要运行的合并请求
+        self._inflight = {}
+        self._trailing = {}
+        # debounce: {key: QTimer} 与最后一次调用的函数
+        self._debounce_timers = {}
+        self._debounced = {}
+        self.stats = collections.defaultdict(collections.Counter)
+
+    def pending_count(self):
+        """返回尚未完成的任务数（包括排队中的）"""
+        return len(self._active) + len(self._queue) + len(self._trailing)
+
+    def is_busy(self):
+        """是否有未完成的任务或尚未触发的 debounce 调用"""
+        return self.pending_count() > 0 or any(timer.isActive() for timer in self._debounce_timers.values())
+
+    def submit(self, label, func, *args, on_success=None, on_error=None, mutating=False, key=None, **kwargs):
+        """提交一条命令
+
+        func 在工作线程中以 func(*args, **kwargs) 调用；on_success(result) 与
+        on_error(exception) 在 GUI 线程中调用。mutating=True 的命令严格按顺序执行。
+        key 不为 None 时按类说明中的规则合并。
+        """
+        was_busy = self.pending_count() > 0
+        task = CommandTask(label, func, args, kwargs, on_success, on_error, mutating, key)
+        task.signals.finished.connect(self._on_task_finished)
+        if key is not None:
+            self.stats[key]["requested"] += 1
+
+        if mutating:
+            if key is not None and any(queued.key == key for queued in self._queue):
+                kept = collections.deque(queued for queued in self._queue if queued.key != key)
+                self.stats[key]["superseded"] += len(self._queue) - len(kept)
+                self._queue = kept
+            self._queue.append(task)
+            self._start_next_mutation()
+        elif key is not None and key in self._inflight:
+            if key in self._trailing:
+                self.stats[key]["coalesced"] += 1
+            self._trailing[key] = task
+        else:
+            self._start(task)
+
+        if not was_busy:
+            self.busy_changed.emit(True)
+        self.progress.emit(label, self.pending_count())
+        return task
+
+    def debounce(self, key, func, delay=100):
+        """delay 毫秒内没有新的调用时才在 GUI 线程中调用 func()（使用最后一次给出的 func）"""
+        timer = self._debounce_timers.get(key)
+        if timer is None:
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda: self._debounced.pop(key)())
+            self._debounce_timers[key] = timer
+        self.stats[key]["events"] += 1
+        self._debounced[key] = func
+        timer.start(delay)
+
+    def flush(self):
+        """立即执行所有尚未触发的 debounce 调用"""
+        for key, timer in self._debounce_timers.items():
+            if timer.isActive():
+                timer.stop()
+                self._debounced.pop(key)()
+
+    def _start(self, task):
+        self._active.add(task)
+        if task.key is not None:
+            self.stats[task.key]["executed"] += 1
+            if not task.mutating:
+                self._inflight[task.key] = task
+        (self.serial_pool if task.mutating else self.pool).start(task)
+
+    def _start_next_mutation(self):
+        if self._running_mutation is not None or not self._queue:
+            return
+        task = self._queue.popleft()
+        self._running_mutation = task
+        self._start(task)
+
+    def _on_task_finished(self, task, ok, result):
+        self._active.discard(task)
+        if task is self._running_mutation:
+            self._running_mutation = None
+            self._start_next_mutation()
+        elif task.key is not None and self._inflight.get(task.key) is task:
+            del self._inflight[task.key]
+            trailing = self._trailing.pop(task.key, None)
+            if trailing is not None:
+                self._start(trailing)
+
+        try:
+            if ok:
+                if task.on_success:
+                    task.on_success(result)
+            elif task.on_error:
+                task.on_error(result)
+            else:
+                print(f"后台任务失败: {task.label}: {result}")
+        finally:
+            remaining = self.pending_count()
+            if remaining:
+                current = self._running_mutation or next(iter(self._active))
+                self.progress.emit(current.label, remaining)
+            else:
+                self.progress.emit("", 0)
+                self.busy_changed.emit(False)
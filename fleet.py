@@ -0,0 +1,313 @@
+"""批量下发电源配置
+
+配置（PowerProfile）包含要激活的方案、方案中需要覆盖的设置值和注册表调整，
+保存为 JSON:
+
+    {"scheme": "high",
+     "settings": [{"subgroup": GUID, "setting": GUID, "ac": 100, "dc": 50}],
+     "tweaks": {"HiberbootEnabled": 0}}
+
+FleetRunner 通过传输层（Transport）把配置下发到一组主机: 最多 concurrency 个
+主机同时进行，每次尝试有 timeout 秒的时限，连接失败或超时（TransportError）
+最多重试 retries 次，配置本身无法应用（RemoteError）时不重试。结果汇总为
+FleetReport，包括每台主机的尝试次数和耗时。
+
+    CommandTransport    每台主机运行一条命令（如 ssh），通过标准输入传入配置，
+                        远端执行 main.py profile apply -
+    LoopbackTransport   在本进程内模拟 N 台主机（模拟后端），可设置延迟与失败率
+"""
+import asyncio
+import json
+import random
+import shlex
+import time
+
+from plans import resolve_plan, switch_plan
+from power_backend import SimulatedPowerBackend
+from registry_tweaks import TweakEngine
+from scheme_cache import SchemeCache
+
+
+class PowerProfile:
+    """要下发的电源配置；settings 为 (子组 GUID, 设置 GUID, AC, DC)，值为 None 时不修改"""
+
+    __slots__ = ("scheme", "settings", "tweaks")
+
+    def __init__(self, scheme=None, settings=(), tweaks=None):
+        self.scheme = scheme
+        self.settings = [tuple(item) for item in settings]
+        self.tweaks = dict(tweaks or {})
+
+    def to_dict(self):
+        return {
+            "scheme": self.scheme,
+            "settings": [{"subgroup": sub, "setting": setting, "ac": ac, "dc": dc}
+                         for sub, setting, ac, dc in self.settings],
+            "tweaks": self.tweaks,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            raise ValueError("无效的电源配置")
+        try:
+            settings = [(item["subgroup"].lower(), item["setting"].lower(), item.get("ac"), item.get("dc"))
+                        for item in data.get("settings") or ()]
+        except (KeyError, TypeError, AttributeError):
+            raise ValueError("无效的电源配置: settings 中每项需要 subgroup 和 setting") from None
+        if settings and not data.get("scheme"):
+            raise ValueError("无效的电源配置: 覆盖设置值时需要指定 scheme")
+        return cls(data.get("scheme"), settings, data.get("tweaks"))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def apply_profile(cache, backend, profile):
+    """在本机应用配置，返回 {"scheme", "settings", "tweaks"}（写入的设置数、修改的注册表项）"""
+    result = {"scheme": None, "settings": 0, "tweaks": []}
+    if profile.scheme:
+        guid = resolve_plan(cache, profile.scheme)
+        cache.ensure(guid)
+        if profile.settings:
+            result["settings"] = len(cache.write_settings(guid, profile.settings))
+        result["scheme"] = switch_plan(cache, guid).guid
+    if profile.tweaks:
+        result["tweaks"] = [state.tweak.name for state in TweakEngine(backend).apply(profile.tweaks)]
+    return result
+
+
+# ---- 传输层 ----
+
+class TransportError(Exception):
+    """连接失败等暂时性错误，可以重试"""
+
+
+class RemoteError(Exception):
+    """主机已收到配置但应用失败，重试不会改变结果"""
+
+
+class Transport:
+    """把配置发送到一台主机并返回远端的结果"""
+
+    async def apply(self, host, profile):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class CommandTransport(Transport):
+    """每台主机运行一条命令，配置 JSON 写入标准输入，结果从标准输出读取
+
+    command 中的 {host} 替换为主机名。远端 main.py 出错时以 1 退出并在标准错误
+    输出 {"error": ...}，视为 RemoteError；其他退出码（如 ssh 的 255）视为
+    TransportError。
+    """
+
+    def __init__(self, command="ssh -o BatchMode=yes {host} python main.py profile apply -"):
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+
+    async def apply(self, host, profile):
+        argv = [arg.format(host=host) for arg in self.command]
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *argv, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except OSError as e:
+            raise TransportError(f"无法运行 {argv[0]}: {e}") from e
+        try:
+            stdout, stderr = await process.communicate(json.dumps(profile.to_dict()).encode("utf-8"))
+        except asyncio.CancelledError:
+            # 超时后结束远端命令
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+        if process.returncode == 0:
+            try:
+                return json.loads(stdout)
+            except ValueError:
+                raise RemoteError("无法解析远端输出") from None
+        message = stderr.decode("utf-8", "replace").strip()
+        if process.returncode == 1:
+            try:
+                message = json.loads(message)["error"]
+            except (ValueError, KeyError, TypeError):
+                pass
+            raise RemoteError(message or "远端命令失败")
+        raise TransportError(message or f"退出码 {process.returncode}")
+
+
+class LoopbackTransport(Transport):
+    """在本进程内模拟若干主机，每台主机有独立的模拟后端
+
+    每次调用延迟 latency 秒（在 ±jitter 比例内随机），按 failure_rate 的概率
+    抛出 TransportError，按 hang_rate 的概率不再响应（由超时处理）。
+    unreachable 中的主机总是连接失败。
+    """
+
+    def __init__(self, hosts, latency=0.05, jitter=0.5, failure_rate=0.0, hang_rate=0.0,
+                 unreachable=(), seed=None):
+        self.backends = {host: SimulatedPowerBackend() for host in hosts}
+        self.caches = {host: SchemeCache(backend, watch=False) for host, backend in self.backends.items()}
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.unreachable = set(unreachable)
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    @classmethod
+    def simulate(cls, count, **kwargs):
+        return cls([f"sim-{i + 1:03d}" for i in range(count)], **kwargs)
+
+    async def apply(self, host, profile):
+        self.calls += 1
+        if host not in self.backends:
+            raise RemoteError(f"未知主机: {host}")
+        delay = self.latency * (1 + self.jitter * (2 * self._random.random() - 1))
+        roll = self._random.random()
+        if host in self.unreachable or roll < self.failure_rate:
+            await asyncio.sleep(delay / 2)
+            raise TransportError(f"{host}: 连接被重置")
+        if roll < self.failure_rate + self.hang_rate:
+            await asyncio.Event().wait()
+        await asyncio.sleep(delay)
+        try:
+            return apply_profile(self.caches[host], self.backends[host], profile)
+        except Exception as e:
+            raise RemoteError(str(e)) from e
+
+
+# ---- 批量执行 ----
+
+class HostResult:
+    """一台主机的结果；duration 为包括重试在内的总耗时（秒）"""
+
+    __slots__ = ("host", "ok", "attempts", "duration", "result", "error")
+
+    def __init__(self, host):
+        self.host = host
+        self.ok = False
+        self.attempts = 0
+        self.duration = 0.0
+        self.result = None
+        self.error = None
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["duration"] = round(self.duration, 4)
+        return data
+
+    def __repr__(self):
+        status = "ok" if self.ok else f"failed: {self.error}"
+        return f"HostResult({self.host}, {status}, attempts={self.attempts}, {self.duration * 1000:.0f} ms)"
+
+
+class FleetReport:
+    """所有主机的结果（顺序与输入的主机列表一致）"""
+
+    def __init__(self, results, elapsed):
+        self.results = results
+        self.elapsed = elapsed
+
+    @property
+    def succeeded(self):
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+    def percentile(self, q):
+        durations = sorted(r.duration for r in self.results)
+        if not durations:
+            return None
+        return round(durations[min(len(durations) - 1, int(q / 100 * len(durations)))], 4)
+
+    def summary(self):
+        return {
+            "hosts": len(self.results), "succeeded": len(self.succeeded), "failed": len(self.failed),
+            "attempts": sum(r.attempts for r in self.results), "elapsed": round(self.elapsed, 3),
+            "p50": self.percentile(50), "p95": self.percentile(95), "max": self.percentile(100),
+        }
+
+    def to_dict(self):
+        return {"summary": self.summary(), "hosts": [r.to_dict() for r in self.results]}
+
+
+class FleetRunner:
+    """以有限的并发把配置下发到多台主机
+
+    on_result(HostResult) 在每台主机完成后调用（在事件循环中）。重试前等待
+    backoff * 2^(n-1) 秒。
+    """
+
+    def __init__(self, transport, concurrency=8, timeout=30.0, retries=2, backoff=0.5, on_result=None):
+        if concurrency < 1:
+            raise ValueError("并发数至少为 1")
+        self.transport = transport
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.on_result = on_result
+
+    async def run(self, hosts, profile):
+        hosts = list(dict.fromkeys(hosts))
+        results = [HostResult(host) for host in hosts]
+        queue = asyncio.Queue()
+        for result in results:
+            queue.put_nowait(result)
+        start = time.perf_counter()
+        workers = [asyncio.create_task(self._worker(queue, profile))
+                   for _ in range(min(self.concurrency, len(hosts)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+        return FleetReport(results, time.perf_counter() - start)
+
+    async def _worker(self, queue, profile):
+        while not queue.empty():
+            result = queue.get_nowait()
+            await self._apply_host(result, profile)
+            if self.on_result:
+                self.on_result(result)
+
+    async def _apply_host(self, result, profile):
+        start = time.perf_counter()
+        while True:
+            result.attempts += 1
+            try:
+                result.result = await asyncio.wait_for(self.transport.apply(result.host, profile), self.timeout)
+            except (TransportError, asyncio.TimeoutError) as e:
+                result.error = str(e) or f"超时（{self.timeout} 秒）"
+                if result.attempts > self.retries:
+                    break
+                await asyncio.sleep(self.backoff * 2 ** (result.attempts - 1))
+                continue
+            except RemoteError as e:
+                result.error = str(e)
+            else:
+                result.ok = True
+                result.error = None
+            break
+        result.duration = time.perf_counter() - start
+
+
+def run_fleet(transport, hosts, profile, **kwargs):
+    """在新的事件循环中运行 FleetRunner，返回 FleetReport"""
+    async def main():
+        try:
+            return await FleetRunner(transport, **kwargs).run(hosts, profile)
+        finally:
+            await transport.close()
+
+    return asyncio.run(main())
@@ -0,0 +1,296 @@
+"""按 CPU 负载自动切换电源计划
+
+后台线程按固定间隔采样整机 CPU 利用率，放入固定长度的滑动窗口。窗口平均值
+达到升档阈值时切换到高负载计划，降到降档阈值以下时切换到低负载计划，两个
+阈值之间保持不变（迟滞）。激活的计划（包括用户手动切换的）至少保持
+min_dwell 秒后才会被再次切换，避免负载在阈值附近波动时来回切换。
+
+采样器只需提供 sample() 方法，返回自上次调用以来的利用率（0~1），第一次
+调用没有基准时返回 None:
+
+    WindowsCpuSampler   GetSystemTimes（Windows）
+    ProcStatSampler     /proc/stat（Linux）
+    ReplaySampler       按顺序返回给定的数值，用于测试和模拟
+"""
+import array
+import collections
+import ctypes
+import os
+import sys
+import time
+
+from plans import PlanError, plan_guid, switch_plan
+from polling import PollingLoop
+from power_backend import BackendError
+
+
+class CpuTimesSampler:
+    """根据两次读取的累计空闲时间与总时间之差计算利用率"""
+
+    def __init__(self):
+        self._idle = self._total = None
+
+    def close(self):
+        pass
+
+    def _update(self, idle, total):
+        previous_idle, previous_total = self._idle, self._total
+        self._idle, self._total = idle, total
+        if previous_total is None or total <= previous_total:
+            return None
+        return 1.0 - (idle - previous_idle) / (total - previous_total)
+
+
+class ProcStatSampler(CpuTimesSampler):
+    """读取 /proc/stat 第一行（所有 CPU 的累计时间）"""
+
+    def __init__(self, path="/proc/stat"):
+        super().__init__()
+        self._fd = os.open(path, os.O_RDONLY)
+
+    def close(self):
+        os.close(self._fd)
+
+    def sample(self):
+        line = os.pread(self._fd, 256, 0).split(b"\n", 1)[0]
+        # user nice system idle iowait irq softirq steal（guest 已计入 user）
+        fields = line.split()[1:9]
+        total = 0
+        for field in fields:
+            total += int(field)
+        idle = int(fields[3]) + int(fields[4])
+        return self._update(idle, total)
+
+
+class WindowsCpuSampler(CpuTimesSampler):
+    """GetSystemTimes 返回的空闲 / 内核 / 用户时间（内核时间包含空闲时间）"""
+
+    def __init__(self):
+        from ctypes import wintypes
+
+        super().__init__()
+        self._get_system_times = ctypes.windll.kernel32.GetSystemTimes
+        self._times = (wintypes.FILETIME(), wintypes.FILETIME(), wintypes.FILETIME())
+        self._refs = tuple(ctypes.byref(t) for t in self._times)
+
+    @staticmethod
+    def _value(filetime):
+        return (filetime.dwHighDateTime << 32) | filetime.dwLowDateTime
+
+    def sample(self):
+        if not self._get_system_times(*self._refs):
+            raise ctypes.WinError()
+        idle, kernel, user = self._times
+        return self._update(self._value(idle), self._value(kernel) + self._value(user))
+
+
+class ReplaySampler:
+    """按顺序返回给定的利用率；repeat 为 True 时循环，否则用完后重复最后一个值"""
+
+    def __init__(self, values, repeat=False):
+        self.values = [float(v) for v in values]
+        if not self.values:
+            raise ValueError("ReplaySampler 需要至少一个数值")
+        self.repeat = repeat
+        self._next = 0
+
+    def close(self):
+        pass
+
+    def sample(self):
+        value = self.values[self._next]
+        if self._next + 1 < len(self.values):
+            self._next += 1
+        elif self.repeat:
+            self._next = 0
+        return value
+
+
+def create_sampler():
+    """返回当前平台的 CPU 采样器"""
+    if sys.platform == "win32":
+        return WindowsCpuSampler()
+    if os.path.exists("/proc/stat"):
+        return ProcStatSampler()
+    raise OSError("当前平台不支持读取 CPU 利用率")
+
+
+class LoadWindow:
+    """固定长度的滑动窗口
+
+    数值保存在预先分配的 array 中并维护累计和，push 与 mean 均为 O(1)，不会
+    随采样分配新的容器。每写满一轮重新求和一次，消除浮点累计误差。
+    """
+
+    __slots__ = ("_values", "_next", "_count", "_sum")
+
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError("窗口长度必须大于 0")
+        self._values = array.array("d", bytes(8 * size))
+        self.clear()
+
+    def clear(self):
+        for i in range(len(self._values)):
+            self._values[i] = 0.0
+        self._next = 0
+        self._count = 0
+        self._sum = 0.0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def size(self):
+        return len(self._values)
+
+    def full(self):
+        return self._count == len(self._values)
+
+    def push(self, value):
+        values = self._values
+        self._sum += value - values[self._next]
+        values[self._next] = value
+        self._next += 1
+        if self._next == len(values):
+            self._next = 0
+            self._sum = sum(values)
+        if self._count < len(values):
+            self._count += 1
+
+    def mean(self):
+        return self._sum / self._count if self._count else 0.0
+
+
+class GovernorConfig:
+    """自动切换参数；阈值为 0~1 的利用率，window 为样本个数，时间单位为秒"""
+
+    __slots__ = ("high_plan", "low_plan", "up_threshold", "down_threshold", "window", "min_dwell", "interval")
+
+    def __init__(self, high_plan="high", low_plan="balanced", up_threshold=0.7, down_threshold=0.3,
+                 window=10, min_dwell=60.0, interval=1.0):
+        if not 0.0 <= down_threshold < up_threshold <= 1.0:
+            raise ValueError("降档阈值必须小于升档阈值，且都在 0~100% 之间")
+        if window < 1 or interval <= 0 or min_dwell < 0:
+            raise ValueError("窗口长度、采样间隔必须为正数，停留时间不能为负数")
+        self.high_plan = high_plan
+        self.low_plan = low_plan
+        self.up_threshold = up_threshold
+        self.down_threshold = down_threshold
+        self.window = int(window)
+        self.min_dwell = min_dwell
+        self.interval = interval
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SwitchDecision:
+    """一次切换决定及触发它的指标"""
+
+    __slots__ = ("time", "old", "new", "reason", "mean", "last", "samples", "dwell", "error")
+
+    def __init__(self, time, old, new, reason, mean, last, samples, dwell, error=None):
+        self.time = time
+        self.old = old
+        self.new = new
+        self.reason = reason
+        self.mean = mean
+        self.last = last
+        self.samples = samples
+        self.dwell = dwell
+        self.error = error
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        dwell = "-" if self.dwell is None else f"{self.dwell:.0f}s"
+        return (f"SwitchDecision({self.reason}: {self.old} -> {self.new}, "
+                f"mean={self.mean:.1%}, last={self.last:.1%}, dwell={dwell})")
+
+
+class LoadGovernor(PollingLoop):
+    """按负载在两个计划之间切换
+
+    step() 完成一次采样与判断，可以直接调用（测试时配合 ReplaySampler 与自定义
+    clock）；start() 在后台线程中按 config.interval 循环调用。每个切换决定
+    （包括失败的）都会记录到 decisions 并传给 on_decision，回调在采样线程中
+    执行。stats 记录采样、切换、因停留时间被推迟以及失败的次数。
+    """
+
+    thread_name = "apm-governor"
+
+    def __init__(self, cache, sampler, config=None, on_decision=None, clock=time.monotonic, history=100):
+        self.config = config or GovernorConfig()
+        super().__init__(self.config.interval)
+        self.cache = cache
+        self.sampler = sampler
+        self.on_decision = on_decision
+        self.clock = clock
+        self.window = LoadWindow(self.config.window)
+        self.decisions = collections.deque(maxlen=history)
+        self.high_guid = self._resolve(self.config.high_plan)
+        self.low_guid = self._resolve(self.config.low_plan)
+        # 当前激活的方案及其开始的时间（None 表示启动前就已激活，不限制停留时间）
+        self._active = None
+        self._active_since = None
+
+    @staticmethod
+    def _resolve(plan):
+        return (plan_guid(plan) or plan).lower()
+
+    def _track_active(self, now):
+        scheme = self.cache.active_scheme()
+        guid = scheme.guid if scheme else None
+        if guid != self._active:
+            if self._active is not None:
+                self._active_since = now
+            self._active = guid
+        return guid
+
+    def step(self):
+        """采样一次，需要切换时执行切换并返回 SwitchDecision，否则返回 None"""
+        value = self.sampler.sample()
+        if value is None:
+            return None
+        self.stats["samples"] += 1
+        self.window.push(value)
+        if not self.window.full():
+            return None
+
+        config = self.config
+        mean = self.window.mean()
+        if mean >= config.up_threshold:
+            target, reason = self.high_guid, "load_high"
+        elif mean <= config.down_threshold:
+            target, reason = self.low_guid, "load_low"
+        else:
+            return None
+
+        now = self.clock()
+        current = self._track_active(now)
+        if current == target:
+            return None
+        # dwell 为当前方案已保持的秒数，None 表示自启动以来未切换过
+        dwell = None if self._active_since is None else now - self._active_since
+        if dwell is not None and dwell < config.min_dwell:
+            self.stats["deferred"] += 1
+            return None
+
+        decision = SwitchDecision(time.time(), current, target, reason, mean, value, len(self.window), dwell)
+        try:
+            switch_plan(self.cache, target)
+        except (BackendError, PlanError, OSError) as e:
+            self.stats["errors"] += 1
+            decision.error = str(e)
+        else:
+            self.stats["switches"] += 1
+            self._active, self._active_since = target, now
+        self.decisions.append(decision)
+        if self.on_decision:
+            self.on_decision(decision)
+        return decision
+
+    def prepare(self):
+        self.sampler.sample()  # 建立基准
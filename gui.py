@@ -0,0 +1,2051 @@
+import sys
+import os
+import threading
+import time
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
+                             QPushButton, QLabel, QListView, QMessageBox, QTabWidget,
+                             QGroupBox, QGridLayout, QCheckBox, QTextEdit, QStyleFactory,
+                             QMenu, QMenuBar, QComboBox, QSizePolicy, QProgressBar,
+                             QPlainTextEdit, QSplitter, QTreeWidget, QTreeWidgetItem,
+                             QStyledItemDelegate, QSpinBox, QAbstractItemView, QFileDialog,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QLineEdit, QListWidget,
+                             QListWidgetItem)
+from PyQt6.QtGui import QIcon, QFont, QPalette, QColor, QPixmap,QAction,QIcon, QPainter, QPen, QPolygonF
+from PyQt6.QtCore import Qt, QLocale, QTimer, QModelIndex, QEvent, QPointF, pyqtSignal
+
+import app_config
+import governor
+import i18n
+import perf_profiles
+import plans
+import process_rules
+import schedule
+import registry_tweaks
+import search_index
+import telemetry
+from executor import CommandExecutor
+from instrumentation import instruments
+from output_buffer import OutputRingBuffer
+from power_backend import create_backend, elevate_if_needed
+from power_settings import load_scheme_settings
+from powercfg_parser import PowerSetting
+from scheme_cache import SchemeCache
+from scheme_model import GuidRole, NameRole, SchemeFilterProxy, SchemeListModel
+from shell_host import ShellCancelled, create_shell_pool
+from snapshot import Snapshot, diff_snapshots, restore_scheme, take_snapshot
+from timeline import startup
+
+
+class SettingValueDelegate(QStyledItemDelegate):
+    """交流/直流值的编辑器：选项型设置使用下拉框，数值型设置使用数字框"""
+    
+    value_edited = pyqtSignal(QModelIndex, int)
+    
+    def createEditor(self, parent, option, index):
+        setting = index.siblingAtColumn(0).data(Qt.ItemDataRole.UserRole)
+        if index.column() not in (1, 2) or not isinstance(setting, PowerSetting):
+            return None
+        if setting.options:
+            editor = QComboBox(parent)
+            for value, name in sorted(setting.options.items()):
+                editor.addItem(name, value)
+        else:
+            editor = QSpinBox(parent)
+            # QSpinBox 只支持 32 位有符号整数
+            editor.setRange(min(setting.minimum, 2 ** 31 - 1), min(setting.maximum, 2 ** 31 - 1))
+            editor.setSingleStep(max(1, min(setting.increment, 2 ** 31 - 1)))
+            if setting.units:
+                editor.setSuffix(" " + setting.units)
+        return editor
+    
+    def setEditorData(self, editor, index):
+        value = index.data(Qt.ItemDataRole.UserRole)
+        if isinstance(editor, QComboBox):
+            editor.setCurrentIndex(max(0, editor.findData(value)))
+        else:
+            editor.setValue(value)
+    
+    def setModelData(self, editor, model, index):
+        value = editor.currentData() if isinstance(editor, QComboBox) else editor.value()
+        if value != index.data(Qt.ItemDataRole.UserRole):
+            self.value_edited.emit(index, value)
+
+
+class Sparkline(QWidget):
+    """迷你曲线：把最近的数值画成一条折线，NaN 处断开；范围未指定时按数据缩放"""
+    
+    def __init__(self, color, minimum=None, maximum=None, parent=None):
+        super().__init__(parent)
+        self.color = QColor(color)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.values = []
+        self.setFixedSize(100, 24)
+    
+    def set_values(self, values):
+        self.values = values
+        self.update()
+    
+    def paintEvent(self, event):
+        present = [v for v in self.values if v == v]
+        if len(present) < 2:
+            return
+        low = min(present) if self.minimum is None else self.minimum
+        high = max(present) if self.maximum is None else self.maximum
+        if high <= low:
+            high = low + 1
+        width, height = self.width() - 1, self.height() - 2
+        step = width / (len(self.values) - 1)
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(self.color, 1.2))
+        segment = QPolygonF()
+        for i, value in enumerate(self.values):
+            if value != value:
+                if segment.size() > 1:
+                    painter.drawPolyline(segment)
+                segment = QPolygonF()
+                continue
+            segment.append(QPointF(i * step, 1 + height - (min(max(value, low), high) - low) / (high - low) * height))
+        if segment.size() > 1:
+            painter.drawPolyline(segment)
+        painter.end()
+
+
+class PowerManager(QMainWindow):
+    # 方案缓存发生变化（可能来自工作线程）
+    schemes_changed = pyqtSignal()
+    # 自动切换的决定（来自采样线程）
+    governor_decision = pyqtSignal(object)
+    # 进程规则引起的切换（来自轮询线程）
+    rules_decision = pyqtSignal(object)
+    # 时间表引起的切换（来自定时器线程）
+    schedule_decision = pyqtSignal(object)
+    
+    def __init__(self, backend=None, timeline=None, scheme_cache=None, translator=None):
+        super().__init__()
+        
+        # 启动时间线（None 表示不记录）
+        self.timeline = timeline
+        
+        # 操作系统访问后端（powercfg / 注册表）
+        self.backend = backend or create_backend()
+        
+        # 初始化语言（翻译表只加载一次，控件文本通过 self.i18n.bind 登记）
+        # 从托盘打开时与托盘共用翻译器，切换语言时托盘菜单一起更新
+        self.i18n = translator or i18n.Translator("en_US")
+        self.current_language = self.i18n.language
+        self.languages = i18n.LANGUAGES
+        
+        # 电源计划GUID（以稳定的计划 ID 为键，与界面语言无关）
+        self.power_guids = {plan_id: guid for plan_id, (guid, _) in plans.QUICK_PLANS.items()}
+        
+        # 后台命令执行器
+        self.executor = CommandExecutor(self)
+        
+        # 电源方案缓存，自身操作直接更新缓存，外部改动时才重新加载
+        self.scheme_cache = scheme_cache or SchemeCache(self.backend)
+        self.scheme_cache.add_listener(self.schemes_changed.emit)
+        # 连续的变更通知（如快速切换多个计划）只触发一次刷新
+        self.schemes_changed.connect(lambda: self.executor.debounce("refresh", self.refresh_power_plans))
+        
+        # 常驻 PowerShell 会话，连续执行命令时不必每次启动新进程
+        self.shell_pool = create_shell_pool()
+        self.active_plan_name = ""
+        
+        # 命令输出先写入环形缓冲，定时批量刷新到界面，内存占用有上限
+        self.output_buffer = OutputRingBuffer()
+        
+        # 托盘模式下的托盘图标，关闭窗口时只隐藏
+        self.tray = None
+        self.output_timer = QTimer(self)
+        self.output_timer.setInterval(100)
+        self.output_timer.timeout.connect(self.flush_command_output)
+        self.command_cancel = None
+        self.command_started = 0.0
+        
+        # 电源设置标签页: 当前方案的设置模型与尚未应用的修改
+        self.settings_model = None
+        self.pending_settings = {}
+        
+        # 方案、设置与别名的搜索索引（所有语言的名称），方案列表或设置加载后增量更新
+        self.search_index = search_index.build_index(self.i18n.catalogs)
+        
+        # 高级设置标签页: 注册表调整项及最近一次读取的值
+        self.tweak_engine = registry_tweaks.TweakEngine(self.backend)
+        self.tweak_values = {}
+        
+        # 按 CPU 负载自动切换计划（在自动切换页中启用）
+        self.governor = None
+        self.governor_decision.connect(self.on_governor_decision)
+        
+        # 按进程切换计划，规则保存在用户配置中，上次启用时启动后立即生效
+        self.config = app_config.load_config()
+        self.rule_engine = None
+        self.rules_decision.connect(self.on_rules_decision)
+        
+        # 按时间表切换计划，时间表保存在用户配置中（由配置文件或命令行编辑）
+        self.scheduler = None
+        self.schedule_decision.connect(self.on_schedule_decision)
+        
+        # 性能配置（计划 + 进程优先级/CPU 亲和性），上次未恢复的配置保持生效
+        self.perf_profiles = perf_profiles.load_profiles(self.config.get("performance_profiles"))
+        try:
+            self.perf_manager = perf_profiles.ProfileManager(
+                self.scheme_cache, state_path=os.path.join(app_config.config_dir(), perf_profiles.STATE_FILE))
+        except OSError as e:
+            print(f"无法调整进程: {e}")
+            self.perf_manager = None
+        
+        # 遥测：后台每秒采样，电源计划页显示最近十分钟的迷你曲线
+        source = telemetry.create_telemetry_source()
+        self.telemetry = None
+        if source is not None:
+            self.telemetry = telemetry.TelemetryRecorder(source, active_scheme=self.active_scheme_guid)
+        self.current_plans = []
+        
+        self.initUI()
+        
+        # 计划列表在后台加载，窗口显示后再填充
+        self.refresh_power_plans()
+        if self.telemetry is not None:
+            self.telemetry.start()
+            self.telemetry_timer.start()
+        rules_config = self.config.get("process_rules", {})
+        if rules_config.get("enabled"):
+            self.start_process_rules(process_rules.load_rules(rules_config.get("rules")))
+        if self.config.get("schedule", {}).get("enabled"):
+            self.start_scheduler()
+        if self.timeline is not None:
+            self.installEventFilter(self)
+        
+    def tr(self, text):
+        """自定义翻译函数"""
+        return self.i18n.tr(text)
+    
+    def initUI(self):
+        """初始化用户界面"""
+        if self.backend.name == "service":
+            # 连接常驻服务时在标题中注明
+            self.i18n.bind(self.setWindowTitle,
+                           lambda: self.tr('高级电源管理工具') + " - " + self.tr("电源服务"))
+        else:
+            self.i18n.bind(self.setWindowTitle, '高级电源管理工具')
+        self.setGeometry(300, 300, 850, 650)
+        self.setWindowIcon(QIcon('icon/power_manager.ico'))
+        
+        # 设置应用样式
+        QApplication.setStyle(QStyleFactory.create('Fusion'))
+        
+        # 创建深色调色板
+        dark_palette = QPalette()
+        dark_palette.setColor(QPalette.ColorRole.Window, QColor(53, 53, 53))
+        dark_palette.setColor(QPalette.ColorRole.WindowText, Qt.GlobalColor.white)
+        dark_palette.setColor(QPalette.ColorRole.Base, QColor(35, 35, 35))
+        dark_palette.setColor(QPalette.ColorRole.AlternateBase, QColor(53, 53, 53))
+        dark_palette.setColor(QPalette.ColorRole.ToolTipBase, Qt.GlobalColor.white)
+        dark_palette.setColor(QPalette.ColorRole.ToolTipText, Qt.GlobalColor.white)
+        dark_palette.setColor(QPalette.ColorRole.Text, Qt.GlobalColor.white)
+        dark_palette.setColor(QPalette.ColorRole.Button, QColor(53, 53, 53))
+        dark_palette.setColor(QPalette.ColorRole.ButtonText, Qt.GlobalColor.white)
+        dark_palette.setColor(QPalette.ColorRole.BrightText, Qt.GlobalColor.red)
+        dark_palette.setColor(QPalette.ColorRole.Highlight, QColor(142, 45, 197).lighter())
+        dark_palette.setColor(QPalette.ColorRole.HighlightedText, Qt.GlobalColor.black)
+        self.setPalette(dark_palette)
+        
+        # 创建菜单栏
+        self.create_menus()
+        
+        # 创建主标签页
+        self.tabs = QTabWidget()
+        self.setCentralWidget(self.tabs)
+        
+        # 创建电源计划标签页
+        self.power_tab = QWidget()
+        self.tabs.addTab(self.power_tab, "")
+        self.create_power_plan_tab()
+        
+        # 其余标签页在第一次打开时才创建
+        self.settings_tab = QWidget()
+        self.tabs.addTab(self.settings_tab, "")
+        self.advanced_tab = QWidget()
+        self.tabs.addTab(self.advanced_tab, "")
+        self.automation_tab = QWidget()
+        self.tabs.addTab(self.automation_tab, "")
+        self.diagnostics_tab = QWidget()
+        self.tabs.addTab(self.diagnostics_tab, "")
+        self.about_tab = QWidget()
+        self.tabs.addTab(self.about_tab, "")
+        for tab, title in ((self.power_tab, "电源计划"), (self.settings_tab, "电源设置"),
+                           (self.advanced_tab, "高级设置"), (self.automation_tab, "自动切换"),
+                           (self.diagnostics_tab, "诊断"), (self.about_tab, "关于")):
+            self.i18n.bind(lambda text, tab=tab: self.tabs.setTabText(self.tabs.indexOf(tab), text), title)
+        self.tab_builders = {
+            self.settings_tab: self.create_settings_tab,
+            self.advanced_tab: self.create_advanced_tab,
+            self.automation_tab: self.create_automation_tab,
+            self.diagnostics_tab: self.create_diagnostics_tab,
+            self.about_tab: self.create_about_tab,
+        }
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+        
+        # 状态栏
+        self.statusBar().showMessage(self.tr("就绪"))
+        
+        # 后台任务进度
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setMaximumWidth(120)
+        self.progress_bar.setVisible(False)
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        self.executor.busy_changed.connect(self.progress_bar.setVisible)
+        self.executor.progress.connect(self.show_task_progress)
+    
+    def ensure_tab(self, tab):
+        """创建尚未创建的标签页内容"""
+        builder = self.tab_builders.pop(tab, None)
+        if builder is not None:
+            builder()
+    
+    def tab_built(self, tab):
+        return tab not in self.tab_builders
+    
+    def eventFilter(self, obj, event):
+        # 启动时间线: 记录窗口第一次绘制
+        if obj is self and event.type() == QEvent.Type.Paint and self.timeline is not None:
+            self.timeline.mark("first_paint")
+            self.removeEventFilter(self)
+            self.report_startup()
+        return super().eventFilter(obj, event)
+    
+    def report_startup(self):
+        """首次绘制与首次数据都完成后输出启动时间线"""
+        if self.timeline is not None and "first_paint" in self.timeline and "first_data" in self.timeline:
+            self.timeline.print_report()
+            self.timeline = None
+    
+    def on_tab_changed(self, index):
+        """切换标签页"""
+        self.ensure_tab(self.tabs.widget(index))
+        # 打开高级设置页时预先启动 PowerShell 会话
+        if self.tabs.widget(index) is self.advanced_tab:
+            self.shell_pool.warm_up()
+        elif self.tabs.widget(index) is self.settings_tab and self.settings_model is None:
+            self.load_settings()
+        # 诊断页只在显示时定时刷新
+        if self.tab_built(self.diagnostics_tab):
+            if self.tabs.widget(index) is self.diagnostics_tab:
+                self.refresh_diagnostics()
+                self.diagnostics_timer.start()
+            else:
+                self.diagnostics_timer.stop()
+    
+    def show_task_progress(self, label, pending):
+        """在状态栏显示后台任务进度"""
+        if not pending:
+            return
+        if pending > 1:
+            label = self.tr("{0}（队列中共 {1} 项）").format(label, pending)
+        self.statusBar().showMessage(label)
+    
+    def create_menus(self):
+        """创建菜单栏"""
+        menu_bar = self.menuBar()
+        
+        # 文件菜单
+        file_menu = menu_bar.addMenu("")
+        self.i18n.bind(file_menu.setTitle, "文件")
+        
+        # 电源方案快照
+        self.save_snapshot_action = QAction(self)
+        self.i18n.bind(self.save_snapshot_action.setText, "保存电源方案快照...")
+        self.save_snapshot_action.triggered.connect(self.save_snapshot)
+        file_menu.addAction(self.save_snapshot_action)
+        self.compare_snapshot_action = QAction(self)
+        self.i18n.bind(self.compare_snapshot_action.setText, "与快照比较...")
+        self.compare_snapshot_action.triggered.connect(self.compare_snapshot)
+        file_menu.addAction(self.compare_snapshot_action)
+        self.export_telemetry_action = QAction(self)
+        self.i18n.bind(self.export_telemetry_action.setText, "导出遥测数据...")
+        self.export_telemetry_action.triggered.connect(self.export_telemetry)
+        file_menu.addAction(self.export_telemetry_action)
+        file_menu.addSeparator()
+        
+        # 语言菜单
+        lang_menu = menu_bar.addMenu("")
+        self.i18n.bind(lang_menu.setTitle, "语言")
+        
+        # 创建语言选项
+        for lang_code, lang_name in self.languages.items():
+            action = QAction(lang_name, self)
+            action.setData(lang_code)
+            action.triggered.connect(self.change_language)
+            lang_menu.addAction(action)
+        
+        # 退出动作
+        exit_action = QAction(self)
+        self.i18n.bind(exit_action.setText, "退出")
+        exit_action.setShortcut("Ctrl+Q")
+        exit_action.triggered.connect(self.close)
+        file_menu.addAction(exit_action)
+    
+    def change_language(self):
+        """更改应用程序语言"""
+        action = self.sender()
+        self.set_language(action.data())
+    
+    def set_language(self, lang_code):
+        """切换界面语言：按登记的绑定重新设置文本，不读取文件"""
+        if lang_code == self.current_language:
+            return
+        self.current_language = lang_code
+        self.i18n.set_language(lang_code)
+        
+        # 同步关于页的语言选择框
+        if self.tab_built(self.about_tab):
+            self.lang_combo.blockSignals(True)
+            self.lang_combo.setCurrentIndex(self.lang_combo.findData(lang_code))
+            self.lang_combo.blockSignals(False)
+        
+        # 更新状态栏
+        self.statusBar().showMessage(self.tr("语言已切换到: ") + self.languages[lang_code])
+    
+    def create_power_plan_tab(self):
+        """创建电源计划标签页"""
+        layout = QVBoxLayout(self.power_tab)
+        
+        # 标题
+        self.title = QLabel()
+        self.i18n.bind(self.title.setText, "电源计划管理")
+        title_font = QFont("Arial", 16, QFont.Weight.Bold)
+        self.title.setFont(title_font)
+        self.title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.title)
+        
+        # 当前激活计划显示
+        self.active_plan_label = QLabel()
+        self.i18n.bind(self.active_plan_label.setText, lambda: self.tr("当前激活计划: ") + self.active_plan_name)
+        self.active_plan_label.setFont(QFont("Arial", 10))
+        active_layout = QHBoxLayout()
+        active_layout.addWidget(self.active_plan_label, 1)
+        
+        # 遥测迷你曲线（指标不可用时隐藏）
+        self.sparklines = {}
+        for metric, color, minimum, maximum in (("cpu_percent", "#FF9800", 0, 100), ("cpu_mhz", "#03A9F4", None, None),
+                                                ("battery_percent", "#4CAF50", 0, 100)):
+            label = QLabel("")
+            label.setFont(QFont("Consolas", 9))
+            sparkline = Sparkline(color, minimum, maximum)
+            label.setVisible(False)
+            sparkline.setVisible(False)
+            active_layout.addWidget(label)
+            active_layout.addWidget(sparkline)
+            self.sparklines[metric] = (label, sparkline)
+        layout.addLayout(active_layout)
+        self.telemetry_timer = QTimer(self)
+        self.telemetry_timer.setInterval(1000)
+        self.telemetry_timer.timeout.connect(self.update_sparklines)
+        
+        # 分隔线
+        layout.addWidget(QLabel(""))
+        
+        # 创建切换按钮区域
+        btn_layout = QGridLayout()
+        
+        # 创建切换按钮
+        self.eco_btn = QPushButton()
+        self.i18n.bind(self.eco_btn.setText, "节能模式")
+        self.eco_btn.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
+        self.eco_btn.clicked.connect(lambda: self.set_power_plan("eco"))
+        
+        self.balanced_btn = QPushButton()
+        self.i18n.bind(self.balanced_btn.setText, "平衡模式")
+        self.balanced_btn.setStyleSheet("background-color: #2196F3; color: white; font-weight: bold;")
+        self.balanced_btn.clicked.connect(lambda: self.set_power_plan("balanced"))
+        
+        self.high_perf_btn = QPushButton()
+        self.i18n.bind(self.high_perf_btn.setText, "高性能模式")
+        self.high_perf_btn.setStyleSheet("background-color: #FF9800; color: white; font-weight: bold;")
+        self.high_perf_btn.clicked.connect(lambda: self.set_power_plan("high"))
+        
+        self.ultimate_btn = QPushButton()
+        self.i18n.bind(self.ultimate_btn.setText, "卓越性能模式")
+        self.ultimate_btn.setStyleSheet("background-color: #9C27B0; color: white; font-weight: bold;")
+        self.ultimate_btn.clicked.connect(lambda: self.set_power_plan("ultimate"))
+        
+        # 添加到布局
+        btn_layout.addWidget(self.eco_btn, 0, 0)
+        btn_layout.addWidget(self.balanced_btn, 0, 1)
+        btn_layout.addWidget(self.high_perf_btn, 1, 0)
+        btn_layout.addWidget(self.ultimate_btn, 1, 1)
+        
+        layout.addLayout(btn_layout)
+        
+        # 分隔线
+        layout.addWidget(QLabel(""))
+        
+        # 电源计划列表
+        self.plan_list_label = QLabel()
+        self.i18n.bind(self.plan_list_label.setText, "当前电源计划列表:")
+        self.plan_list_label.setFont(QFont("Arial", 10, QFont.Weight.Bold))
+        layout.addWidget(self.plan_list_label)
+        
+        # 列表按 GUID 增量更新，刷新时保持选择与滚动位置
+        filter_layout = QHBoxLayout()
+        self.plan_filter = QLineEdit()
+        self.plan_filter.setClearButtonEnabled(True)
+        self.i18n.bind(self.plan_filter.setPlaceholderText, "按名称或 GUID 筛选...")
+        self.plan_sort_combo = QComboBox()
+        for text in ("列出顺序", "按名称排序"):
+            self.plan_sort_combo.addItem("")
+            self.i18n.bind(lambda value, row=self.plan_sort_combo.count() - 1:
+                           self.plan_sort_combo.setItemText(row, value), text)
+        filter_layout.addWidget(self.plan_filter, 1)
+        filter_layout.addWidget(self.plan_sort_combo)
+        layout.addLayout(filter_layout)
+        
+        self.plan_model = SchemeListModel(self.tr, self)
+        self.plan_proxy = SchemeFilterProxy(self)
+        self.plan_proxy.setSourceModel(self.plan_model)
+        self.plan_filter.textChanged.connect(self.plan_proxy.setFilterFixedString)
+        self.plan_sort_combo.currentIndexChanged.connect(lambda index: self.plan_proxy.set_sorted(index == 1))
+        self.plan_list = QListView()
+        self.plan_list.setFont(QFont("Consolas", 9))
+        self.plan_list.setUniformItemSizes(True)
+        self.plan_list.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.plan_list.setModel(self.plan_proxy)
+        layout.addWidget(self.plan_list)
+        self.i18n.bind(self.plan_model.relabel, lambda: None)
+        
+        # 操作按钮
+        btn_layout2 = QHBoxLayout()
+        
+        self.refresh_btn = QPushButton()
+        self.i18n.bind(self.refresh_btn.setText, "刷新列表")
+        self.refresh_btn.setStyleSheet("background-color: #607D8B; color: white;")
+        self.refresh_btn.clicked.connect(self.refresh_power_plans)
+        
+        self.delete_btn = QPushButton()
+        self.i18n.bind(self.delete_btn.setText, "删除选中计划")
+        self.delete_btn.setStyleSheet("background-color: #F44336; color: white;")
+        self.delete_btn.clicked.connect(self.delete_selected_plan)
+        
+        btn_layout2.addWidget(self.refresh_btn)
+        btn_layout2.addWidget(self.delete_btn)
+        
+        layout.addLayout(btn_layout2)
+        
+        # 添加一些间距
+        layout.addStretch(1)
+    
+    def create_settings_tab(self):
+        """创建电源设置标签页"""
+        layout = QVBoxLayout(self.settings_tab)
+        
+        # 方案选择
+        scheme_layout = QHBoxLayout()
+        self.settings_scheme_label = QLabel()
+        self.i18n.bind(self.settings_scheme_label.setText, "电源方案:")
+        self.settings_scheme_combo = QComboBox()
+        self.settings_scheme_combo.currentIndexChanged.connect(self.on_settings_scheme_changed)
+        self.reload_settings_btn = QPushButton()
+        self.i18n.bind(self.reload_settings_btn.setText, "重新加载")
+        self.reload_settings_btn.setStyleSheet("background-color: #607D8B; color: white;")
+        self.reload_settings_btn.clicked.connect(self.load_settings)
+        scheme_layout.addWidget(self.settings_scheme_label)
+        scheme_layout.addWidget(self.settings_scheme_combo, 1)
+        scheme_layout.addWidget(self.reload_settings_btn)
+        layout.addLayout(scheme_layout)
+        
+        # 搜索设置、方案与别名，输入时即时显示结果
+        self.settings_search = QLineEdit()
+        self.i18n.bind(self.settings_search.setPlaceholderText, "搜索设置、方案、别名或 GUID...")
+        self.settings_search.setClearButtonEnabled(True)
+        self.settings_search.textChanged.connect(self.search_settings)
+        self.settings_search.returnPressed.connect(self.open_first_search_result)
+        layout.addWidget(self.settings_search)
+        self.settings_search_results = QListWidget()
+        self.settings_search_results.setMaximumHeight(160)
+        self.settings_search_results.hide()
+        self.settings_search_results.itemActivated.connect(self.open_search_result)
+        layout.addWidget(self.settings_search_results)
+        self.i18n.bind(lambda _: self.search_settings(self.settings_search.text()), lambda: None)
+        
+        # 设置树，子组展开时才解析其中的设置
+        self.settings_tree = QTreeWidget()
+        self.settings_tree.setColumnCount(4)
+        self.i18n.bind(self.settings_tree.setHeaderLabels, lambda: [
+            self.tr("设置"), self.tr("接通电源"), self.tr("使用电池"), self.tr("单位")])
+        self.settings_tree.setColumnWidth(0, 360)
+        self.settings_tree.setEditTriggers(
+            QAbstractItemView.EditTrigger.DoubleClicked | QAbstractItemView.EditTrigger.EditKeyPressed)
+        self.settings_delegate = SettingValueDelegate(self.settings_tree)
+        self.settings_delegate.value_edited.connect(self.on_setting_edited)
+        self.settings_tree.setItemDelegate(self.settings_delegate)
+        self.settings_tree.itemExpanded.connect(self.on_subgroup_expanded)
+        layout.addWidget(self.settings_tree)
+        
+        # 批量应用修改
+        btn_layout = QHBoxLayout()
+        self.pending_settings_label = QLabel("")
+        self.i18n.bind(self.pending_settings_label.setText, self.pending_settings_text)
+        self.apply_settings_btn = QPushButton()
+        self.i18n.bind(self.apply_settings_btn.setText, "应用更改")
+        self.apply_settings_btn.setStyleSheet("background-color: #009688; color: white;")
+        self.apply_settings_btn.clicked.connect(self.apply_setting_changes)
+        self.discard_settings_btn = QPushButton()
+        self.i18n.bind(self.discard_settings_btn.setText, "放弃更改")
+        self.discard_settings_btn.setStyleSheet("background-color: #795548; color: white;")
+        self.discard_settings_btn.clicked.connect(self.populate_settings_tree)
+        btn_layout.addWidget(self.pending_settings_label, 1)
+        btn_layout.addWidget(self.apply_settings_btn)
+        btn_layout.addWidget(self.discard_settings_btn)
+        layout.addLayout(btn_layout)
+        self.update_pending_settings_label()
+        self.sync_settings_schemes()
+    
+    def create_advanced_tab(self):
+        """创建高级设置标签页"""
+        layout = QVBoxLayout(self.advanced_tab)
+        
+        # 标题
+        self.advanced_title = QLabel()
+        self.i18n.bind(self.advanced_title.setText, "高级电源设置")
+        title_font = QFont("Arial", 16, QFont.Weight.Bold)
+        self.advanced_title.setFont(title_font)
+        self.advanced_title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.advanced_title)
+        
+        # 警告框
+        self.warning = QLabel()
+        self.i18n.bind(self.warning.setText, "警告: 以下高级设置可能影响系统稳定性或功能!")
+        self.warning.setStyleSheet("color: #FF5722; font-weight: bold;")
+        self.warning.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.warning)
+        
+        # 分隔线
+        layout.addWidget(QLabel(""))
+        
+        # 注册表设置组
+        self.reg_group = QGroupBox()
+        self.i18n.bind(self.reg_group.setTitle, "注册表设置")
+        reg_layout = QVBoxLayout(self.reg_group)
+        
+        # 注册表设置说明
+        self.reg_info = QLabel()
+        self.i18n.bind(self.reg_info.setText, "以下注册表值可能禁用现代待机、快速启动或休眠等功能，"
+                                              "但可能解决某些电源计划问题。修改会一次写入，任何一项失败时全部撤销。")
+        self.reg_info.setWordWrap(True)
+        reg_layout.addWidget(self.reg_info)
+        
+        # 注册表调整表：勾选的项写入调整后的值，未勾选的项恢复默认值
+        self.reg_table = QTableWidget(len(self.tweak_engine.tweaks), 4)
+        self.i18n.bind(self.reg_table.setHorizontalHeaderLabels,
+                       lambda: [self.tr("注册表值"), self.tr("当前值"), self.tr("目标值"), self.tr("说明")])
+        self.reg_table.verticalHeader().setVisible(False)
+        self.reg_table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.reg_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.reg_table.setSizeAdjustPolicy(QAbstractItemView.SizeAdjustPolicy.AdjustToContents)
+        header = self.reg_table.horizontalHeader()
+        for column in range(3):
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        self.reg_table.blockSignals(True)
+        for row, tweak in enumerate(self.tweak_engine.tweaks.values()):
+            item = QTableWidgetItem(tweak.name)
+            item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Unchecked)
+            item.setData(Qt.ItemDataRole.UserRole, tweak.name)
+            item.setToolTip(f"HKLM\\{tweak.key}")
+            self.reg_table.setItem(row, 0, item)
+            self.reg_table.setItem(row, 1, QTableWidgetItem())
+            self.reg_table.setItem(row, 2, QTableWidgetItem())
+            description = QTableWidgetItem()
+            self.i18n.bind(description.setText, tweak.description)
+            self.reg_table.setItem(row, 3, description)
+        self.reg_table.blockSignals(False)
+        self.reg_table.itemChanged.connect(self.on_tweak_item_changed)
+        reg_layout.addWidget(self.reg_table)
+        
+        # 应用按钮
+        reg_btn_layout = QHBoxLayout()
+        self.pending_tweaks_label = QLabel()
+        self.reload_reg_btn = QPushButton()
+        self.i18n.bind(self.reload_reg_btn.setText, "重新读取")
+        self.reload_reg_btn.setStyleSheet("background-color: #607D8B; color: white;")
+        self.reload_reg_btn.clicked.connect(self.check_registry_settings)
+        self.apply_reg_btn = QPushButton()
+        self.i18n.bind(self.apply_reg_btn.setText, "应用注册表设置")
+        self.apply_reg_btn.setStyleSheet("background-color: #673AB7; color: white;")
+        self.apply_reg_btn.clicked.connect(self.apply_registry_settings)
+        reg_btn_layout.addWidget(self.pending_tweaks_label, 1)
+        reg_btn_layout.addWidget(self.reload_reg_btn)
+        reg_btn_layout.addWidget(self.apply_reg_btn)
+        reg_layout.addLayout(reg_btn_layout)
+        self.i18n.bind(self.relabel_tweak_values, lambda: None)
+        
+        layout.addWidget(self.reg_group)
+        
+        # 添加间距
+        layout.addWidget(QLabel(""))
+        
+        # 命令执行区域
+        self.cmd_group = QGroupBox()
+        self.i18n.bind(self.cmd_group.setTitle, "执行PowerShell命令")
+        cmd_layout = QVBoxLayout(self.cmd_group)
+        
+        self.cmd_input = QTextEdit()
+        self.i18n.bind(self.cmd_input.setPlaceholderText, "在此输入PowerShell命令...")
+        self.cmd_input.setFont(QFont("Consolas", 9))
+        
+        # 命令输出（只读，行数有上限）
+        self.cmd_output = QPlainTextEdit()
+        self.cmd_output.setReadOnly(True)
+        self.cmd_output.setFont(QFont("Consolas", 9))
+        self.cmd_output.setMaximumBlockCount(self.output_buffer.max_lines)
+        self.i18n.bind(self.cmd_output.setPlaceholderText, "命令输出将显示在这里")
+        
+        cmd_splitter = QSplitter(Qt.Orientation.Horizontal)
+        cmd_splitter.addWidget(self.cmd_input)
+        cmd_splitter.addWidget(self.cmd_output)
+        cmd_splitter.setSizes([300, 500])
+        cmd_layout.addWidget(cmd_splitter)
+        
+        # 命令按钮
+        cmd_btn_layout = QHBoxLayout()
+        
+        self.execute_btn = QPushButton()
+        self.i18n.bind(self.execute_btn.setText, "执行命令")
+        self.execute_btn.setStyleSheet("background-color: #009688; color: white;")
+        self.execute_btn.clicked.connect(self.execute_command)
+        
+        self.clear_btn = QPushButton()
+        self.i18n.bind(self.clear_btn.setText, "清除")
+        self.clear_btn.setStyleSheet("background-color: #795548; color: white;")
+        self.clear_btn.clicked.connect(lambda: self.cmd_input.clear())
+        
+        self.cancel_cmd_btn = QPushButton()
+        self.i18n.bind(self.cancel_cmd_btn.setText, "取消")
+        self.cancel_cmd_btn.setStyleSheet("background-color: #F44336; color: white;")
+        self.cancel_cmd_btn.setEnabled(False)
+        self.cancel_cmd_btn.clicked.connect(self.cancel_command)
+        
+        self.cmd_elapsed_label = QLabel("")
+        
+        cmd_btn_layout.addWidget(self.execute_btn)
+        cmd_btn_layout.addWidget(self.clear_btn)
+        cmd_btn_layout.addWidget(self.cancel_cmd_btn)
+        cmd_btn_layout.addWidget(self.cmd_elapsed_label)
+        
+        cmd_layout.addLayout(cmd_btn_layout)
+        
+        layout.addWidget(self.cmd_group)
+        
+        # 添加一些间距
+        layout.addStretch(1)
+        
+        # 读取注册表设置的当前状态
+        self.check_registry_settings()
+    
+    def create_automation_tab(self):
+        """创建自动切换标签页（按负载、按时间、性能配置、按进程）"""
+        layout = QVBoxLayout(self.automation_tab)
+        
+        # 自动切换电源计划
+        self.governor_group = QGroupBox()
+        self.i18n.bind(self.governor_group.setTitle, "自动切换电源计划")
+        governor_layout = QGridLayout(self.governor_group)
+        
+        self.governor_checkbox = QCheckBox()
+        self.i18n.bind(self.governor_checkbox.setText, "根据 CPU 负载自动切换")
+        self.governor_checkbox.setFont(QFont("Arial", 10))
+        self.governor_checkbox.toggled.connect(self.toggle_governor)
+        governor_layout.addWidget(self.governor_checkbox, 0, 0, 1, 4)
+        
+        defaults = governor.GovernorConfig()
+        self.governor_high_combo = QComboBox()
+        self.governor_low_combo = QComboBox()
+        for combo, plan_id in ((self.governor_high_combo, defaults.high_plan),
+                               (self.governor_low_combo, defaults.low_plan)):
+            for quick_id, (_, name) in plans.QUICK_PLANS.items():
+                combo.addItem("", quick_id)
+                self.i18n.bind(lambda text, combo=combo, row=combo.count() - 1: combo.setItemText(row, text), name)
+            combo.setCurrentIndex(combo.findData(plan_id))
+        
+        self.governor_up_spin = QSpinBox()
+        self.governor_up_spin.setRange(1, 100)
+        self.governor_up_spin.setValue(round(defaults.up_threshold * 100))
+        self.governor_down_spin = QSpinBox()
+        self.governor_down_spin.setRange(0, 99)
+        self.governor_down_spin.setValue(round(defaults.down_threshold * 100))
+        self.governor_dwell_spin = QSpinBox()
+        self.governor_dwell_spin.setRange(0, 3600)
+        self.governor_dwell_spin.setValue(round(defaults.min_dwell))
+        
+        fields = (("高负载计划:", self.governor_high_combo), ("升档阈值 (%):", self.governor_up_spin),
+                  ("低负载计划:", self.governor_low_combo), ("降档阈值 (%):", self.governor_down_spin),
+                  ("最短停留时间 (秒):", self.governor_dwell_spin))
+        for i, (text, widget) in enumerate(fields):
+            label = QLabel()
+            self.i18n.bind(label.setText, text)
+            governor_layout.addWidget(label, 1 + i // 2, (i % 2) * 2)
+            governor_layout.addWidget(widget, 1 + i // 2, (i % 2) * 2 + 1)
+        self.governor_inputs = [widget for _, widget in fields]
+        
+        self.governor_label = QLabel("")
+        self.governor_label.setWordWrap(True)
+        governor_layout.addWidget(self.governor_label, 4, 0, 1, 4)
+        
+        layout.addWidget(self.governor_group)
+        
+        # 时间表
+        self.schedule_group = QGroupBox()
+        self.i18n.bind(self.schedule_group.setTitle, "时间表")
+        schedule_layout = QVBoxLayout(self.schedule_group)
+        
+        self.schedule_checkbox = QCheckBox()
+        self.i18n.bind(self.schedule_checkbox.setText, "按时间表切换")
+        self.schedule_checkbox.setFont(QFont("Arial", 10))
+        self.schedule_checkbox.setChecked(self.scheduler is not None)
+        self.schedule_checkbox.toggled.connect(self.toggle_scheduler)
+        schedule_layout.addWidget(self.schedule_checkbox)
+        
+        self.schedule_info = QLabel()
+        self.schedule_info.setWordWrap(True)
+        self.i18n.bind(self.schedule_info.setText, self.schedule_text)
+        schedule_layout.addWidget(self.schedule_info)
+        
+        self.schedule_label = QLabel("")
+        self.schedule_label.setWordWrap(True)
+        schedule_layout.addWidget(self.schedule_label)
+        
+        layout.addWidget(self.schedule_group)
+        
+        # 性能配置
+        self.perf_group = QGroupBox()
+        self.i18n.bind(self.perf_group.setTitle, "性能配置")
+        perf_layout = QVBoxLayout(self.perf_group)
+        
+        perf_info = QLabel()
+        perf_info.setWordWrap(True)
+        self.i18n.bind(perf_info.setText, "同时切换电源计划并调整指定进程的优先级、CPU 亲和性和电源限制（EcoQoS），恢复时还原启用前的状态。")
+        perf_layout.addWidget(perf_info)
+        
+        perf_buttons = QHBoxLayout()
+        self.perf_combo = QComboBox()
+        for profile in self.perf_profiles:
+            self.perf_combo.addItem(profile.name)
+        self.perf_apply_btn = QPushButton()
+        self.i18n.bind(self.perf_apply_btn.setText, "启用")
+        self.perf_apply_btn.clicked.connect(self.apply_perf_profile)
+        self.perf_restore_btn = QPushButton()
+        self.i18n.bind(self.perf_restore_btn.setText, "恢复")
+        self.perf_restore_btn.clicked.connect(self.restore_perf_profile)
+        perf_buttons.addWidget(self.perf_combo, 1)
+        perf_buttons.addWidget(self.perf_apply_btn)
+        perf_buttons.addWidget(self.perf_restore_btn)
+        perf_layout.addLayout(perf_buttons)
+        
+        self.perf_label = QLabel()
+        self.perf_label.setWordWrap(True)
+        self.i18n.bind(self.perf_label.setText, self.perf_status_text)
+        perf_layout.addWidget(self.perf_label)
+        self.update_perf_buttons()
+        
+        layout.addWidget(self.perf_group)
+        
+        # 进程规则
+        self.rules_group = QGroupBox()
+        self.i18n.bind(self.rules_group.setTitle, "进程规则")
+        rules_layout = QVBoxLayout(self.rules_group)
+        
+        self.rules_info = QLabel()
+        self.i18n.bind(self.rules_info.setText, "指定的进程运行时切换到对应的计划，全部退出后恢复原来的计划。\n"
+                                                "进程名称可使用通配符（如 blender*），包含路径分隔符时匹配完整路径。")
+        self.rules_info.setWordWrap(True)
+        rules_layout.addWidget(self.rules_info)
+        
+        self.rules_checkbox = QCheckBox()
+        self.i18n.bind(self.rules_checkbox.setText, "启用进程规则")
+        self.rules_checkbox.setFont(QFont("Arial", 10))
+        self.rules_checkbox.setChecked(self.rule_engine is not None)
+        self.rules_checkbox.toggled.connect(self.toggle_process_rules)
+        rules_layout.addWidget(self.rules_checkbox)
+        
+        self.rules_table = QTableWidget(0, 3)
+        self.i18n.bind(self.rules_table.setHorizontalHeaderLabels, lambda: [
+            self.tr("进程名称或路径"), self.tr("计划"), self.tr("优先级")])
+        self.rules_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.rules_table.verticalHeader().setVisible(False)
+        self.rules_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        rules_layout.addWidget(self.rules_table)
+        for rule in process_rules.load_rules(self.config.get("process_rules", {}).get("rules")):
+            self.add_rule_row(rule)
+        self.rules_table.itemChanged.connect(self.save_process_rules)
+        
+        rules_btn_layout = QHBoxLayout()
+        self.add_rule_btn = QPushButton()
+        self.i18n.bind(self.add_rule_btn.setText, "添加规则")
+        self.add_rule_btn.clicked.connect(lambda: self.add_rule_row(edit=True))
+        self.remove_rule_btn = QPushButton()
+        self.i18n.bind(self.remove_rule_btn.setText, "删除规则")
+        self.remove_rule_btn.clicked.connect(self.remove_rule_rows)
+        self.rules_label = QLabel("")
+        rules_btn_layout.addWidget(self.add_rule_btn)
+        rules_btn_layout.addWidget(self.remove_rule_btn)
+        rules_btn_layout.addWidget(self.rules_label, 1)
+        rules_layout.addLayout(rules_btn_layout)
+        self.set_rule_editing(self.rule_engine is None)
+        
+        layout.addWidget(self.rules_group, 1)
+    
+    def create_diagnostics_tab(self):
+        """创建诊断标签页：各类系统调用的耗时分布与最近的调用"""
+        layout = QVBoxLayout(self.diagnostics_tab)
+        
+        self.diagnostics_info = QLabel()
+        self.i18n.bind(self.diagnostics_info.setText, "本次运行中对 powercfg、注册表与 PowerShell 的调用耗时（毫秒）")
+        self.diagnostics_info.setWordWrap(True)
+        layout.addWidget(self.diagnostics_info)
+        
+        self.diagnostics_table = QTableWidget(0, 8)
+        self.i18n.bind(self.diagnostics_table.setHorizontalHeaderLabels, lambda: [
+            self.tr("操作"), self.tr("次数"), self.tr("失败"), "p50", "p95", "p99", self.tr("最大"), self.tr("输出 (KB)")])
+        self.diagnostics_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.diagnostics_table.verticalHeader().setVisible(False)
+        self.diagnostics_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.diagnostics_table, 2)
+        
+        self.recent_calls_label = QLabel()
+        self.i18n.bind(self.recent_calls_label.setText, "最近的调用:")
+        layout.addWidget(self.recent_calls_label)
+        self.recent_calls = QPlainTextEdit()
+        self.recent_calls.setReadOnly(True)
+        self.recent_calls.setFont(QFont("Consolas", 9))
+        self.recent_calls.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        layout.addWidget(self.recent_calls, 1)
+        
+        # 后台任务的合并情况
+        self.task_stats_label = QLabel("")
+        self.task_stats_label.setWordWrap(True)
+        layout.addWidget(self.task_stats_label)
+        
+        btn_layout = QHBoxLayout()
+        for attr, text, slot in (("refresh_diagnostics_btn", "刷新", self.refresh_diagnostics),
+                                 ("export_json_btn", "导出 JSON...", self.export_diagnostics_json),
+                                 ("export_prometheus_btn", "导出 Prometheus...", self.export_diagnostics_prometheus),
+                                 ("reset_diagnostics_btn", "重置", self.reset_diagnostics)):
+            button = QPushButton()
+            self.i18n.bind(button.setText, text)
+            button.clicked.connect(slot)
+            btn_layout.addWidget(button)
+            setattr(self, attr, button)
+        btn_layout.addStretch(1)
+        layout.addLayout(btn_layout)
+        
+        self.diagnostics_timer = QTimer(self)
+        self.diagnostics_timer.setInterval(2000)
+        self.diagnostics_timer.timeout.connect(self.refresh_diagnostics)
+    
+    def refresh_diagnostics(self):
+        """按最新的计量数据刷新诊断页"""
+        def ms(seconds):
+            return "" if seconds is None else f"{seconds * 1000:.2f}"
+        
+        summary = instruments.summary()
+        table = self.diagnostics_table
+        table.setRowCount(len(summary))
+        for row, (op, histogram) in enumerate(summary):
+            values = (op, str(histogram.count), str(histogram.errors), ms(histogram.percentile(50)),
+                      ms(histogram.percentile(95)), ms(histogram.percentile(99)), ms(histogram.maximum),
+                      f"{instruments.output_bytes[op] / 1024:.1f}")
+            for column, value in enumerate(values):
+                item = table.item(row, column)
+                if item is None:
+                    item = QTableWidgetItem()
+                    if column:
+                        item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                    table.setItem(row, column, item)
+                item.setText(value)
+        
+        lines = []
+        for call in list(instruments.recent)[-50:][::-1]:
+            lines.append(f"{time.strftime('%H:%M:%S', time.localtime(call.started))}  {call.op:<22}"
+                         f"{call.duration * 1000:>9.1f} ms  {call.exit_code:>4}  {call.output_size:>8}  {call.command}")
+        self.recent_calls.setPlainText("\n".join(lines))
+        
+        parts = []
+        for key, counts in sorted(self.executor.stats.items()):
+            text = self.tr("{0}: 请求 {1}，执行 {2}").format(key, counts["requested"], counts["executed"])
+            if counts["events"]:
+                text += self.tr("（合并前 {0} 次）").format(counts["events"])
+            parts.append(text)
+        self.task_stats_label.setText(self.tr("后台任务: ") + "; ".join(parts) if parts else "")
+    
+    def export_diagnostics(self, title, file_filter, export):
+        path, _ = QFileDialog.getSaveFileName(self, title, "", file_filter)
+        if not path:
+            return
+        try:
+            export(path)
+        except OSError as e:
+            QMessageBox.critical(self, self.tr("错误"), self.tr("导出失败: {0}").format(str(e)))
+            return
+        self.statusBar().showMessage(self.tr("诊断数据已导出: {0}").format(path))
+    
+    def export_diagnostics_json(self):
+        self.export_diagnostics(self.tr("导出 JSON..."), "JSON (*.json)", instruments.export_json)
+    
+    def export_diagnostics_prometheus(self):
+        self.export_diagnostics(self.tr("导出 Prometheus..."), "Prometheus (*.prom *.txt)",
+                                instruments.export_prometheus)
+    
+    def reset_diagnostics(self):
+        instruments.reset()
+        self.refresh_diagnostics()
+    
+    def create_about_tab(self):
+        """创建关于标签页"""
+        layout = QVBoxLayout(self.about_tab)
+        layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        
+        # 标题
+        self.about_title = QLabel()
+        self.i18n.bind(self.about_title.setText, "高级电源管理工具")
+        title_font = QFont("Arial", 20, QFont.Weight.Bold)
+        self.about_title.setFont(title_font)
+        self.about_title.setStyleSheet("color: #2196F3;")
+        layout.addWidget(self.about_title, alignment=Qt.AlignmentFlag.AlignCenter)
+        
+        # 版本信息
+        self.version = QLabel()
+        self.i18n.bind(self.version.setText, "版本 1.0")
+        self.version.setFont(QFont("Arial", 12))
+        layout.addWidget(self.version, alignment=Qt.AlignmentFlag.AlignCenter)
+        
+        # 分隔线
+        layout.addWidget(QLabel(""))
+        
+        # 语言选择
+        lang_layout = QHBoxLayout()
+        lang_layout.addStretch()
+        
+        lang_label = QLabel()
+        self.i18n.bind(lang_label.setText, "选择语言:")
+        lang_label.setFont(QFont("Arial", 10))
+        lang_layout.addWidget(lang_label)
+        
+        self.lang_combo = QComboBox()
+        for lang_code, lang_name in self.languages.items():
+            self.lang_combo.addItem(lang_name, lang_code)
+        self.lang_combo.setCurrentText(self.languages[self.current_language])
+        self.lang_combo.currentIndexChanged.connect(self.change_language_from_combo)
+        lang_layout.addWidget(self.lang_combo)
+        
+        lang_layout.addStretch()
+        layout.addLayout(lang_layout)
+        
+        # 分隔线
+        layout.addWidget(QLabel(""))
+        
+        # 功能列表
+        self.features = QLabel()
+        self.i18n.bind(self.features.setText, "功能:\n"
+                                              "• 快速切换电源计划（节能、平衡、高性能、卓越性能）\n"
+                                              "• 查看和管理所有电源计划\n"
+                                              "• 修改高级电源相关注册表设置\n"
+                                              "• 执行自定义PowerShell命令")
+        self.features.setFont(QFont("Arial", 11))
+        layout.addWidget(self.features)
+        
+        # 分隔线
+        layout.addWidget(QLabel(""))
+        
+        # 警告信息
+        self.warning_label = QLabel()
+        self.i18n.bind(self.warning_label.setText, "注意:\n"
+                                                   "• 某些操作需要管理员权限\n"
+                                                   "• 修改注册表设置可能导致系统不稳定\n"
+                                                   "• 删除电源计划操作不可逆")
+        self.warning_label.setStyleSheet("color: #FF5722;")
+        self.warning_label.setFont(QFont("Arial", 10))
+        layout.addWidget(self.warning_label)
+        
+        # 添加一些间距
+        layout.addStretch(1)
+        
+        # 版权信息
+        self.copyright = QLabel()
+        self.i18n.bind(self.copyright.setText, "© 2025 高级电源管理工具 | 保留所有权利")
+        self.copyright.setFont(QFont("Arial", 9))
+        self.copyright.setStyleSheet("color: #9E9E9E;")
+        layout.addWidget(self.copyright, alignment=Qt.AlignmentFlag.AlignCenter)
+    
+    def change_language_from_combo(self):
+        """从组合框更改语言"""
+        self.set_language(self.lang_combo.currentData())
+    
+    def refresh_power_plans(self):
+        """刷新电源计划列表（缓存失效时在后台执行 powercfg /L）
+
+        同时只有一次查询在运行，期间的刷新请求合并为之后的一次。
+        """
+        self.executor.submit(
+            self.tr("正在加载电源计划..."), self.query_power_plans,
+            on_success=self.populate_power_plans,
+            on_error=lambda e: QMessageBox.critical(
+                self, self.tr("错误"), self.tr("获取电源计划失败:\n{0}").format(getattr(e, "stderr", e))),
+            key="refresh"
+        )
+    
+    def query_power_plans(self):
+        """获取电源计划列表（运行在工作线程中）"""
+        return self.scheme_cache.schemes()
+    
+    def populate_power_plans(self, plans):
+        """用解析结果更新电源计划列表（只通知变化的行）"""
+        self.plan_model.update(plans)
+        self.search_index.update_schemes(plans)
+        self.active_plan_name = ""
+        for plan in plans:
+            if plan.active:
+                self.active_plan_name = plan.name
+        self.active_plan_label.setText(self.tr("当前激活计划: ") + self.active_plan_name)
+        
+        self.current_plans = plans
+        if self.tab_built(self.settings_tab):
+            self.sync_settings_schemes()
+        
+        # 更新状态栏
+        self.statusBar().showMessage(self.tr("已加载 {0} 个电源计划").format(self.plan_model.rowCount()))
+        
+        if self.timeline is not None:
+            self.timeline.mark("first_data")
+            self.report_startup()
+    
+    def active_scheme_guid(self):
+        """当前激活方案的 GUID（遥测线程调用，只读缓存）"""
+        scheme = self.scheme_cache.active_scheme()
+        return scheme.guid if scheme else None
+    
+    def update_sparklines(self):
+        """刷新电源计划页的迷你曲线（只在该页可见时绘制）"""
+        if not self.isVisible() or self.tabs.currentWidget() is not self.power_tab:
+            return
+        store = self.telemetry.store
+        latest = store.latest()
+        # 最近十分钟的原始样本（默认每秒一个，正好是第一级缓冲的容量）
+        count = round(600 / self.telemetry.interval)
+        texts = {
+            "cpu_percent": lambda v: f"CPU {v:.0f}%",
+            "cpu_mhz": lambda v: f"{v:.0f} MHz",
+            "battery_percent": lambda v: self.tr("电池 {0}%").format(round(v)),
+        }
+        for metric, (label, sparkline) in self.sparklines.items():
+            value = latest.get(metric, float("nan"))
+            available = value == value
+            label.setVisible(available)
+            sparkline.setVisible(available)
+            if available:
+                label.setText(texts[metric](value))
+                sparkline.set_values(store.tail(metric, count))
+        watts = latest.get("battery_watts", float("nan"))
+        if watts == watts:
+            self.sparklines["battery_percent"][0].setToolTip(self.tr("充放电功率: {0:.1f} W").format(watts))
+    
+    def export_telemetry(self):
+        """导出遥测数据（CSV 或列式文件）"""
+        if self.telemetry is None:
+            QMessageBox.critical(self, self.tr("错误"), self.tr("遥测记录未启用"))
+            return
+        path, selected = QFileDialog.getSaveFileName(
+            self, self.tr("导出遥测数据..."), "", self.tr("CSV 文件 (*.csv);;列式数据 (*.apmcol)"))
+        if not path:
+            return
+        export = self.telemetry.export_columns if path.lower().endswith(".apmcol") or \
+            (not path.lower().endswith(".csv") and "apmcol" in selected) else self.telemetry.export_csv
+        try:
+            export(path)
+        except OSError as e:
+            QMessageBox.critical(self, self.tr("错误"), self.tr("导出失败: {0}").format(str(e)))
+            return
+        self.statusBar().showMessage(self.tr("遥测数据已导出: {0}").format(path))
+    
+    def sync_settings_schemes(self):
+        """同步电源设置页的方案列表，尽量保持原来的选择"""
+        plans = self.current_plans
+        current = self.settings_scheme_combo.currentData()
+        self.settings_scheme_combo.blockSignals(True)
+        self.settings_scheme_combo.clear()
+        for plan in plans:
+            self.settings_scheme_combo.addItem(plan.name, plan.guid)
+            if plan.guid == current or (current is None and plan.active):
+                self.settings_scheme_combo.setCurrentIndex(self.settings_scheme_combo.count() - 1)
+        self.settings_scheme_combo.blockSignals(False)
+        if self.settings_scheme_combo.currentData() != current:
+            self.on_settings_scheme_changed(self.settings_scheme_combo.currentIndex())
+    
+    def on_settings_scheme_changed(self, index):
+        """切换电源设置页的方案"""
+        if index >= 0 and self.tabs.currentWidget() is self.settings_tab:
+            self.load_settings()
+        else:
+            # 旧方案的子组不能再展开，设置页可见时重新加载
+            self.settings_model = None
+            self.populate_settings_tree()
+    
+    def load_settings(self):
+        """读取所选方案的 /Q 输出，只定位子组，设置在展开时解析"""
+        scheme_guid = self.settings_scheme_combo.currentData()
+        if not scheme_guid:
+            return
+        
+        def on_success(model):
+            # 搜索索引先只加入子组，其中的设置在子组展开、解析后加入
+            self.search_index.add_subgroups(model.subgroups())
+            # 加载期间又切换了方案时丢弃旧结果
+            if model.scheme_guid != self.settings_scheme_combo.currentData():
+                return
+            self.settings_model = model
+            self.populate_settings_tree()
+        
+        def on_error(e):
+            QMessageBox.critical(self, self.tr("错误"), self.tr("加载电源设置失败: {0}").format(str(e)))
+        
+        self.executor.submit(
+            self.tr("正在加载电源设置..."), load_scheme_settings, self.backend, scheme_guid,
+            on_success=on_success, on_error=on_error, key="load_settings"
+        )
+    
+    def populate_settings_tree(self):
+        """按设置模型重建设置树（未应用的修改被丢弃）"""
+        self.pending_settings.clear()
+        self.update_pending_settings_label()
+        self.settings_tree.clear()
+        if self.settings_model is None:
+            return
+        for subgroup in self.settings_model.subgroups():
+            item = QTreeWidgetItem([subgroup.name or subgroup.alias or subgroup.guid])
+            item.setData(0, Qt.ItemDataRole.UserRole, subgroup.guid)
+            item.setToolTip(0, f"{subgroup.alias} {subgroup.guid}".strip())
+            item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+            self.settings_tree.addTopLevelItem(item)
+    
+    def on_subgroup_expanded(self, item):
+        """第一次展开子组时解析并显示其中的设置"""
+        if item.parent() is not None or item.childCount() or self.settings_model is None:
+            return
+        subgroup = self.settings_model.subgroup(item.data(0, Qt.ItemDataRole.UserRole))
+        self.search_index.add_subgroups([subgroup])
+        for setting in subgroup.settings.values():
+            child = QTreeWidgetItem([setting.name or setting.alias or setting.guid, "", "", setting.units])
+            child.setData(0, Qt.ItemDataRole.UserRole, setting)
+            child.setToolTip(0, f"{setting.alias} {setting.guid}".strip())
+            child.setFlags(child.flags() | Qt.ItemFlag.ItemIsEditable)
+            self.show_setting_value(child, 1, setting.ac_value)
+            self.show_setting_value(child, 2, setting.dc_value)
+            item.addChild(child)
+        item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.DontShowIndicatorWhenChildless)
+    
+    def search_settings(self, text):
+        """按输入内容搜索索引并列出结果"""
+        self.settings_search_results.clear()
+        entries = self.search_index.search(text, 20) if text.strip() else []
+        kinds = {"scheme": self.tr("方案"), "subgroup": self.tr("子组"), "setting": self.tr("设置")}
+        for entry in entries:
+            item = QListWidgetItem(f"{kinds[entry.kind]}: {entry.name} ({entry.alias or entry.guid})")
+            item.setData(Qt.ItemDataRole.UserRole, entry)
+            item.setToolTip(entry.guid)
+            self.settings_search_results.addItem(item)
+        self.settings_search_results.setVisible(bool(text.strip()))
+        if text.strip() and not entries:
+            self.settings_search_results.addItem(self.tr("没有匹配的结果"))
+    
+    def open_first_search_result(self):
+        item = self.settings_search_results.item(0)
+        if item is not None:
+            self.open_search_result(item)
+    
+    def open_search_result(self, item):
+        """方案: 在设置页中选择该方案；子组或设置: 展开并选中对应的行"""
+        entry = item.data(Qt.ItemDataRole.UserRole)
+        if entry is None:
+            return
+        if entry.kind == "scheme":
+            row = self.settings_scheme_combo.findData(entry.guid)
+            if row < 0:
+                self.statusBar().showMessage(self.tr("方案 {0} 不在当前的电源计划列表中").format(entry.name))
+            else:
+                self.settings_scheme_combo.setCurrentIndex(row)
+            return
+        subgroup_guid = entry.guid if entry.kind == "subgroup" else entry.parent
+        for i in range(self.settings_tree.topLevelItemCount()):
+            group = self.settings_tree.topLevelItem(i)
+            if group.data(0, Qt.ItemDataRole.UserRole) != subgroup_guid:
+                continue
+            target = group
+            if entry.kind == "setting":
+                self.settings_tree.expandItem(group)
+                target = next((group.child(j) for j in range(group.childCount())
+                               if group.child(j).data(0, Qt.ItemDataRole.UserRole).guid == entry.guid), None)
+            if target is not None:
+                self.settings_tree.setCurrentItem(target)
+                self.settings_tree.scrollToItem(target)
+                return
+        self.statusBar().showMessage(self.tr("当前方案中没有此设置: {0}").format(entry.name))
+    
+    def show_setting_value(self, item, column, value):
+        setting = item.data(0, Qt.ItemDataRole.UserRole)
+        text = setting.options.get(value, str(value)) if setting.options else str(value)
+        item.setData(column, Qt.ItemDataRole.UserRole, value)
+        item.setText(column, text)
+    
+    def on_setting_edited(self, index, value):
+        """记录修改，点击“应用更改”时一并写入"""
+        item = self.settings_tree.itemFromIndex(index)
+        setting = item.data(0, Qt.ItemDataRole.UserRole)
+        subgroup_guid = item.parent().data(0, Qt.ItemDataRole.UserRole)
+        self.show_setting_value(item, index.column(), value)
+        
+        key = (subgroup_guid, setting.guid)
+        ac, dc = self.pending_settings.get(key, (None, None))
+        if index.column() == 1:
+            ac = None if value == setting.ac_value else value
+        else:
+            dc = None if value == setting.dc_value else value
+        if ac is None and dc is None:
+            self.pending_settings.pop(key, None)
+        else:
+            self.pending_settings[key] = (ac, dc)
+        
+        font = item.font(index.column())
+        font.setBold(value != (setting.ac_value if index.column() == 1 else setting.dc_value))
+        item.setFont(index.column(), font)
+        self.update_pending_settings_label()
+    
+    def pending_settings_text(self):
+        count = len(self.pending_settings)
+        return self.tr("{0} 项未应用的更改").format(count) if count else ""
+    
+    def update_pending_settings_label(self):
+        count = len(self.pending_settings)
+        self.pending_settings_label.setText(self.pending_settings_text())
+        self.apply_settings_btn.setEnabled(bool(count))
+        self.discard_settings_btn.setEnabled(bool(count))
+    
+    def apply_setting_changes(self):
+        """一次写入所有未应用的修改"""
+        if not self.pending_settings or self.settings_model is None:
+            return
+        model = self.settings_model
+        values = [(sub, setting, ac, dc) for (sub, setting), (ac, dc) in self.pending_settings.items()]
+        
+        def on_success(values):
+            model.apply(values)
+            if model is self.settings_model:
+                self.mark_settings_applied(values)
+            self.statusBar().showMessage(self.tr("已应用 {0} 项设置更改").format(len(values)))
+        
+        def on_error(e):
+            QMessageBox.critical(self, self.tr("错误"), self.tr("应用设置失败: {0}").format(str(e)))
+        
+        self.executor.submit(
+            self.tr("正在应用设置..."), self.scheme_cache.write_settings, model.scheme_guid, values,
+            on_success=on_success, on_error=on_error, mutating=True
+        )
+    
+    def mark_settings_applied(self, values):
+        """应用成功后清除对应的未应用标记（应用期间再次修改的保留）"""
+        for sub, setting, ac, dc in values:
+            if self.pending_settings.get((sub, setting)) == (ac, dc):
+                del self.pending_settings[(sub, setting)]
+        for i in range(self.settings_tree.topLevelItemCount()):
+            group = self.settings_tree.topLevelItem(i)
+            for j in range(group.childCount()):
+                child = group.child(j)
+                setting = child.data(0, Qt.ItemDataRole.UserRole)
+                for column, applied in ((1, setting.ac_value), (2, setting.dc_value)):
+                    font = child.font(column)
+                    font.setBold(child.data(column, Qt.ItemDataRole.UserRole) != applied)
+                    child.setFont(column, font)
+        self.update_pending_settings_label()
+    
+    def set_power_plan(self, plan_id):
+        """设置指定的电源计划"""
+        guid = self.power_guids.get(plan_id)
+        if not guid:
+            QMessageBox.warning(self, self.tr("错误"), self.tr("找不到 {0} 的GUID").format(plan_id))
+            return
+        plan_name = self.tr(plans.QUICK_PLANS[plan_id][1])
+        
+        def switch():
+            # 不存在时先复制电源方案，再激活（缓存更新后列表会自动刷新）
+            plans.switch_plan(self.scheme_cache, guid)
+        
+        def on_success(_):
+            # 显示成功消息
+            self.statusBar().showMessage(self.tr("已切换到 {0} 模式").format(plan_name))
+            QMessageBox.information(self, self.tr("成功"), self.tr("已切换到 {0} 模式").format(plan_name))
+        
+        # 连续点击时只执行最后一次切换（尚未开始的切换被取代）
+        self.executor.submit(
+            self.tr("正在切换到 {0} 模式...").format(plan_name), switch,
+            on_success=on_success,
+            on_error=lambda e: QMessageBox.critical(
+                self, self.tr("错误"), self.tr("切换电源计划失败:\n{0}").format(getattr(e, "stderr", e))),
+            mutating=True, key="switch"
+        )
+    
+    def delete_selected_plan(self):
+        """删除选中的电源计划"""
+        selected = self.plan_list.selectionModel().selectedIndexes()
+        if not selected:
+            QMessageBox.warning(self, self.tr("警告"), self.tr("请先选择一个电源计划"))
+            return
+        
+        guid = selected[0].data(GuidRole)
+        selected_text = f"{selected[0].data(NameRole)} ({guid})"
+        
+        # 检查是否是系统内置计划
+        if plans.is_builtin(guid):
+            QMessageBox.warning(self, self.tr("警告"), self.tr("无法删除系统内置电源计划!"))
+            return
+        
+        # 确认对话框
+        reply = QMessageBox.question(
+            self, self.tr("确认删除"),
+            self.tr("确定要删除电源计划?\n{0}").format(selected_text),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        
+        if reply == QMessageBox.StandardButton.Yes:
+            def on_success(_):
+                self.statusBar().showMessage(self.tr("电源计划已删除"))
+                QMessageBox.information(self, self.tr("成功"), self.tr("电源计划已成功删除"))
+            
+            # 删除电源计划
+            self.executor.submit(
+                self.tr("正在删除电源计划..."), plans.delete_plan, self.scheme_cache, guid,
+                on_success=on_success,
+                on_error=lambda e: QMessageBox.critical(
+                    self, self.tr("错误"), self.tr("删除电源计划失败:\n{0}").format(getattr(e, "stderr", e))),
+                mutating=True
+            )
+    
+    def save_snapshot(self):
+        """保存所有电源方案的全部设置"""
+        path, _ = QFileDialog.getSaveFileName(
+            self, self.tr("保存电源方案快照..."), "", self.tr("电源方案快照 (*.apmsnap)"))
+        if not path:
+            return
+        
+        def snapshot_all():
+            # 各方案的 /Q 查询并行执行
+            snapshot = take_snapshot(self.backend, [plan.guid for plan in self.scheme_cache.schemes()])
+            snapshot.save(path)
+            return path
+        
+        def on_success(path):
+            self.statusBar().showMessage(self.tr("快照已保存: {0}").format(path))
+        
+        def on_error(e):
+            QMessageBox.critical(self, self.tr("错误"), self.tr("保存快照失败: {0}").format(str(e)))
+        
+        self.executor.submit(self.tr("正在保存快照..."), snapshot_all,
+                             on_success=on_success, on_error=on_error)
+    
+    def compare_snapshot(self):
+        """比较当前设置与快照，可选择恢复为快照中的值"""
+        path, _ = QFileDialog.getOpenFileName(
+            self, self.tr("与快照比较..."), "", self.tr("电源方案快照 (*.apmsnap)"))
+        if not path:
+            return
+        
+        def compare():
+            baseline = Snapshot.load(path)
+            existing = {plan.guid for plan in self.scheme_cache.schemes()}
+            current = take_snapshot(self.backend, [guid for guid in baseline.schemes if guid in existing])
+            return baseline, current, diff_snapshots(baseline, current)
+        
+        def on_success(result):
+            baseline, current, diffs = result
+            if not diffs:
+                QMessageBox.information(self, self.tr("快照比较"), self.tr("当前设置与快照一致"))
+                return
+            names = dict(baseline.names, **current.names)
+            
+            def value_text(value, index):
+                return "-" if value is None else str(value[index])
+            
+            lines = []
+            for guid, scheme_diffs in diffs.items():
+                for d in scheme_diffs:
+                    path = " / ".join(names.get(g, g) for g in (guid, d.subgroup, d.setting))
+                    lines.append(f"{path}: AC {value_text(d.old, 0)} → {value_text(d.new, 0)}, "
+                                 f"DC {value_text(d.old, 1)} → {value_text(d.new, 1)}")
+            
+            box = QMessageBox(
+                QMessageBox.Icon.Question, self.tr("快照比较"),
+                self.tr("{0} 个方案中共有 {1} 项设置与快照不同（快照值 → 当前值），是否恢复为快照中的值?").format(
+                    len(diffs), len(lines)),
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, self
+            )
+            box.setDetailedText("\n".join(lines))
+            if box.exec() == QMessageBox.StandardButton.Yes:
+                self.restore_snapshot(baseline, list(diffs))
+        
+        def on_error(e):
+            QMessageBox.critical(self, self.tr("错误"), self.tr("比较快照失败: {0}").format(str(e)))
+        
+        self.executor.submit(self.tr("正在比较快照..."), compare, on_success=on_success, on_error=on_error)
+    
+    def restore_snapshot(self, baseline, scheme_guids):
+        """把指定方案恢复为快照中的值，只写入有差异的设置"""
+        def restore():
+            return sum(
+                len(restore_scheme(self.backend, baseline.schemes[guid], write=self.scheme_cache.write_settings))
+                for guid in scheme_guids
+            )
+        
+        def on_success(count):
+            self.statusBar().showMessage(self.tr("已恢复 {0} 项设置").format(count))
+            if self.settings_model is not None and self.settings_model.scheme_guid in scheme_guids:
+                self.load_settings()
+        
+        def on_error(e):
+            QMessageBox.critical(self, self.tr("错误"), self.tr("恢复快照失败: {0}").format(str(e)))
+        
+        self.executor.submit(self.tr("正在恢复快照..."), restore,
+                             on_success=on_success, on_error=on_error, mutating=True)
+    
+    def check_registry_settings(self):
+        """在后台一次读取所有注册表调整项"""
+        def on_success(values):
+            self.tweak_values = values
+            # 勾选状态与当前值一致，目标值即当前值
+            self.reg_table.blockSignals(True)
+            for row in range(self.reg_table.rowCount()):
+                item = self.reg_table.item(row, 0)
+                tweak = self.tweak_engine.tweak(item.data(Qt.ItemDataRole.UserRole))
+                applied = values.get(tweak.name) == tweak.value
+                item.setCheckState(Qt.CheckState.Checked if applied else Qt.CheckState.Unchecked)
+            self.reg_table.blockSignals(False)
+            self.relabel_tweak_values()
+        
+        def on_error(e):
+            QMessageBox.warning(self, self.tr("注册表错误"), self.tr("读取注册表失败: {0}").format(str(e)))
+        
+        self.executor.submit(
+            self.tr("正在读取注册表..."), self.tweak_engine.read, on_success=on_success, on_error=on_error
+        )
+    
+    def tweak_value_text(self, value):
+        return self.tr("(未设置)") if value is None else str(value)
+    
+    def desired_tweaks(self):
+        """表中勾选状态对应的目标值 {名称: 值}，只包含与当前值不同的项"""
+        desired = {}
+        for row in range(self.reg_table.rowCount()):
+            item = self.reg_table.item(row, 0)
+            tweak = self.tweak_engine.tweak(item.data(Qt.ItemDataRole.UserRole))
+            current = self.tweak_values.get(tweak.name)
+            if item.checkState() == Qt.CheckState.Checked:
+                value = tweak.value
+            elif current == tweak.value:
+                value = tweak.default
+            else:
+                # 未勾选且当前不是调整后的值时保持不变
+                value = current
+            if value != current:
+                desired[tweak.name] = value
+        return desired
+    
+    def relabel_tweak_values(self, _=None):
+        """刷新当前值、目标值两列，与当前值不同的目标值加粗显示"""
+        desired = self.desired_tweaks()
+        bold = QFont()
+        bold.setBold(True)
+        self.reg_table.blockSignals(True)
+        for row in range(self.reg_table.rowCount()):
+            name = self.reg_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+            current = self.tweak_values.get(name)
+            self.reg_table.item(row, 1).setText(self.tweak_value_text(current))
+            target = self.reg_table.item(row, 2)
+            target.setText(self.tweak_value_text(desired.get(name, current)))
+            target.setFont(bold if name in desired else QFont())
+        self.reg_table.blockSignals(False)
+        count = len(desired)
+        self.pending_tweaks_label.setText(self.tr("{0} 项未应用的更改").format(count) if count else "")
+        self.apply_reg_btn.setEnabled(bool(count))
+    
+    def on_tweak_item_changed(self, item):
+        if item.column() == 0:
+            self.relabel_tweak_values()
+    
+    def toggle_governor(self, checked):
+        """启用或停用按 CPU 负载自动切换"""
+        if not checked:
+            if self.governor is not None:
+                self.governor.stop()
+                self.governor.sampler.close()
+                self.governor = None
+            for widget in self.governor_inputs:
+                widget.setEnabled(True)
+            self.statusBar().showMessage(self.tr("已停用自动切换"))
+            return
+        
+        try:
+            config = governor.GovernorConfig(
+                self.governor_high_combo.currentData(), self.governor_low_combo.currentData(),
+                self.governor_up_spin.value() / 100, self.governor_down_spin.value() / 100,
+                min_dwell=self.governor_dwell_spin.value()
+            )
+            sampler = governor.create_sampler()
+        except (ValueError, OSError) as e:
+            QMessageBox.critical(self, self.tr("错误"), self.tr("无法启用自动切换:\n{0}").format(e))
+            self.governor_checkbox.blockSignals(True)
+            self.governor_checkbox.setChecked(False)
+            self.governor_checkbox.blockSignals(False)
+            return
+        
+        self.governor = governor.LoadGovernor(self.scheme_cache, sampler, config,
+                                              on_decision=self.governor_decision.emit)
+        self.governor.start()
+        for widget in self.governor_inputs:
+            widget.setEnabled(False)
+        self.statusBar().showMessage(self.tr("已启用自动切换"))
+    
+    def on_governor_decision(self, decision):
+        """显示自动切换的决定（方案列表由缓存的变更通知刷新）"""
+        def name(guid):
+            scheme = self.scheme_cache.get(guid) if guid else None
+            return scheme.name if scheme else guid
+        
+        if decision.error:
+            message = self.tr("自动切换失败: {0}").format(decision.error)
+        else:
+            message = self.tr("自动切换: {0} -> {1}（平均负载 {2}%）").format(
+                name(decision.old), name(decision.new), round(decision.mean * 100))
+        self.governor_label.setText(message)
+        self.statusBar().showMessage(message)
+    
+    def add_rule_row(self, rule=None, edit=False):
+        """在规则表中添加一行；计划列可选快捷计划与当前的方案"""
+        row = self.rules_table.rowCount()
+        self.rules_table.blockSignals(True)
+        self.rules_table.insertRow(row)
+        self.rules_table.setItem(row, 0, QTableWidgetItem(rule.pattern if rule else ""))
+        
+        combo = QComboBox()
+        for plan_id, (_, name) in plans.QUICK_PLANS.items():
+            combo.addItem("", plan_id)
+            self.i18n.bind(lambda text, combo=combo, index=combo.count() - 1: combo.setItemText(index, text), name)
+        for plan in self.current_plans:
+            if not plans.is_builtin(plan.guid):
+                combo.addItem(plan.name, plan.guid)
+        plan = rule.plan if rule else "high"
+        if combo.findData(plan) < 0:
+            combo.addItem(plan, plan)
+        combo.setCurrentIndex(combo.findData(plan))
+        combo.currentIndexChanged.connect(self.save_process_rules)
+        self.rules_table.setCellWidget(row, 1, combo)
+        
+        spin = QSpinBox()
+        spin.setRange(-100, 100)
+        spin.setValue(rule.priority if rule else 0)
+        spin.valueChanged.connect(self.save_process_rules)
+        self.rules_table.setCellWidget(row, 2, spin)
+        self.rules_table.blockSignals(False)
+        
+        if edit:
+            self.rules_table.setCurrentCell(row, 0)
+            self.rules_table.editItem(self.rules_table.item(row, 0))
+    
+    def remove_rule_rows(self):
+        rows = sorted({index.row() for index in self.rules_table.selectedIndexes()}, reverse=True)
+        for row in rows:
+            self.rules_table.removeRow(row)
+        if rows:
+            self.save_process_rules()
+    
+    def read_rule_table(self):
+        """按表格内容创建规则，忽略没有填写进程的行"""
+        rules = []
+        for row in range(self.rules_table.rowCount()):
+            item = self.rules_table.item(row, 0)
+            pattern = item.text().strip() if item else ""
+            if pattern:
+                rules.append(process_rules.ProcessRule(
+                    pattern, self.rules_table.cellWidget(row, 1).currentData(),
+                    self.rules_table.cellWidget(row, 2).value()))
+        return rules
+    
+    def set_rule_editing(self, enabled):
+        # 规则运行期间不允许修改
+        self.rules_table.setEnabled(enabled)
+        self.add_rule_btn.setEnabled(enabled)
+        self.remove_rule_btn.setEnabled(enabled)
+    
+    def save_process_rules(self):
+        """把规则表与启用状态写入用户配置"""
+        section = {"enabled": self.rule_engine is not None,
+                   "rules": [rule.to_dict() for rule in self.read_rule_table()]}
+        self.config["process_rules"] = section
+        try:
+            app_config.update_config("process_rules", section)
+        except OSError as e:
+            self.statusBar().showMessage(self.tr("无法保存配置: {0}").format(e))
+    
+    def start_process_rules(self, rules):
+        """启动进程规则，成功时返回 True"""
+        try:
+            source = process_rules.create_process_source()
+        except OSError as e:
+            QMessageBox.critical(self, self.tr("错误"), self.tr("无法启用进程规则:\n{0}").format(e))
+            return False
+        self.rule_engine = process_rules.RuleEngine(self.scheme_cache, rules, source,
+                                                    on_decision=self.rules_decision.emit)
+        self.rule_engine.start()
+        return True
+    
+    def toggle_process_rules(self, checked):
+        """启用或停用进程规则"""
+        if not checked:
+            if self.rule_engine is not None:
+                self.rule_engine.stop()
+                self.rule_engine = None
+            self.set_rule_editing(True)
+            self.save_process_rules()
+            self.statusBar().showMessage(self.tr("已停用进程规则"))
+            return
+        
+        rules = self.read_rule_table()
+        if not rules:
+            QMessageBox.critical(self, self.tr("错误"), self.tr("请先添加进程规则"))
+        if not rules or not self.start_process_rules(rules):
+            self.rules_checkbox.blockSignals(True)
+            self.rules_checkbox.setChecked(False)
+            self.rules_checkbox.blockSignals(False)
+            return
+        self.set_rule_editing(False)
+        self.save_process_rules()
+        self.statusBar().showMessage(self.tr("已启用进程规则"))
+    
+    def on_rules_decision(self, decision):
+        """显示进程规则引起的切换"""
+        def name(guid):
+            scheme = self.scheme_cache.get(guid) if guid else None
+            return scheme.name if scheme else guid
+        
+        if decision.error:
+            message = self.tr("进程规则切换失败: {0}").format(decision.error)
+        elif decision.reason == "revert":
+            message = self.tr("进程规则: 相关进程已退出，恢复 {0}").format(name(decision.new))
+        else:
+            message = self.tr("进程规则: {0} 正在运行，切换到 {1}").format(decision.process, name(decision.new))
+        if self.tab_built(self.automation_tab):
+            self.rules_label.setText(message)
+        self.statusBar().showMessage(message)
+    
+    def plan_display_name(self, plan):
+        """快捷计划 ID 显示翻译后的名称，GUID 显示方案名称"""
+        if plan in plans.QUICK_PLANS:
+            return self.tr(plans.QUICK_PLANS[plan][1])
+        scheme = self.scheme_cache.get(plan) if plan else None
+        return scheme.name if scheme else plan
+    
+    def schedule_text(self):
+        """配置中的时间表，每个时段一行"""
+        sched = schedule.load_schedule(self.config.get("schedule"))
+        if not sched.rules:
+            return self.tr("配置文件中没有时间表（schedule 一节），也可以用 main.py schedule 命令运行。")
+        lines = []
+        for rule in sched.rules:
+            days = self.tr("每天") if len(rule.days) == 7 else schedule.format_days(rule.days)
+            lines.append(f"{days} {schedule.format_time(rule.start)}-{schedule.format_time(rule.end)}: "
+                         f"{self.plan_display_name(rule.plan)}")
+        if sched.default:
+            lines.append(self.tr("其他时间: {0}").format(self.plan_display_name(sched.default)))
+        return "\n".join(lines)
+    
+    def start_scheduler(self):
+        """按配置启动时间表，成功时返回 True"""
+        sched = schedule.load_schedule(self.config.get("schedule"))
+        if not sched.rules:
+            QMessageBox.critical(self, self.tr("错误"), self.tr("配置文件中没有有效的时间表"))
+            return False
+        try:
+            self.scheduler = schedule.PlanScheduler(self.scheme_cache, sched, on_decision=self.schedule_decision.emit)
+        except plans.PlanError as e:
+            QMessageBox.critical(self, self.tr("错误"), self.tr("无法启用时间表:\n{0}").format(e))
+            return False
+        self.scheduler.start()
+        return True
+    
+    def toggle_scheduler(self, checked):
+        """启用或停用时间表，启用状态写入用户配置"""
+        if not checked:
+            if self.scheduler is not None:
+                self.scheduler.stop()
+                self.scheduler = None
+            self.statusBar().showMessage(self.tr("已停用时间表"))
+        elif not self.start_scheduler():
+            self.schedule_checkbox.blockSignals(True)
+            self.schedule_checkbox.setChecked(False)
+            self.schedule_checkbox.blockSignals(False)
+            return
+        else:
+            self.statusBar().showMessage(self.tr("已启用时间表"))
+            self.show_next_transition()
+        section = dict(self.config.get("schedule") or {}, enabled=checked)
+        self.config["schedule"] = section
+        try:
+            app_config.update_config("schedule", section)
+        except OSError as e:
+            self.statusBar().showMessage(self.tr("无法保存配置: {0}").format(e))
+    
+    def show_next_transition(self):
+        transitions = self.scheduler.next_transitions(1) if self.scheduler is not None else []
+        if transitions and self.tab_built(self.automation_tab):
+            when, plan = transitions[0]
+            self.schedule_label.setText(self.tr("下一次切换: {0} {1}").format(
+                when.strftime("%a %H:%M"), self.plan_display_name(plan)))
+    
+    def on_schedule_decision(self, decision):
+        """显示时间表引起的切换"""
+        if decision.error:
+            message = self.tr("时间表切换失败: {0}").format(decision.error)
+        else:
+            message = self.tr("时间表: 切换到 {0}").format(self.plan_display_name(decision.new))
+        self.statusBar().showMessage(message)
+        self.show_next_transition()
+    
+    def perf_status_text(self):
+        if self.perf_manager is None:
+            return self.tr("当前平台不支持调整进程")
+        if not self.perf_profiles:
+            return self.tr("配置文件中没有性能配置（performance_profiles 一节）")
+        if self.perf_manager.active is None:
+            return self.tr("没有生效的性能配置")
+        return self.tr("当前性能配置: {0}").format(self.perf_manager.active.profile)
+    
+    def update_perf_buttons(self, busy=False):
+        available = self.perf_manager is not None and not busy
+        self.perf_apply_btn.setEnabled(available and bool(self.perf_profiles))
+        self.perf_restore_btn.setEnabled(available and self.perf_manager.active is not None)
+        self.perf_label.setText(self.perf_status_text())
+    
+    def perf_errors_text(self, errors):
+        return ", ".join(f"{name} ({pid}): {error}" for pid, name, error in errors)
+    
+    def apply_perf_profile(self):
+        """在后台启用选中的性能配置（先恢复已生效的配置）"""
+        row = self.perf_combo.currentIndex()
+        if self.perf_manager is None or row < 0:
+            return
+        profile = self.perf_profiles[row]
+        self.update_perf_buttons(busy=True)
+        
+        def on_success(activation):
+            self.update_perf_buttons()
+            message = self.tr("已启用性能配置 {0}，调整了 {1} 个进程").format(profile.name, len(activation.changes))
+            if activation.errors:
+                message += "; " + self.tr("{0} 个进程无法调整: {1}").format(
+                    len(activation.errors), self.perf_errors_text(activation.errors))
+            self.statusBar().showMessage(message)
+        
+        def on_error(e):
+            self.update_perf_buttons()
+            QMessageBox.critical(self, self.tr("错误"), self.tr("启用性能配置失败:\n{0}").format(getattr(e, "stderr", e)))
+        
+        self.executor.submit(self.tr("正在启用性能配置..."), self.perf_manager.activate, profile,
+                             on_success=on_success, on_error=on_error, mutating=True, key="perf")
+    
+    def restore_perf_profile(self):
+        """在后台恢复启用性能配置前的计划与进程设置"""
+        if self.perf_manager is None or self.perf_manager.active is None:
+            return
+        self.update_perf_buttons(busy=True)
+        
+        def on_success(errors):
+            self.update_perf_buttons()
+            message = self.tr("已恢复启用性能配置前的状态")
+            if errors:
+                message += "; " + self.tr("{0} 个进程无法恢复: {1}").format(len(errors), self.perf_errors_text(errors))
+            self.statusBar().showMessage(message)
+        
+        def on_error(e):
+            self.update_perf_buttons()
+            QMessageBox.critical(self, self.tr("错误"), self.tr("恢复性能配置失败:\n{0}").format(getattr(e, "stderr", e)))
+        
+        self.executor.submit(self.tr("正在恢复性能配置..."), self.perf_manager.deactivate,
+                             on_success=on_success, on_error=on_error, mutating=True, key="perf")
+    
+    def apply_registry_settings(self):
+        """把表中所有更改作为一个事务写入注册表"""
+        desired = self.desired_tweaks()
+        if not desired:
+            return
+        self.apply_reg_btn.setEnabled(False)
+        
+        def on_success(changes):
+            summary = ", ".join(
+                f"{state.tweak.name} = {self.tweak_value_text(state.desired)}" for state in changes
+            )
+            QMessageBox.information(self, self.tr("成功"), self.tr("注册表设置已更新: {0}").format(summary))
+            self.statusBar().showMessage(self.tr("已更新 {0} 项注册表设置").format(len(changes)))
+            self.check_registry_settings()
+        
+        def on_error(e):
+            error = e.error if isinstance(e, registry_tweaks.TweakError) else e
+            if isinstance(error, PermissionError):
+                QMessageBox.critical(
+                    self, self.tr("权限错误"),
+                    self.tr("需要管理员权限修改注册表!\n请以管理员身份运行此程序。")
+                )
+            elif isinstance(e, registry_tweaks.TweakError) and e.rollback_errors:
+                names = ", ".join(state.tweak.name for state, _ in e.rollback_errors)
+                QMessageBox.critical(self, self.tr("错误"),
+                                     self.tr("更新注册表失败: {0}\n以下项未能恢复: {1}").format(str(error), names))
+            else:
+                QMessageBox.critical(self, self.tr("错误"), self.tr("更新注册表失败: {0}").format(str(error)))
+            self.check_registry_settings()
+        
+        self.executor.submit(self.tr("正在更新注册表..."), self.tweak_engine.apply, desired,
+                             on_success=on_success, on_error=on_error, mutating=True)
+    
+    def execute_command(self):
+        """执行PowerShell命令，输出实时显示在输出框中"""
+        if self.command_cancel is not None:
+            return
+        command = self.cmd_input.toPlainText().strip()
+        if not command:
+            QMessageBox.warning(self, self.tr("输入错误"), self.tr("请输入要执行的命令"))
+            return
+        
+        self.cmd_output.clear()
+        self.output_buffer.clear()
+        self.command_cancel = threading.Event()
+        self.command_started = time.monotonic()
+        self.execute_btn.setEnabled(False)
+        self.cancel_cmd_btn.setEnabled(True)
+        self.output_timer.start()
+        
+        def on_success(result):
+            self.finish_command()
+            if result.returncode != 0:
+                self.statusBar().showMessage(
+                    self.tr("命令执行失败，退出码 {0}，用时 {1:.1f} 秒").format(result.returncode, result.elapsed))
+                return
+            if not self.output_buffer.total_lines:
+                self.cmd_output.appendPlainText(self.tr("命令执行成功，无输出"))
+            self.statusBar().showMessage(self.tr("命令执行成功，用时 {0:.1f} 秒").format(result.elapsed))
+        
+        def on_error(e):
+            self.finish_command()
+            if isinstance(e, ShellCancelled):
+                self.statusBar().showMessage(self.tr("命令已取消"))
+                return
+            QMessageBox.critical(self, self.tr("错误"), str(e))
+            self.statusBar().showMessage(self.tr("命令执行失败"))
+        
+        # 在常驻会话中执行命令，输出逐行写入环形缓冲，由定时器批量刷新到界面
+        self.executor.submit(
+            self.tr("正在执行命令..."), self.shell_pool.run, command,
+            on_output=self.output_buffer.append, cancel_event=self.command_cancel,
+            on_success=on_success, on_error=on_error
+        )
+    
+    def cancel_command(self):
+        """取消正在执行的命令"""
+        if self.command_cancel is not None:
+            self.command_cancel.set()
+            self.cancel_cmd_btn.setEnabled(False)
+    
+    def flush_command_output(self):
+        """把缓冲中的输出一次性追加到输出框，并更新已用时间"""
+        lines, dropped = self.output_buffer.drain()
+        if dropped:
+            self.cmd_output.appendPlainText(self.tr("…… 输出过多，已省略 {0} 行 ……").format(dropped))
+        if lines:
+            self.cmd_output.appendPlainText("".join(lines).rstrip("\r\n"))
+        if self.command_cancel is not None:
+            self.cmd_elapsed_label.setText(
+                self.tr("已用时间: {0:.1f} 秒").format(time.monotonic() - self.command_started))
+    
+    def finish_command(self):
+        """命令结束后刷新剩余输出并恢复按钮"""
+        self.flush_command_output()
+        self.output_timer.stop()
+        self.command_cancel = None
+        self.execute_btn.setEnabled(True)
+        self.cancel_cmd_btn.setEnabled(False)
+    
+    def closeEvent(self, event):
+        """关闭窗口时的事件处理"""
+        if self.tray is not None and self.tray.isVisible():
+            # 托盘模式: 隐藏窗口，从托盘菜单退出
+            self.hide()
+            event.ignore()
+            return
+        reply = QMessageBox.question(
+            self, self.tr("确认退出"),
+            self.tr("确定要退出电源管理工具吗?"),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        
+        if reply == QMessageBox.StandardButton.Yes:
+            self.shutdown()
+            event.accept()
+        else:
+            event.ignore()
+    
+    def shutdown(self):
+        """停止后台线程并释放系统资源"""
+        if self.command_cancel is not None:
+            self.command_cancel.set()
+        if self.governor is not None:
+            self.governor.stop()
+        if self.rule_engine is not None:
+            self.rule_engine.stop()
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        if self.telemetry is not None:
+            self.telemetry.stop()
+        self.scheme_cache.close()
+        self.shell_pool.close()
+        self.backend.close_registry_keys()
+
+
+def run_gui(argv):
+    """启动图形界面，返回退出码
+
+    带 --timeline 参数（或设置 APM_TIMELINE=1）时，首次绘制与首次数据完成后
+    向标准错误输出启动时间线。带 --attach 参数时连接到常驻服务（main.py
+    service），所有电源操作由服务执行。
+    """
+    timeline = startup if "--timeline" in argv or os.environ.get("APM_TIMELINE") else None
+    attach = "--attach" in argv
+    argv = [arg for arg in argv if arg not in ("--timeline", "--attach")]
+    try:
+        backend = create_backend("service" if attach else None)
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 1
+    # 检查是否以管理员身份运行，必要时以管理员身份重新启动
+    if elevate_if_needed(backend, argv):
+        return 0
+    app = QApplication(argv)
+    if timeline is not None:
+        timeline.mark("qapplication")
+    window = PowerManager(backend, timeline)
+    if timeline is not None:
+        timeline.mark("window")
+    window.show()
+    if timeline is not None:
+        timeline.mark("show")
+    return app.exec()
+
+
+if __name__ == "__main__":
+    sys.exit(run_gui(sys.argv))
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""界面翻译
+
+所有语言的翻译表在第一次使用时一次性读入，合并为一张表: 源字符串 ->
+按语言排列的译文元组，字符串均经过 sys.intern。切换语言只改变元组下标，
+不再读取文件。
+
+控件创建时通过 Translator.bind 登记“设置文本的方法 + 源字符串”，切换语言
+时按登记顺序逐一重新设置，不需要手工维护需要更新的控件列表。
+"""
+import functools
+import json
+import os
+import sys
+
+LOCALE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+
+# 语言代码 -> 显示名称
+LANGUAGES = {
+    "en_US": "English",
+    "zh_CN": "简体中文",
+    "es_ES": "Español",
+    "fr_FR": "Français",
+    "de_DE": "Deutsch",
+}
+
+
+class Catalogs:
+    """全部语言的翻译表"""
+
+    def __init__(self, directory=LOCALE_DIR, languages=LANGUAGES):
+        self.languages = tuple(languages)
+        self.index = {code: i for i, code in enumerate(self.languages)}
+        rows = {}
+        for i, code in enumerate(self.languages):
+            path = os.path.join(directory, f"{code}.json")
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"无法加载语言文件: {code} ({e})")
+                continue
+            for source, text in data.items():
+                row = rows.get(source)
+                if row is None:
+                    row = rows[sys.intern(source)] = [None] * len(self.languages)
+                row[i] = sys.intern(text)
+        self._table = {source: tuple(row) for source, row in rows.items()}
+        self._sources = None
+
+    def __len__(self):
+        return len(self._table)
+
+    def translate(self, column, text):
+        """按语言下标翻译，没有译文时返回源字符串"""
+        row = self._table.get(text)
+        if row is None or column is None:
+            return text
+        translated = row[column]
+        return text if translated is None else translated
+
+    def variants(self, text):
+        """text 为源字符串或任一语言的译文时，返回该行的源字符串与全部译文；否则返回空元组"""
+        if self._sources is None:
+            # 译文 -> 源字符串，第一次调用时建立；源字符串优先于同形的译文
+            sources = {}
+            for source, row in self._table.items():
+                for translated in row:
+                    if translated is not None:
+                        sources.setdefault(translated, source)
+            sources.update((source, source) for source in self._table)
+            self._sources = sources
+        source = self._sources.get(text)
+        if source is None:
+            return ()
+        return (source,) + tuple(t for t in self._table[source] if t is not None and t != source)
+
+
+@functools.lru_cache(maxsize=None)
+def default_catalogs():
+    """进程内共享的翻译表，只加载一次"""
+    return Catalogs()
+
+
+class Translator:
+    """当前界面语言及控件文本绑定"""
+
+    def __init__(self, language="en_US", catalogs=None):
+        self.catalogs = catalogs or default_catalogs()
+        self._bindings = []
+        self.language = language
+        self._column = self.catalogs.index.get(language)
+
+    def tr(self, text):
+        return self.catalogs.translate(self._column, text)
+
+    def _resolve(self, source):
+        return source() if callable(source) else self.tr(source)
+
+    def bind(self, setter, source):
+        """登记并立即应用一个绑定
+
+        source 为源字符串，或返回最终文本（可以是任意值）的无参函数，用于
+        需要拼接或格式化的文本；切换语言时以相同方式重新调用 setter。
+        """
+        setter(self._resolve(source))
+        self._bindings.append((setter, source))
+
+    def __len__(self):
+        return len(self._bindings)
+
+    def set_language(self, language):
+        """切换语言并重新应用所有绑定"""
+        self.language = language
+        self._column = self.catalogs.index.get(language)
+        alive = []
+        for setter, source in self._bindings:
+            try:
+                setter(self._resolve(source))
+            except RuntimeError:
+                # 控件已被 Qt 销毁
+                continue
+            alive.append((setter, source))
+        self._bindings = alive
@@ -0,0 +1,225 @@
+"""系统调用计量
+
+后端对操作系统的每次调用（powercfg、注册表、powrprof、PowerShell 会话）都经过
+measure()，记录命令、耗时、退出码与输出大小，并按操作名累计延迟直方图。
+诊断页显示各操作的 p50 / p95 / p99，数据可以导出为 JSON 或 Prometheus
+文本格式，便于比较不同机器。
+
+    with instrumentation.measure("list_schemes", "powercfg /L") as call:
+        result = subprocess.run(...)
+        call.exit_code = result.returncode
+        call.output_size = len(result.stdout)
+
+直方图的桶按 √2 倍递增（0.05 ms ~ 约 75 s），百分位数在桶内线性插值，相对
+误差不超过一个桶宽。add_hook 注册的回调会收到每条 CallRecord（在调用线程中
+执行）。
+"""
+import bisect
+import collections
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+
+# 直方图各桶的上界（秒）
+BUCKET_BOUNDS = tuple(0.00005 * math.sqrt(2) ** i for i in range(42))
+
+
+class CallRecord:
+    """一次调用"""
+
+    __slots__ = ("op", "command", "started", "duration", "exit_code", "output_size", "error")
+
+    def __init__(self, op, command, started=None):
+        self.op = op
+        self.command = command
+        self.started = time.time() if started is None else started
+        self.duration = 0.0
+        self.exit_code = 0
+        self.output_size = 0
+        self.error = None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class LatencyHistogram:
+    """固定桶的延迟直方图（秒）"""
+
+    __slots__ = ("counts", "count", "total", "minimum", "maximum", "errors")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = 0.0
+        self.errors = 0
+
+    def add(self, seconds, error=False):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.minimum = min(self.minimum, seconds)
+        self.maximum = max(self.maximum, seconds)
+        if error:
+            self.errors += 1
+
+    def percentile(self, q):
+        """估计第 q 百分位（0~100）的延迟，没有数据时返回 None"""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = BUCKET_BOUNDS[i - 1] if i else 0.0
+                high = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.maximum
+                value = low + (high - low) * max(0.0, rank - seen) / n
+                return min(max(value, self.minimum), self.maximum)
+            seen += n
+        return self.maximum
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def to_dict(self):
+        return {
+            "count": self.count, "errors": self.errors, "sum": self.total,
+            "min": self.minimum if self.count else None, "max": self.maximum if self.count else None,
+            "p50": self.percentile(50), "p95": self.percentile(95), "p99": self.percentile(99),
+            "buckets": [[bound, n] for bound, n in zip(BUCKET_BOUNDS + ("+Inf",), self.counts) if n],
+        }
+
+
+class Instrumentation:
+    """按操作名汇总的调用记录；recent 保留最近的若干条调用"""
+
+    def __init__(self, recent=200):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.recent = collections.deque(maxlen=recent)
+        self.output_bytes = collections.Counter()
+        self.hooks = []
+        self.started = time.time()
+
+    def add_hook(self, callback):
+        self.hooks.append(callback)
+
+    def remove_hook(self, callback):
+        if callback in self.hooks:
+            self.hooks.remove(callback)
+
+    def record(self, call):
+        with self._lock:
+            histogram = self.histograms.get(call.op)
+            if histogram is None:
+                histogram = self.histograms[call.op] = LatencyHistogram()
+            histogram.add(call.duration, call.exit_code != 0 or call.error is not None)
+            self.output_bytes[call.op] += call.output_size
+            self.recent.append(call)
+        for hook in list(self.hooks):
+            hook(call)
+
+    @contextlib.contextmanager
+    def measure(self, op, command=""):
+        """计量 with 块中的调用；块中抛出的异常记为失败后继续向外抛出"""
+        call = CallRecord(op, command)
+        start = time.perf_counter()
+        try:
+            yield call
+        except BaseException as e:
+            call.error = str(e) or type(e).__name__
+            if call.exit_code == 0:
+                code = getattr(e, "returncode", None) or getattr(e, "winerror", None) or getattr(e, "errno", None)
+                call.exit_code = code if isinstance(code, int) and code else 1
+            raise
+        finally:
+            call.duration = time.perf_counter() - start
+            self.record(call)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.recent.clear()
+            self.output_bytes.clear()
+            self.started = time.time()
+
+    def summary(self):
+        """返回 [(操作名, LatencyHistogram 的副本)]，按总耗时从高到低排列"""
+        with self._lock:
+            items = []
+            for op, histogram in self.histograms.items():
+                copy = LatencyHistogram()
+                copy.counts = list(histogram.counts)
+                for name in ("count", "total", "minimum", "maximum", "errors"):
+                    setattr(copy, name, getattr(histogram, name))
+                items.append((op, copy))
+        items.sort(key=lambda item: -item[1].total)
+        return items
+
+    # ---- 导出 ----
+
+    def to_dict(self):
+        with self._lock:
+            recent = [call.to_dict() for call in self.recent]
+            output_bytes = dict(self.output_bytes)
+        return {
+            "started": self.started,
+            "exported": time.time(),
+            "operations": {
+                op: dict(histogram.to_dict(), output_bytes=output_bytes.get(op, 0))
+                for op, histogram in self.summary()
+            },
+            "recent": recent,
+        }
+
+    def to_prometheus(self, prefix="apm"):
+        """Prometheus 文本格式（histogram 类型，单位为秒）"""
+        lines = [
+            f"# HELP {prefix}_os_call_duration_seconds Duration of OS calls made by the power manager.",
+            f"# TYPE {prefix}_os_call_duration_seconds histogram",
+        ]
+        summary = self.summary()
+        for op, histogram in summary:
+            label = op.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, n in zip(BUCKET_BOUNDS, histogram.counts):
+                cumulative += n
+                lines.append(f'{prefix}_os_call_duration_seconds_bucket{{op="{label}",le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{prefix}_os_call_duration_seconds_bucket{{op="{label}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{prefix}_os_call_duration_seconds_sum{{op="{label}"}} {histogram.total:.9g}')
+            lines.append(f'{prefix}_os_call_duration_seconds_count{{op="{label}"}} {histogram.count}')
+        lines.append(f"# HELP {prefix}_os_call_errors_total OS calls that failed or returned a non-zero exit code.")
+        lines.append(f"# TYPE {prefix}_os_call_errors_total counter")
+        for op, histogram in summary:
+            label = op.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{prefix}_os_call_errors_total{{op="{label}"}} {histogram.errors}')
+        lines.append(f"# HELP {prefix}_os_call_output_bytes_total Bytes of output returned by OS calls.")
+        lines.append(f"# TYPE {prefix}_os_call_output_bytes_total counter")
+        with self._lock:
+            output_bytes = dict(self.output_bytes)
+        for op, _ in summary:
+            label = op.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{prefix}_os_call_output_bytes_total{{op="{label}"}} {output_bytes.get(op, 0)}')
+        return "\n".join(lines) + "\n"
+
+    def export_json(self, path):
+        _write_atomic(path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2))
+
+    def export_prometheus(self, path):
+        _write_atomic(path, self.to_prometheus())
+
+
+def _write_atomic(path, text):
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+    os.replace(temp, path)
+
+
+# 进程内共享的计量数据
+instruments = Instrumentation()
+measure = instruments.measure
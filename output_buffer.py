@@ -0,0 +1,44 @@
+"""命令输出的环形缓冲
+
+工作线程逐行写入，界面线程定时批量取出后一次性追加到输出框。缓冲区最多
+保存 max_lines 行，界面来不及取走时丢弃最旧的行并计数，过长的行会被截断，
+因此无论命令输出多少内容，占用的内存都有上限。
+"""
+import collections
+import threading
+
+
+class OutputRingBuffer:
+    """线程安全的定长行缓冲"""
+
+    def __init__(self, max_lines=5000, max_line_length=2000):
+        self.max_lines = max_lines
+        self.max_line_length = max_line_length
+        self.total_lines = 0
+        self._pending = collections.deque(maxlen=max_lines)
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def append(self, stream, line):
+        """追加一行（stream 为 "stdout" 或 "stderr"，可直接用作 shell 输出回调）"""
+        if len(line) > self.max_line_length:
+            line = line[:self.max_line_length] + "…\n"
+        with self._lock:
+            if len(self._pending) == self.max_lines:
+                self._dropped += 1
+            self._pending.append(line)
+            self.total_lines += 1
+
+    def drain(self):
+        """取出所有待显示的行，返回 (行列表, 自上次取出以来被丢弃的行数)"""
+        with self._lock:
+            lines = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+        return lines, dropped
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._dropped = 0
+            self.total_lines = 0
@@ -0,0 +1,555 @@
+"""性能配置
+
+性能配置把电源计划与进程调整打包在一起，一步启用、一步恢复。每个进程调整
+按名称或路径（通配符，与进程规则相同）匹配正在运行的进程，可以设置:
+
+    priority     优先级: idle / below_normal / normal / above_normal / high
+    affinity     可以运行的 CPU，如 "0-3,6"
+    throttling   "off" 关闭电源限制（不使用 EcoQoS），"eco" 强制使用 EcoQoS
+
+配置保存在用户配置的 "performance_profiles" 一节:
+
+    "performance_profiles": [
+        {"name": "低延迟", "scheme": "ultimate",
+         "processes": [{"pattern": "trading*", "priority": "high", "affinity": "2-7", "throttling": "off"},
+                       {"pattern": "OneDrive", "priority": "below_normal", "throttling": "eco"}]}]
+
+ProfileManager.activate() 记录当前的计划与每个进程原来的优先级、CPU 亲和性，
+再切换计划并调整进程；deactivate() 按记录恢复（已退出或 PID 被复用的进程
+跳过）。记录同时写入状态文件，程序退出或命令行分两次调用时也能恢复。只调整
+启用时已在运行的进程。
+
+进程调整通过 ProcessController 完成:
+
+    WindowsProcessController   SetPriorityClass / SetProcessAffinityMask /
+                               SetProcessInformation(ProcessPowerThrottling)
+    PosixProcessController     nice 值与 os.sched_setaffinity（Linux 上对每个线程
+                               设置）；没有 EcoQoS，throttling 被忽略
+    SimulatedProcessController 内存中的进程表，用于测试
+"""
+import ctypes
+import json
+import os
+import sys
+
+from plans import resolve_plan, switch_plan
+from process_rules import ProcessPattern, create_process_source
+
+STATE_FILE = "perf_state.json"
+PRIORITIES = ("idle", "below_normal", "normal", "above_normal", "high")
+THROTTLING = ("off", "eco")
+
+
+def parse_cpus(text):
+    """"0-3,6" 转换为 CPU 编号的 frozenset，无效时抛出 ValueError"""
+    if isinstance(text, (list, tuple, set, frozenset)):
+        return frozenset(int(cpu) for cpu in text)
+    cpus = set()
+    for part in str(text).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        try:
+            first = int(first)
+            last = int(last) if sep else first
+        except ValueError:
+            raise ValueError(f"无效的 CPU 列表: {text}") from None
+        if first < 0 or last < first:
+            raise ValueError(f"无效的 CPU 列表: {text}")
+        cpus.update(range(first, last + 1))
+    if not cpus:
+        raise ValueError(f"无效的 CPU 列表: {text}")
+    return frozenset(cpus)
+
+
+def format_cpus(cpus):
+    """把 CPU 编号合并为区间，如 {0, 1, 2, 3, 6} -> "0-3,6" """
+    parts = []
+    for cpu in sorted(cpus):
+        if parts and parts[-1][1] == cpu - 1:
+            parts[-1][1] = cpu
+        else:
+            parts.append([cpu, cpu])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in parts)
+
+
+class ProcessTuning(ProcessPattern):
+    """对匹配进程的调整；值为 None 的项不修改"""
+
+    __slots__ = ("priority", "affinity", "throttling")
+
+    def __init__(self, pattern, priority=None, affinity=None, throttling=None):
+        super().__init__(pattern)
+        if priority is not None and priority not in PRIORITIES:
+            raise ValueError(f"无效的优先级: {priority}")
+        if throttling is not None and throttling not in THROTTLING:
+            raise ValueError(f"无效的电源限制设置: {throttling}")
+        self.priority = priority
+        self.affinity = parse_cpus(affinity) if affinity is not None else None
+        self.throttling = throttling
+
+    def to_dict(self):
+        data = {"pattern": self.pattern}
+        if self.priority is not None:
+            data["priority"] = self.priority
+        if self.affinity is not None:
+            data["affinity"] = format_cpus(self.affinity)
+        if self.throttling is not None:
+            data["throttling"] = self.throttling
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["pattern"], data.get("priority"), data.get("affinity"), data.get("throttling"))
+
+    def __repr__(self):
+        return f"ProcessTuning({self.to_dict()})"
+
+
+class PerformanceProfile:
+    """一个性能配置: 电源计划（可为空）与进程调整"""
+
+    __slots__ = ("name", "scheme", "processes")
+
+    def __init__(self, name, scheme=None, processes=()):
+        if not name:
+            raise ValueError("性能配置需要名称")
+        self.name = name
+        self.scheme = scheme
+        self.processes = list(processes)
+
+    def match(self, name, path):
+        """返回第一个匹配进程的调整，没有时返回 None"""
+        for tuning in self.processes:
+            if tuning.matches(name, path):
+                return tuning
+        return None
+
+    def to_dict(self):
+        return {"name": self.name, "scheme": self.scheme, "processes": [t.to_dict() for t in self.processes]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data.get("scheme"),
+                   [ProcessTuning.from_dict(item) for item in data.get("processes") or ()])
+
+
+def load_profiles(data):
+    """从配置中的列表创建性能配置，忽略无效的条目"""
+    profiles = []
+    for item in data or ():
+        try:
+            profiles.append(PerformanceProfile.from_dict(item))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return profiles
+
+
+# ---- 进程调整 ----
+
+class ProcessController:
+    """读取与修改进程的优先级、CPU 亲和性和电源限制
+
+    priority() 返回平台相关的原始值（nice 值或优先级类），可以原样传回
+    set_priority() 用于恢复；priority_value() 把 PRIORITIES 中的名称转换为
+    原始值。进程不存在时抛出 ProcessLookupError，没有权限时抛出 PermissionError。
+    """
+
+    def cpu_count(self):
+        return os.cpu_count() or 1
+
+    def priority_value(self, name):
+        raise NotImplementedError
+
+    def priority(self, pid):
+        raise NotImplementedError
+
+    def set_priority(self, pid, value):
+        raise NotImplementedError
+
+    def affinity(self, pid):
+        raise NotImplementedError
+
+    def set_affinity(self, pid, cpus):
+        raise NotImplementedError
+
+    def throttling(self, pid):
+        """当前的电源限制设置（"off"、"eco"，None 表示由系统决定）"""
+        return None
+
+    def set_throttling(self, pid, mode):
+        """mode 为 "off"、"eco" 或 None（交还系统决定）；返回 False 表示平台不支持"""
+        return False
+
+
+class PosixProcessController(ProcessController):
+    """nice 值与 sched_setaffinity
+
+    Linux 上 nice 值与 CPU 亲和性属于线程，这里对 /proc/PID/task 下的每个线程
+    设置；读取时以主线程为准。
+    """
+
+    NICE = {"idle": 19, "below_normal": 10, "normal": 0, "above_normal": -5, "high": -10}
+
+    def cpu_count(self):
+        if hasattr(os, "sched_getaffinity"):
+            return max(os.sched_getaffinity(0)) + 1
+        return super().cpu_count()
+
+    def _threads(self, pid):
+        try:
+            return [int(tid) for tid in os.listdir(f"/proc/{pid}/task")]
+        except OSError:
+            return [pid]
+
+    def priority_value(self, name):
+        return self.NICE[name]
+
+    def priority(self, pid):
+        return os.getpriority(os.PRIO_PROCESS, pid)
+
+    def set_priority(self, pid, value):
+        for tid in self._threads(pid):
+            os.setpriority(os.PRIO_PROCESS, tid, value)
+
+    def affinity(self, pid):
+        if not hasattr(os, "sched_getaffinity"):
+            return None
+        return frozenset(os.sched_getaffinity(pid))
+
+    def set_affinity(self, pid, cpus):
+        if not hasattr(os, "sched_setaffinity"):
+            return
+        for tid in self._threads(pid):
+            os.sched_setaffinity(tid, cpus)
+
+
+class WindowsProcessController(ProcessController):
+    """优先级类、亲和性掩码与 EcoQoS（ProcessPowerThrottling）"""
+
+    PROCESS_SET_INFORMATION = 0x0200
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    PRIORITY_CLASSES = {"idle": 0x40, "below_normal": 0x4000, "normal": 0x20,
+                        "above_normal": 0x8000, "high": 0x80}
+    ProcessPowerThrottling = 4
+    PROCESS_POWER_THROTTLING_EXECUTION_SPEED = 0x1
+
+    def __init__(self):
+        from ctypes import wintypes
+
+        class PowerThrottlingState(ctypes.Structure):
+            _fields_ = [("Version", wintypes.ULONG), ("ControlMask", wintypes.ULONG), ("StateMask", wintypes.ULONG)]
+
+        self._state_type = PowerThrottlingState
+        self._kernel32 = ctypes.windll.kernel32
+        self._kernel32.OpenProcess.restype = wintypes.HANDLE
+
+    def _open(self, pid, access):
+        handle = self._kernel32.OpenProcess(access, False, pid)
+        if not handle:
+            error = ctypes.GetLastError()
+            # ERROR_INVALID_PARAMETER: 进程已退出
+            if error == 87:
+                raise ProcessLookupError(f"进程 {pid} 不存在")
+            raise ctypes.WinError(error)
+        return handle
+
+    def _call(self, pid, access, func):
+        handle = self._open(pid, access)
+        try:
+            return func(handle)
+        finally:
+            self._kernel32.CloseHandle(handle)
+
+    @staticmethod
+    def _check(ok):
+        if not ok:
+            raise ctypes.WinError()
+        return ok
+
+    def priority_value(self, name):
+        return self.PRIORITY_CLASSES[name]
+
+    def priority(self, pid):
+        return self._call(pid, self.PROCESS_QUERY_LIMITED_INFORMATION,
+                          lambda handle: self._check(self._kernel32.GetPriorityClass(handle)))
+
+    def set_priority(self, pid, value):
+        self._call(pid, self.PROCESS_SET_INFORMATION,
+                   lambda handle: self._check(self._kernel32.SetPriorityClass(handle, value)))
+
+    def affinity(self, pid):
+        process_mask, system_mask = ctypes.c_size_t(), ctypes.c_size_t()
+        self._call(pid, self.PROCESS_QUERY_LIMITED_INFORMATION, lambda handle: self._check(
+            self._kernel32.GetProcessAffinityMask(handle, ctypes.byref(process_mask), ctypes.byref(system_mask))))
+        mask = process_mask.value
+        return frozenset(cpu for cpu in range(mask.bit_length()) if mask >> cpu & 1)
+
+    def set_affinity(self, pid, cpus):
+        mask = 0
+        for cpu in cpus:
+            mask |= 1 << cpu
+        self._call(pid, self.PROCESS_SET_INFORMATION, lambda handle: self._check(
+            self._kernel32.SetProcessAffinityMask(handle, ctypes.c_size_t(mask))))
+
+    def throttling(self, pid):
+        # Windows 11 之前不能读取，视为由系统决定
+        state = self._state_type(1, 0, 0)
+
+        def query(handle):
+            return self._kernel32.GetProcessInformation(
+                handle, self.ProcessPowerThrottling, ctypes.byref(state), ctypes.sizeof(state))
+
+        if not self._call(pid, self.PROCESS_QUERY_LIMITED_INFORMATION, query):
+            return None
+        if not state.ControlMask & self.PROCESS_POWER_THROTTLING_EXECUTION_SPEED:
+            return None
+        return "eco" if state.StateMask & self.PROCESS_POWER_THROTTLING_EXECUTION_SPEED else "off"
+
+    def set_throttling(self, pid, mode):
+        flag = self.PROCESS_POWER_THROTTLING_EXECUTION_SPEED
+        state = self._state_type(1, 0 if mode is None else flag, flag if mode == "eco" else 0)
+        self._call(pid, self.PROCESS_SET_INFORMATION, lambda handle: self._check(
+            self._kernel32.SetProcessInformation(
+                handle, self.ProcessPowerThrottling, ctypes.byref(state), ctypes.sizeof(state))))
+        return True
+
+
+class SimulatedProcessController(ProcessController):
+    """内存中的进程属性 {PID: {"priority", "affinity", "throttling"}}；denied 中的 PID 没有权限"""
+
+    def __init__(self, processes=(), cpus=8, denied=()):
+        self.cpus = cpus
+        self.denied = set(denied)
+        self.state = {pid: {"priority": 0, "affinity": frozenset(range(cpus)), "throttling": None}
+                      for pid in processes}
+
+    def _get(self, pid, write=False):
+        if pid not in self.state:
+            raise ProcessLookupError(f"进程 {pid} 不存在")
+        if write and pid in self.denied:
+            raise PermissionError(f"没有权限修改进程 {pid}")
+        return self.state[pid]
+
+    def cpu_count(self):
+        return self.cpus
+
+    def priority_value(self, name):
+        return PosixProcessController.NICE[name]
+
+    def priority(self, pid):
+        return self._get(pid)["priority"]
+
+    def set_priority(self, pid, value):
+        self._get(pid, True)["priority"] = value
+
+    def affinity(self, pid):
+        return self._get(pid)["affinity"]
+
+    def set_affinity(self, pid, cpus):
+        self._get(pid, True)["affinity"] = frozenset(cpus)
+
+    def throttling(self, pid):
+        return self._get(pid)["throttling"]
+
+    def set_throttling(self, pid, mode):
+        self._get(pid, True)["throttling"] = mode
+        return True
+
+
+def create_process_controller():
+    """返回当前平台的进程调整实现"""
+    if sys.platform == "win32":
+        return WindowsProcessController()
+    return PosixProcessController()
+
+
+# ---- 启用与恢复 ----
+
+class ProcessChange:
+    """一个进程被修改前的值（None 表示该项没有修改）"""
+
+    __slots__ = ("pid", "name", "priority", "affinity", "throttling", "throttled")
+
+    def __init__(self, pid, name, priority=None, affinity=None, throttling=None, throttled=False):
+        self.pid = pid
+        self.name = name
+        self.priority = priority
+        self.affinity = affinity
+        self.throttling = throttling
+        self.throttled = throttled
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        if self.affinity is not None:
+            data["affinity"] = sorted(self.affinity)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        affinity = data.get("affinity")
+        return cls(data["pid"], data["name"], data.get("priority"),
+                   frozenset(affinity) if affinity is not None else None,
+                   data.get("throttling"), data.get("throttled", False))
+
+
+class ProfileActivation:
+    """启用的结果: 原来的计划、修改过的进程与失败的进程 [(PID, 名称, 错误)]"""
+
+    __slots__ = ("profile", "previous_scheme", "scheme", "changes", "errors")
+
+    def __init__(self, profile, previous_scheme, scheme=None, changes=(), errors=()):
+        self.profile = profile
+        self.previous_scheme = previous_scheme
+        self.scheme = scheme
+        self.changes = list(changes)
+        self.errors = list(errors)
+
+    def to_dict(self):
+        return {"profile": self.profile, "previous_scheme": self.previous_scheme, "scheme": self.scheme,
+                "changes": [change.to_dict() for change in self.changes],
+                "errors": [{"pid": pid, "name": name, "error": error} for pid, name, error in self.errors]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["profile"], data.get("previous_scheme"), data.get("scheme"),
+                   [ProcessChange.from_dict(item) for item in data.get("changes") or ()],
+                   [(item["pid"], item["name"], item["error"]) for item in data.get("errors") or ()])
+
+
+class ProfileManager:
+    """启用与恢复性能配置
+
+    同一时刻只有一个配置生效，启用另一个配置前先恢复原来的状态。state_path
+    不为 None 时把恢复所需的记录写入该文件，创建时读取上次未恢复的记录。
+    """
+
+    def __init__(self, cache, controller=None, source=None, state_path=None):
+        self.cache = cache
+        self.controller = controller or create_process_controller()
+        self.source = source or create_process_source()
+        self.state_path = state_path
+        self.active = self._load_state()
+
+    def _load_state(self):
+        if not self.state_path:
+            return None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return ProfileActivation.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"无法读取性能配置状态: {e}")
+            return None
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        if self.active is None:
+            try:
+                os.remove(self.state_path)
+            except FileNotFoundError:
+                pass
+            return
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        temp = self.state_path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(self.active.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(temp, self.state_path)
+
+    def matching_processes(self, profile):
+        """正在运行且匹配配置的进程 [(PID, 名称, ProcessTuning)]"""
+        matches = []
+        own = os.getpid()
+        for pid in sorted(self.source.pids()):
+            if pid == own:
+                continue
+            info = self.source.describe(pid)
+            if info is None:
+                continue
+            tuning = profile.match(*info)
+            if tuning is not None:
+                matches.append((pid, info[0], tuning))
+        return matches
+
+    def activate(self, profile):
+        """启用配置，返回 ProfileActivation
+
+        计划切换失败时撤销已做的进程调整并抛出异常；单个进程无法调整（已退出、
+        没有权限）时记录到 errors，继续处理其他进程。
+        """
+        if self.active is not None:
+            self.deactivate()
+        active = self.cache.active_scheme()
+        activation = ProfileActivation(profile.name, active.guid if active else None)
+        controller = self.controller
+        for pid, name, tuning in self.matching_processes(profile):
+            change = ProcessChange(pid, name)
+            try:
+                if tuning.priority is not None:
+                    previous = controller.priority(pid)
+                    controller.set_priority(pid, controller.priority_value(tuning.priority))
+                    change.priority = previous
+                if tuning.affinity is not None:
+                    cpus = frozenset(cpu for cpu in tuning.affinity if cpu < controller.cpu_count())
+                    if not cpus:
+                        raise ValueError(f"本机没有 CPU {format_cpus(tuning.affinity)}")
+                    previous = controller.affinity(pid)
+                    controller.set_affinity(pid, cpus)
+                    change.affinity = previous
+                if tuning.throttling is not None:
+                    previous = controller.throttling(pid)
+                    if controller.set_throttling(pid, tuning.throttling):
+                        change.throttling, change.throttled = previous, True
+            except (OSError, ValueError) as e:
+                activation.errors.append((pid, name, str(e)))
+            if change.priority is not None or change.affinity is not None or change.throttled:
+                activation.changes.append(change)
+        if profile.scheme:
+            try:
+                guid = resolve_plan(self.cache, profile.scheme)
+                switch_plan(self.cache, guid)
+                activation.scheme = guid
+            except Exception:
+                self._restore_processes(activation.changes)
+                raise
+        self.active = activation
+        self._save_state()
+        return activation
+
+    def _restore_processes(self, changes):
+        errors = []
+        controller = self.controller
+        for change in reversed(changes):
+            info = self.source.describe(change.pid)
+            if info is None or info[0] != change.name:
+                # 已退出，或 PID 已被其他进程使用
+                continue
+            try:
+                if change.priority is not None:
+                    controller.set_priority(change.pid, change.priority)
+                if change.affinity is not None:
+                    controller.set_affinity(change.pid, change.affinity)
+                if change.throttled:
+                    controller.set_throttling(change.pid, change.throttling)
+            except (OSError, ValueError) as e:
+                errors.append((change.pid, change.name, str(e)))
+        return errors
+
+    def deactivate(self):
+        """恢复启用前的状态，返回无法恢复的进程 [(PID, 名称, 错误)]；没有生效的配置时返回 None"""
+        activation = self.active
+        if activation is None:
+            return None
+        errors = self._restore_processes(activation.changes)
+        if activation.scheme and activation.previous_scheme:
+            # 用户期间手动换过计划时保持用户的选择
+            active = self.cache.active_scheme()
+            if active is None or active.guid == activation.scheme:
+                switch_plan(self.cache, activation.previous_scheme)
+        self.active = None
+        self._save_state()
+        return errors
+
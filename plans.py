@@ -0,0 +1,78 @@
+"""电源计划的公共逻辑
+
+图形界面与命令行共用，不依赖 Qt。快捷计划使用稳定的 ID（eco、balanced、
+high、ultimate），不受界面语言影响。
+"""
+import re
+
+import power_catalog
+from powercfg_parser import GUID_PATTERN
+
+# 快捷计划: ID -> (GUID, 界面显示名称的翻译源字符串)
+QUICK_PLANS = {
+    "eco": ("a1841308-3541-4fab-bc81-f71556f20b4a", "节能"),
+    "balanced": ("381b4222-f694-41f0-9685-ff5bb260df2e", "平衡"),
+    "high": ("8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c", "高性能"),
+    "ultimate": ("e9a42b02-d5df-448d-aa00-03f14749eb61", "卓越性能"),
+}
+
+_GUID = re.compile(GUID_PATTERN)
+
+
+class PlanError(Exception):
+    """计划不存在或不允许执行的操作"""
+
+
+def plan_guid(plan_id):
+    """返回快捷计划的 GUID，未知 ID 返回 None"""
+    plan = QUICK_PLANS.get(plan_id)
+    return plan[0] if plan else None
+
+
+def is_builtin(guid):
+    """是否为系统内置方案（不允许删除）"""
+    return guid.lower() in power_catalog.BUILTIN_SCHEMES
+
+
+def resolve_plan(cache, name):
+    """把用户输入解析为方案 GUID
+
+    依次尝试: 快捷计划 ID、GUID、别名（如 SCHEME_MIN）、内置方案的英文或中文名称、
+    当前方案列表中的名称（不区分大小写）。找不到时抛出 PlanError。
+    """
+    text = name.strip()
+    key = text.lower()
+    if key in QUICK_PLANS:
+        return QUICK_PLANS[key][0]
+    if _GUID.fullmatch(text):
+        return key
+    for guid, (alias, english) in power_catalog.BUILTIN_SCHEMES.items():
+        if key in (alias.lower(), english.lower()):
+            return guid
+    for guid, chinese in QUICK_PLANS.values():
+        if text == chinese:
+            return guid
+    for scheme in cache.schemes():
+        if scheme.name.lower() == key:
+            return scheme.guid
+    raise PlanError(f"找不到电源计划: {name}")
+
+
+def switch_plan(cache, guid):
+    """激活方案；隐藏的内置方案（如卓越性能）不存在时先复制出来。返回激活后的方案"""
+    cache.ensure(guid)
+    cache.activate(guid)
+    return cache.get(guid)
+
+
+def delete_plan(cache, guid):
+    """删除自定义方案，内置方案与当前激活的方案不能删除"""
+    if is_builtin(guid):
+        raise PlanError("无法删除系统内置电源计划")
+    scheme = cache.get(guid)
+    if scheme is None:
+        raise PlanError(f"找不到电源计划: {guid}")
+    if scheme.active:
+        raise PlanError("无法删除当前激活的电源计划")
+    cache.delete(guid)
+    return scheme
@@ -0,0 +1,57 @@
+"""后台轮询循环
+
+自动切换（governor）与进程规则（process_rules）共用: 子类实现 step()，
+start() 在守护线程中按 interval 秒的间隔反复调用，也可以直接在当前线程中
+调用 run()（命令行前台运行）。
+"""
+import collections
+import threading
+
+
+class PollingLoop:
+    """按固定间隔调用 step() 的循环；stats 记录各项计数"""
+
+    thread_name = "apm-poll"
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stats = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def prepare(self):
+        """run() 开始前调用一次（例如建立采样基准）"""
+
+    def step(self):
+        raise NotImplementedError
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """在后台线程中运行"""
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_background, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run(self):
+        """在当前线程中循环，直到 stop() 被调用"""
+        self.prepare()
+        while not self._stop.wait(self.interval):
+            self.step()
+
+    def _run_background(self):
+        try:
+            self.run()
+        except Exception as e:
+            # 数据源失败（例如 /proc 不可读）时停止，不要在后台反复报错
+            print(f"{self.thread_name} 已停止: {e}")
+            self.stats["errors"] += 1
@@ -0,0 +1,614 @@
+"""电源管理后端
+
+PowerManager 通过 PowerBackend 访问操作系统（powercfg、注册表、权限检查），
+不直接调用 subprocess / winreg / ctypes。每次调用都经过 instrumentation.measure
+计量。WindowsPowerBackend 是真实实现；
+SimulatedPowerBackend 在内存中模拟 powercfg 与注册表，可在 Linux 上配合
+QT_QPA_PLATFORM=offscreen 运行界面和性能测试。
+
+后端可以通过环境变量选择:
+    APM_BACKEND=windows|sim|service
+                              默认在 Windows 上使用真实后端，其它平台使用模拟后端；
+                              service 把操作转发给常驻服务（见 service.py）
+    APM_SIM_LATENCY=0.05      模拟后端每次调用的延迟（秒）
+"""
+import collections
+import ctypes
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from ctypes import wintypes
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+import power_catalog
+from instrumentation import measure
+
+# 注册表值类型（与 winreg 中的常量一致）
+REG_SZ = 1
+REG_DWORD = 4
+
+# 电源相关设置所在的注册表键（HKEY_LOCAL_MACHINE 下）
+POWER_KEY = r"System\CurrentControlSet\Control\Power"
+# 电源方案及当前激活方案所在的注册表键
+POWER_SCHEMES_KEY = POWER_KEY + r"\User\PowerSchemes"
+
+
+class BackendError(Exception):
+    """后端命令执行失败"""
+
+    def __init__(self, message, returncode=1, stderr=""):
+        super().__init__(message)
+        self.returncode = returncode
+        self.stderr = stderr or message
+
+
+class ManualChangeNotifier:
+    """手动触发的方案变更通知，用于模拟后端或测试"""
+
+    def __init__(self):
+        self._callback = None
+
+    def start(self, callback):
+        self._callback = callback
+
+    def stop(self):
+        self._callback = None
+
+    def fire(self):
+        if self._callback:
+            self._callback()
+
+
+class _GUID(ctypes.Structure):
+    _fields_ = [
+        ("Data1", wintypes.DWORD), ("Data2", wintypes.WORD),
+        ("Data3", wintypes.WORD), ("Data4", ctypes.c_ubyte * 8),
+    ]
+
+    @classmethod
+    def from_string(cls, text):
+        return cls.from_buffer_copy(uuid.UUID(text).bytes_le)
+
+
+class RegistryChangeNotifier:
+    """监视电源方案注册表键，键或其子键变化时回调（仅 Windows）
+
+    在后台线程中循环调用 RegNotifyChangeKeyValue，回调也在该线程中执行。
+    """
+
+    REG_NOTIFY_CHANGE_NAME = 0x1
+    REG_NOTIFY_CHANGE_LAST_SET = 0x4
+    KEY_NOTIFY = 0x0010
+    INFINITE = 0xFFFFFFFF
+
+    def __init__(self, key_path=POWER_SCHEMES_KEY):
+        self.key_path = key_path
+        self._callback = None
+        self._thread = None
+        self._kernel32 = ctypes.windll.kernel32
+        self._kernel32.CreateEventW.restype = wintypes.HANDLE
+        self._stop_event = self._kernel32.CreateEventW(None, True, False, None)
+
+    def start(self, callback):
+        self._callback = callback
+        self._thread = threading.Thread(target=self._watch, name="apm-registry-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._kernel32.SetEvent(wintypes.HANDLE(self._stop_event))
+
+    def _watch(self):
+        advapi32 = ctypes.windll.advapi32
+        advapi32.RegNotifyChangeKeyValue.argtypes = (
+            wintypes.HKEY, wintypes.BOOL, wintypes.DWORD, wintypes.HANDLE, wintypes.BOOL
+        )
+        kernel32 = self._kernel32
+        kernel32.WaitForMultipleObjects.argtypes = (
+            wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE), wintypes.BOOL, wintypes.DWORD
+        )
+        try:
+            key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, self.key_path, 0, self.KEY_NOTIFY)
+        except OSError as e:
+            print(f"无法监视电源方案注册表: {e}")
+            return
+
+        changed = kernel32.CreateEventW(None, False, False, None)
+        handles = (wintypes.HANDLE * 2)(changed, self._stop_event)
+        try:
+            while True:
+                ret = advapi32.RegNotifyChangeKeyValue(
+                    key.handle, True, self.REG_NOTIFY_CHANGE_NAME | self.REG_NOTIFY_CHANGE_LAST_SET,
+                    changed, True
+                )
+                if ret != 0:
+                    break
+                # 0 表示注册表发生变化，1 表示收到停止请求
+                if kernel32.WaitForMultipleObjects(2, handles, False, self.INFINITE) != 0:
+                    break
+                if self._callback:
+                    self._callback()
+        finally:
+            kernel32.CloseHandle(wintypes.HANDLE(changed))
+            key.Close()
+
+
+class PowerBackend:
+    """电源后端接口
+
+    方案相关的查询返回与 powercfg 相同格式的文本输出，由调用方负责解析。
+    注册表路径均相对于 HKEY_LOCAL_MACHINE，值不存在时抛出 FileNotFoundError。
+    call_counts 记录每种操作的调用次数，用于核对缓存是否减少了进程启动。
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.call_counts = collections.Counter()
+
+    def create_change_notifier(self):
+        """返回可以报告外部方案变更的通知器，不支持时返回 None"""
+        return None
+
+    # ---- 电源方案 ----
+
+    def list_schemes(self):
+        """返回 powercfg /L 的输出"""
+        raise NotImplementedError
+
+    def get_active_scheme(self):
+        """返回 powercfg /GETACTIVESCHEME 的输出"""
+        raise NotImplementedError
+
+    def query_scheme(self, scheme_guid=None, subgroup_guid=None):
+        """返回 powercfg /Q 的输出"""
+        raise NotImplementedError
+
+    def activate_scheme(self, scheme_guid):
+        """激活电源方案（powercfg -setactive）"""
+        raise NotImplementedError
+
+    def duplicate_scheme(self, scheme_guid, new_guid=None):
+        """复制电源方案（powercfg -duplicatescheme），返回命令输出"""
+        raise NotImplementedError
+
+    def delete_scheme(self, scheme_guid):
+        """删除电源方案（powercfg /d）"""
+        raise NotImplementedError
+
+    def write_setting_values(self, scheme_guid, values):
+        """批量写入设置值
+
+        values 为 (子组 GUID, 设置 GUID, AC 值, DC 值) 的序列，值为 None 时不修改。
+        写入当前激活的方案后立即生效。
+        """
+        raise NotImplementedError
+
+    # ---- 注册表 ----
+
+    def get_registry_value(self, name, key_path=POWER_KEY):
+        raise NotImplementedError
+
+    def set_registry_value(self, name, value, value_type=REG_DWORD, key_path=POWER_KEY):
+        raise NotImplementedError
+
+    def delete_registry_value(self, name, key_path=POWER_KEY):
+        raise NotImplementedError
+
+    def read_registry_values(self, names):
+        """批量读取注册表值
+
+        names 为 (键路径, 值名称) 的序列，返回 {(键路径, 值名称): 值}，不存在的值为 None。
+        """
+        values = {}
+        for key_path, name in names:
+            try:
+                values[(key_path, name)] = self.get_registry_value(name, key_path)
+            except FileNotFoundError:
+                values[(key_path, name)] = None
+        return values
+
+    def close_registry_keys(self):
+        """关闭缓存的注册表键句柄"""
+
+    # ---- 权限 ----
+
+    def is_admin(self):
+        return True
+
+    def request_elevation(self, argv):
+        """以管理员身份重新启动程序，成功发起时返回 True"""
+        return False
+
+
+class WindowsPowerBackend(PowerBackend):
+    """通过 powercfg 与 winreg 操作本机"""
+
+    name = "windows"
+
+    def __init__(self):
+        super().__init__()
+        # 已打开的注册表键 {(小写键路径, 是否可写): 句柄}，避免每次读写都打开、关闭一次
+        self._keys = {}
+        self._keys_lock = threading.Lock()
+
+    def create_change_notifier(self):
+        return RegistryChangeNotifier()
+
+    def _powercfg(self, op, *args):
+        """运行 powercfg 并返回标准输出，op 为调用计数所用的操作名"""
+        self.call_counts[op] += 1
+        with measure(op, " ".join(("powercfg", *args))) as call:
+            result = subprocess.run(
+                ["powercfg", *args], capture_output=True, text=True,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+            )
+            call.exit_code = result.returncode
+            call.output_size = len(result.stdout) + len(result.stderr)
+        if result.returncode != 0:
+            raise BackendError(
+                f"powercfg {' '.join(args)} 失败", result.returncode, result.stderr or result.stdout
+            )
+        return result.stdout
+
+    def list_schemes(self):
+        return self._powercfg("list_schemes", "/L")
+
+    def get_active_scheme(self):
+        return self._powercfg("get_active_scheme", "/GETACTIVESCHEME")
+
+    def query_scheme(self, scheme_guid=None, subgroup_guid=None):
+        args = ["/Q"]
+        if scheme_guid:
+            args.append(scheme_guid)
+            if subgroup_guid:
+                args.append(subgroup_guid)
+        return self._powercfg("query_scheme", *args)
+
+    def activate_scheme(self, scheme_guid):
+        # 直接调用 powrprof，省去启动 powercfg 进程的几十毫秒
+        self.call_counts["activate_scheme"] += 1
+        with measure("activate_scheme", f"PowerSetActiveScheme {scheme_guid}") as call:
+            ret = ctypes.windll.powrprof.PowerSetActiveScheme(None, ctypes.byref(_GUID.from_string(scheme_guid)))
+            call.exit_code = ret
+        if ret != 0:
+            raise BackendError(f"激活电源方案 {scheme_guid} 失败", ret, ctypes.FormatError(ret))
+
+    def duplicate_scheme(self, scheme_guid, new_guid=None):
+        if new_guid:
+            return self._powercfg("duplicate_scheme", "-duplicatescheme", scheme_guid, new_guid)
+        return self._powercfg("duplicate_scheme", "-duplicatescheme", scheme_guid)
+
+    def delete_scheme(self, scheme_guid):
+        self._powercfg("delete_scheme", "/d", scheme_guid)
+
+    def write_setting_values(self, scheme_guid, values):
+        # 直接调用 powrprof，不必为每个值启动一次 powercfg /setacvalueindex
+        self.call_counts["write_setting_values"] += 1
+        with measure("write_setting_values", f"PowerWriteValueIndex {scheme_guid} ({len(values)})"):
+            self._write_setting_values(scheme_guid, values)
+
+    def _write_setting_values(self, scheme_guid, values):
+        powrprof = ctypes.windll.powrprof
+        scheme = _GUID.from_string(scheme_guid)
+        for subgroup_guid, setting_guid, ac, dc in values:
+            subgroup = _GUID.from_string(subgroup_guid)
+            setting = _GUID.from_string(setting_guid)
+            for write, value in ((powrprof.PowerWriteACValueIndex, ac), (powrprof.PowerWriteDCValueIndex, dc)):
+                if value is None:
+                    continue
+                ret = write(None, ctypes.byref(scheme), ctypes.byref(subgroup), ctypes.byref(setting),
+                            wintypes.DWORD(value))
+                if ret != 0:
+                    raise BackendError(f"写入电源设置 {setting_guid} 失败", ret, ctypes.FormatError(ret))
+        try:
+            active = str(self.get_registry_value("ActivePowerScheme", POWER_SCHEMES_KEY)).lower()
+        except OSError:
+            active = ""
+        if active == scheme_guid.lower():
+            # 修改当前方案后需要重新激活才会生效
+            ret = powrprof.PowerSetActiveScheme(None, ctypes.byref(scheme))
+            if ret != 0:
+                raise BackendError("重新激活电源方案失败", ret, ctypes.FormatError(ret))
+
+    def _open_key(self, key_path, write=False):
+        """返回缓存的键句柄；写入时键不存在则创建"""
+        cache_key = (key_path.lower(), write)
+        with self._keys_lock:
+            key = self._keys.get(cache_key)
+            if key is None:
+                if write:
+                    key = winreg.CreateKeyEx(winreg.HKEY_LOCAL_MACHINE, key_path, 0,
+                                             winreg.KEY_READ | winreg.KEY_WRITE)
+                else:
+                    key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_READ)
+                self._keys[cache_key] = key
+            return key
+
+    def close_registry_keys(self):
+        with self._keys_lock:
+            for key in self._keys.values():
+                key.Close()
+            self._keys.clear()
+
+    def get_registry_value(self, name, key_path=POWER_KEY):
+        self.call_counts["get_registry_value"] += 1
+        with measure("get_registry_value", f"HKLM\\{key_path}\\{name}") as call:
+            value, _ = winreg.QueryValueEx(self._open_key(key_path), name)
+            call.output_size = len(str(value))
+        return value
+
+    def read_registry_values(self, names):
+        # 每个键只打开一次，所有值计为一次调用
+        self.call_counts["read_registry_values"] += 1
+        values = {}
+        with measure("read_registry_values", f"HKLM ({len(names)} values)") as call:
+            for key_path, name in names:
+                try:
+                    values[(key_path, name)], _ = winreg.QueryValueEx(self._open_key(key_path), name)
+                except FileNotFoundError:
+                    values[(key_path, name)] = None
+            call.output_size = sum(len(str(value)) for value in values.values() if value is not None)
+        return values
+
+    def set_registry_value(self, name, value, value_type=REG_DWORD, key_path=POWER_KEY):
+        self.call_counts["set_registry_value"] += 1
+        with measure("set_registry_value", f"HKLM\\{key_path}\\{name}"):
+            winreg.SetValueEx(self._open_key(key_path, write=True), name, 0, value_type, value)
+
+    def delete_registry_value(self, name, key_path=POWER_KEY):
+        self.call_counts["delete_registry_value"] += 1
+        with measure("delete_registry_value", f"HKLM\\{key_path}\\{name}"):
+            winreg.DeleteValue(self._open_key(key_path, write=True), name)
+
+    def is_admin(self):
+        return bool(ctypes.windll.shell32.IsUserAnAdmin())
+
+    def request_elevation(self, argv):
+        ret = ctypes.windll.shell32.ShellExecuteW(
+            None, "runas", sys.executable, " ".join(argv), None, None, 1
+        )
+        # ShellExecuteW 返回值大于 32 表示成功
+        return ret > 32
+
+
+class SimulatedPowerBackend(PowerBackend):
+    """在内存中模拟 powercfg 与注册表
+
+    latency 可以是统一的秒数，也可以是 {操作名: 秒数} 的字典，操作名即方法名
+    （如 "list_schemes"、"activate_scheme"）。extra_schemes 指定额外生成的
+    自定义方案数量，便于测试大量方案时的表现。
+    直接修改 schemes / active_guid 等属性可以模拟外部程序的改动，
+    之后调用 notify_external_change() 通知已创建的变更通知器。
+    """
+
+    name = "sim"
+
+    def __init__(self, latency=0.0, extra_schemes=0, registry=None):
+        super().__init__()
+        self.latency = latency
+        self.notifiers = []
+        self._lock = threading.RLock()
+
+        # 方案: GUID -> 名称（保持插入顺序，与 powercfg 一致）
+        self.schemes = {}
+        self.settings = {}
+        for guid, (_, name) in power_catalog.BUILTIN_SCHEMES.items():
+            if guid not in power_catalog.HIDDEN_SCHEMES:
+                self._add_scheme(guid, name, guid)
+        for i in range(extra_schemes):
+            guid = str(uuid.uuid5(uuid.NAMESPACE_OID, f"apm-sim-scheme-{i}"))
+            self._add_scheme(guid, f"Custom Plan {i + 1}", "381b4222-f694-41f0-9685-ff5bb260df2e")
+        # 注册表: (小写键路径, 值名称) -> (值, 类型)
+        self.registry = {}
+        for (key_path, name), value in (registry or {}).items():
+            self.registry[(key_path.lower(), name)] = value
+        self._set_active("381b4222-f694-41f0-9685-ff5bb260df2e")
+
+    def _set_active(self, guid):
+        # 与 Windows 一样，激活方案同时记录在注册表中
+        self.active_guid = guid
+        self.registry[(POWER_SCHEMES_KEY.lower(), "ActivePowerScheme")] = (guid, REG_SZ)
+
+    def _add_scheme(self, guid, name, template):
+        """按模板方案的设置值新建方案"""
+        self.schemes[guid] = name
+        if template in self.settings:
+            values = dict(self.settings[template])
+        else:
+            overrides = power_catalog.SCHEME_OVERRIDES.get(template, {})
+            values = {}
+            for _, _, _, settings in power_catalog.SETTINGS:
+                for setting_guid, _, _, _, ac, dc in settings:
+                    values[setting_guid] = overrides.get(setting_guid, (ac, dc))
+        self.settings[guid] = values
+
+    def create_change_notifier(self):
+        notifier = ManualChangeNotifier()
+        self.notifiers.append(notifier)
+        return notifier
+
+    def notify_external_change(self):
+        for notifier in self.notifiers:
+            notifier.fire()
+
+    def _call(self, op):
+        """记录调用并模拟延迟"""
+        self.call_counts[op] += 1
+        delay = self.latency.get(op, 0.0) if isinstance(self.latency, dict) else self.latency
+        with measure(op, f"sim {op}"):
+            if delay:
+                time.sleep(delay)
+
+    @staticmethod
+    def _invalid_parameter():
+        return BackendError(
+            "Unable to perform operation. An invalid parameter was passed to a function or its result."
+        )
+
+    def _resolve(self, scheme_guid):
+        guid = (scheme_guid or self.active_guid).lower()
+        if guid not in self.schemes:
+            raise self._invalid_parameter()
+        return guid
+
+    def list_schemes(self):
+        self._call("list_schemes")
+        with self._lock:
+            lines = ["", "Existing Power Schemes (* Active)", "-----------------------------------"]
+            for guid, name in self.schemes.items():
+                marker = " *" if guid == self.active_guid else ""
+                lines.append(f"Power Scheme GUID: {guid}  ({name}){marker}")
+        return "\n".join(lines) + "\n"
+
+    def get_active_scheme(self):
+        self._call("get_active_scheme")
+        with self._lock:
+            return f"Power Scheme GUID: {self.active_guid}  ({self.schemes[self.active_guid]})\n"
+
+    def query_scheme(self, scheme_guid=None, subgroup_guid=None):
+        self._call("query_scheme")
+        with self._lock:
+            guid = self._resolve(scheme_guid)
+            values = self.settings[guid]
+            alias = power_catalog.BUILTIN_SCHEMES.get(guid, ("", ""))[0]
+            lines = [f"Power Scheme GUID: {guid}  ({self.schemes[guid]})"]
+            if alias:
+                lines.append(f"  GUID Alias: {alias}")
+            for sub_guid, sub_alias, sub_name, settings in power_catalog.SETTINGS:
+                if subgroup_guid and sub_guid != subgroup_guid.lower():
+                    continue
+                lines.append(f"  Subgroup GUID: {sub_guid}  ({sub_name})")
+                lines.append(f"    GUID Alias: {sub_alias}")
+                for setting_guid, setting_alias, setting_name, possible, _, _ in settings:
+                    ac, dc = values[setting_guid]
+                    lines.append(f"    Power Setting GUID: {setting_guid}  ({setting_name})")
+                    lines.append(f"      GUID Alias: {setting_alias}")
+                    if isinstance(possible, tuple):
+                        minimum, maximum, increment, units = possible
+                        lines.append(f"      Minimum Possible Setting: 0x{minimum:08x}")
+                        lines.append(f"      Maximum Possible Setting: 0x{maximum:08x}")
+                        lines.append(f"      Possible Settings increment: 0x{increment:08x}")
+                        lines.append(f"      Possible Settings units: {units}")
+                    else:
+                        for index, option in enumerate(possible):
+                            lines.append(f"      Possible Setting Index: {index:03d}")
+                            lines.append(f"      Possible Setting Friendly Name: {option}")
+                    lines.append(f"    Current AC Power Setting Index: 0x{ac:08x}")
+                    lines.append(f"    Current DC Power Setting Index: 0x{dc:08x}")
+                    lines.append("")
+        return "\n".join(lines) + "\n"
+
+    def activate_scheme(self, scheme_guid):
+        self._call("activate_scheme")
+        with self._lock:
+            guid = scheme_guid.lower()
+            # 隐藏方案可以直接激活，激活后出现在列表中
+            if guid not in self.schemes and guid in power_catalog.HIDDEN_SCHEMES:
+                self._add_scheme(guid, power_catalog.BUILTIN_SCHEMES[guid][1], guid)
+            self._set_active(self._resolve(guid))
+
+    def duplicate_scheme(self, scheme_guid, new_guid=None):
+        self._call("duplicate_scheme")
+        with self._lock:
+            source = scheme_guid.lower()
+            if source in self.schemes:
+                name = self.schemes[source]
+            elif source in power_catalog.HIDDEN_SCHEMES:
+                name = power_catalog.BUILTIN_SCHEMES[source][1]
+            else:
+                raise self._invalid_parameter()
+            guid = (new_guid or str(uuid.uuid4())).lower()
+            if guid in self.schemes:
+                raise BackendError("Cannot create a file when that file already exists.")
+            self._add_scheme(guid, name, source)
+        return f"Power Scheme GUID: {guid}  ({name})\n"
+
+    def delete_scheme(self, scheme_guid):
+        self._call("delete_scheme")
+        with self._lock:
+            guid = self._resolve(scheme_guid)
+            if guid == self.active_guid:
+                raise self._invalid_parameter()
+            del self.schemes[guid]
+            del self.settings[guid]
+
+    def write_setting_values(self, scheme_guid, values):
+        self._call("write_setting_values")
+        with self._lock:
+            values = list(values)
+            current = self.settings[self._resolve(scheme_guid)]
+            known = {
+                setting[0]: (sub_guid, setting[3])
+                for sub_guid, _, _, settings in power_catalog.SETTINGS for setting in settings
+            }
+            for subgroup_guid, setting_guid, ac, dc in values:
+                setting_guid = setting_guid.lower()
+                if known.get(setting_guid, (None,))[0] != subgroup_guid.lower():
+                    raise self._invalid_parameter()
+                possible = known[setting_guid][1]
+                low, high = possible[:2] if isinstance(possible, tuple) else (0, len(possible) - 1)
+                if any(v is not None and not low <= v <= high for v in (ac, dc)):
+                    raise self._invalid_parameter()
+            for _, setting_guid, ac, dc in values:
+                old_ac, old_dc = current[setting_guid.lower()]
+                current[setting_guid.lower()] = (old_ac if ac is None else ac, old_dc if dc is None else dc)
+
+    def get_registry_value(self, name, key_path=POWER_KEY):
+        self._call("get_registry_value")
+        with self._lock:
+            try:
+                return self.registry[(key_path.lower(), name)][0]
+            except KeyError:
+                raise FileNotFoundError(2, "The system cannot find the file specified") from None
+
+    def set_registry_value(self, name, value, value_type=REG_DWORD, key_path=POWER_KEY):
+        self._call("set_registry_value")
+        with self._lock:
+            self.registry[(key_path.lower(), name)] = (value, value_type)
+
+    def delete_registry_value(self, name, key_path=POWER_KEY):
+        self._call("delete_registry_value")
+        with self._lock:
+            try:
+                del self.registry[(key_path.lower(), name)]
+            except KeyError:
+                raise FileNotFoundError(2, "The system cannot find the file specified") from None
+
+    def read_registry_values(self, names):
+        self._call("read_registry_values")
+        with self._lock:
+            values = {}
+            for key_path, name in names:
+                entry = self.registry.get((key_path.lower(), name))
+                values[(key_path, name)] = entry[0] if entry else None
+            return values
+
+
+def elevate_if_needed(backend, argv):
+    """没有管理员权限时请求提升，已经以管理员身份重新启动时返回 True"""
+    try:
+        if not backend.is_admin():
+            return backend.request_elevation(argv)
+    except Exception:
+        pass
+    return False
+
+
+def create_backend(name=None):
+    """按名称或环境变量创建后端"""
+    name = name or os.environ.get("APM_BACKEND") or ("windows" if sys.platform == "win32" else "sim")
+    if name == "windows":
+        return WindowsPowerBackend()
+    if name == "sim":
+        return SimulatedPowerBackend(latency=float(os.environ.get("APM_SIM_LATENCY", "0") or 0))
+    if name == "service":
+        from service import RemotePowerBackend
+        return RemotePowerBackend()
+    raise ValueError(f"未知的电源后端: {name}")
@@ -0,0 +1,74 @@
+"""Windows 内置电源方案与常用电源设置的静态目录
+
+GUID 与别名取自 powercfg /Q 的输出。模拟后端用它生成与真实 powercfg
+格式一致的输出，其它模块也可以用它把别名解析为 GUID。
+"""
+
+# 内置电源方案: GUID -> (别名, 英文名称)
+BUILTIN_SCHEMES = {
+    "a1841308-3541-4fab-bc81-f71556f20b4a": ("SCHEME_MAX", "Power saver"),
+    "381b4222-f694-41f0-9685-ff5bb260df2e": ("SCHEME_BALANCED", "Balanced"),
+    "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c": ("SCHEME_MIN", "High performance"),
+    "e9a42b02-d5df-448d-aa00-03f14749eb61": ("", "Ultimate Performance"),
+}
+
+# 默认隐藏、需要 -duplicatescheme 才会出现在列表中的方案
+HIDDEN_SCHEMES = ("e9a42b02-d5df-448d-aa00-03f14749eb61",)
+
+# 子组: (GUID, 别名, 英文名称, 设置列表)
+# 设置: (GUID, 别名, 英文名称, 取值范围, 默认 AC 值, 默认 DC 值)
+# 取值范围为 (最小值, 最大值, 步长, 单位) 或可选项名称列表
+SETTINGS = (
+    ("fea3413e-7e05-4911-9a71-700331f1c294", "SUB_NONE", "Settings belonging to no subgroup", (
+        ("0e796bdb-100d-47d6-a2d5-f7d2daa51f51", "CONSOLELOCK", "Require a password on wakeup",
+         ["No", "Yes"], 1, 1),
+    )),
+    ("0012ee47-9041-4b5d-9b77-535fba8b1442", "SUB_DISK", "Hard disk", (
+        ("6738e2c4-e8a5-4a42-b16a-e040e769756e", "DISKIDLE", "Turn off hard disk after",
+         (0, 0xffffffff, 1, "Seconds"), 1200, 600),
+    )),
+    ("238c9fa8-0aad-41ed-83f4-97be242c8f20", "SUB_SLEEP", "Sleep", (
+        ("29f6c1db-86da-48c5-9fdb-f2b67b1f44da", "STANDBYIDLE", "Sleep after",
+         (0, 0xffffffff, 1, "Seconds"), 1800, 900),
+        ("9d7815a6-7ee4-497e-8888-515a05f02364", "HIBERNATEIDLE", "Hibernate after",
+         (0, 0xffffffff, 1, "Seconds"), 0, 10800),
+    )),
+    ("501a4d13-42af-4429-9fd1-a8218c268e20", "SUB_PCIEXPRESS", "PCI Express", (
+        ("ee12f906-d277-404b-b6da-e5fa1a576df5", "ASPM", "Link State Power Management",
+         ["Off", "Moderate power savings", "Maximum power savings"], 1, 2),
+    )),
+    ("54533251-82be-4824-96c1-47b60b740d00", "SUB_PROCESSOR", "Processor power management", (
+        ("893dee8e-2bef-41e0-89c6-b55d0929964c", "PROCTHROTTLEMIN", "Minimum processor state",
+         (0, 100, 1, "%"), 5, 5),
+        ("bc5038f7-23e0-4960-96da-33abaf5935ec", "PROCTHROTTLEMAX", "Maximum processor state",
+         (0, 100, 1, "%"), 100, 100),
+        ("be337238-0d82-4146-a960-4f3749d470c7", "PERFBOOSTMODE", "Processor performance boost mode",
+         ["Disabled", "Enabled", "Aggressive", "Efficient Enabled", "Efficient Aggressive"], 2, 1),
+        ("0cc5b647-c1df-4637-891a-dec35c318583", "CPMINCORES", "Processor performance core parking min cores",
+         (0, 100, 1, "%"), 10, 10),
+    )),
+    ("7516b95f-f776-4464-8c53-06167f40cc99", "SUB_VIDEO", "Display", (
+        ("3c0bc021-c8a8-4e07-a973-6b14cbcb2b7e", "VIDEOIDLE", "Turn off display after",
+         (0, 0xffffffff, 1, "Seconds"), 600, 300),
+    )),
+)
+
+# 各内置方案相对默认值的差异: 方案 GUID -> {设置 GUID: (AC, DC)}
+SCHEME_OVERRIDES = {
+    "a1841308-3541-4fab-bc81-f71556f20b4a": {
+        "bc5038f7-23e0-4960-96da-33abaf5935ec": (100, 70),
+        "ee12f906-d277-404b-b6da-e5fa1a576df5": (2, 2),
+        "be337238-0d82-4146-a960-4f3749d470c7": (0, 0),
+    },
+    "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c": {
+        "893dee8e-2bef-41e0-89c6-b55d0929964c": (100, 5),
+        "ee12f906-d277-404b-b6da-e5fa1a576df5": (0, 1),
+        "0cc5b647-c1df-4637-891a-dec35c318583": (100, 10),
+    },
+    "e9a42b02-d5df-448d-aa00-03f14749eb61": {
+        "893dee8e-2bef-41e0-89c6-b55d0929964c": (100, 100),
+        "ee12f906-d277-404b-b6da-e5fa1a576df5": (0, 0),
+        "0cc5b647-c1df-4637-891a-dec35c318583": (100, 100),
+        "6738e2c4-e8a5-4a42-b16a-e040e769756e": (0, 0),
+    },
+}
@@ -0,0 +1,57 @@
+"""电源方案设置模型
+
+SchemeSettings 保存一个方案的 powercfg /Q 输出，构造时只定位各子组的位置，
+子组中的设置在第一次访问时才解析。设置按子组 GUID、设置 GUID 索引，
+记录类型为 powercfg_parser 中带 __slots__ 的 PowerSubgroup / PowerSetting。
+"""
+from powercfg_parser import index_subgroups, parse_subgroup
+
+
+class SchemeSettings:
+    """一个电源方案的全部设置（按子组延迟解析）"""
+
+    def __init__(self, scheme_guid, text):
+        self.scheme_guid = scheme_guid.lower()
+        self._text = text
+        self._subgroups = {}
+        self._ranges = {}
+        for subgroup, start, end in index_subgroups(text):
+            self._subgroups[subgroup.guid] = subgroup
+            self._ranges[subgroup.guid] = (start, end)
+
+    def subgroups(self):
+        """返回子组列表，未加载的子组 settings 为空"""
+        return list(self._subgroups.values())
+
+    def is_loaded(self, subgroup_guid):
+        return subgroup_guid.lower() not in self._ranges
+
+    def subgroup(self, subgroup_guid):
+        """返回子组并在需要时解析其中的设置，不存在时抛出 KeyError"""
+        guid = subgroup_guid.lower()
+        subgroup = self._subgroups[guid]
+        span = self._ranges.pop(guid, None)
+        if span is not None:
+            subgroup.settings = parse_subgroup(self._text, *span)
+            if not self._ranges:
+                # 全部子组都已解析，原始文本不再需要
+                self._text = ""
+        return subgroup
+
+    def setting(self, subgroup_guid, setting_guid):
+        return self.subgroup(subgroup_guid).settings[setting_guid.lower()]
+
+    def apply(self, values):
+        """把已成功写入的 (子组, 设置, AC 值, DC 值) 同步到模型，None 表示未修改"""
+        for subgroup_guid, setting_guid, ac, dc in values:
+            setting = self.setting(subgroup_guid, setting_guid)
+            if ac is not None:
+                setting.ac_value = ac
+            if dc is not None:
+                setting.dc_value = dc
+
+
+def load_scheme_settings(backend, scheme_guid):
+    """读取方案的 /Q 输出（一次 powercfg 调用）并建立设置模型"""
+    return SchemeSettings(scheme_guid, backend.query_scheme(scheme_guid))
+
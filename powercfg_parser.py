@@ -0,0 +1,205 @@
+"""powercfg 输出解析
+
+powercfg 的标签文字随系统语言变化（"Power Scheme GUID"、"电源方案 GUID"、
+"GUID des Energieschemas" ...），因此这里完全不依赖标签，只根据行内的 GUID、
+十六进制数值、行首缩进和结尾的 "*" 来识别内容。
+
+所有正则在导入时预编译，解析时对整段文本只做一次 finditer 扫描。
+"""
+import re
+
+GUID_PATTERN = r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+
+# powercfg /L 中的方案行: "<标签>: <GUID>  (<名称>) *"
+_LIST_LINE = re.compile(
+    r"^[^\n]*?(?P<guid>" + GUID_PATTERN + r")[ \t]+\((?P<name>[^\n]*)\)[ \t]*(?P<active>\*)?[ \t]*\r?$",
+    re.M,
+)
+
+# powercfg /Q 中的 GUID 行及其后的内容，一次匹配读出:
+#   名称、别名（下一行的值以字母开头时）；若是设置，再读出取值范围与单位或
+#   若干可选项，以及 AC、DC 当前值。
+# 模式以 GUID 的第一个 "-" 开头，正则引擎可以用字面量快速跳过无关文本，
+# GUID 的前 8 位直接按位置截取。
+_QUERY_ENTRY = re.compile(
+    r"-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"(?:[ \t]+\(([^\r\n]*)\))?[ \t]*\r?\n"
+    r"(?:[^\n:]*:[ \t]*(?![0-9a-fA-F]{8}-)([A-Za-z_][^\r\n]*?)[ \t]*\r?\n)?"
+    r"(?:"
+    r"(?:[^\n:]*:[ \t]*0x([0-9a-fA-F]+)[ \t]*\r?\n"
+    r"[^\n:]*:[ \t]*0x([0-9a-fA-F]+)[ \t]*\r?\n"
+    r"[^\n:]*:[ \t]*0x([0-9a-fA-F]+)[ \t]*\r?\n"
+    r"[^\n:]*:[ \t]*([^\r\n]*?)[ \t]*\r?\n"
+    r"|((?:[^\n:]*:[ \t]*\d+[ \t]*\r?\n[^\n:]*:[^\n]*\n)*))"
+    r"[^\n:]*:[ \t]*0x([0-9a-fA-F]+)[ \t]*\r?\n"
+    r"[^\n:]*:[ \t]*0x([0-9a-fA-F]+)"
+    r")?"
+)
+_INDENT = re.compile(r"[ \t]*")
+_OPTION = re.compile(r":[ \t]*(\d+)[ \t]*\r?\n[^\n:]*:[ \t]*([^\r\n]*?)[ \t]*\r?\n")
+
+
+class _Record:
+    """带 __slots__ 的简单记录类型"""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+
+class PowerScheme(_Record):
+    """电源方案；subgroups 只在解析 /Q 输出时填充（子组 GUID -> PowerSubgroup）"""
+
+    __slots__ = ("guid", "name", "active", "alias", "subgroups")
+
+    def __init__(self, guid, name, active=False, alias="", subgroups=None):
+        self.guid = guid
+        self.name = name
+        self.active = active
+        self.alias = alias
+        self.subgroups = subgroups if subgroups is not None else {}
+
+
+class PowerSubgroup(_Record):
+    """设置子组（设置 GUID -> PowerSetting）"""
+
+    __slots__ = ("guid", "name", "alias", "settings")
+
+    def __init__(self, guid, name, alias="", settings=None):
+        self.guid = guid
+        self.name = name
+        self.alias = alias
+        self.settings = settings if settings is not None else {}
+
+
+class PowerSetting(_Record):
+    """单个电源设置
+
+    数值型设置有 minimum / maximum / increment / units；选项型设置的可选项
+    保存在 options（索引 -> 名称）。ac_value / dc_value 为当前交流/直流索引值。
+    """
+
+    __slots__ = ("guid", "name", "alias", "minimum", "maximum", "increment", "units",
+                 "options", "ac_value", "dc_value")
+
+    def __init__(self, guid, name, alias="", minimum=None, maximum=None, increment=None,
+                 units="", options=None, ac_value=None, dc_value=None):
+        self.guid = guid
+        self.name = name
+        self.alias = alias
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increment = increment
+        self.units = units
+        self.options = options if options is not None else {}
+        self.ac_value = ac_value
+        self.dc_value = dc_value
+
+
+def parse_scheme_list(text):
+    """解析 powercfg /L 的输出，返回 PowerScheme 列表"""
+    return [
+        PowerScheme(m.group("guid").lower(), m.group("name"), m.group("active") is not None)
+        for m in _LIST_LINE.finditer(text)
+    ]
+
+
+def parse_active_scheme(text):
+    """解析 powercfg /GETACTIVESCHEME 的输出，返回 PowerScheme 或 None"""
+    m = _LIST_LINE.search(text)
+    if not m:
+        return None
+    return PowerScheme(m.group("guid").lower(), m.group("name"), True)
+
+
+def _make_setting(guid, m):
+    name, alias, minimum, maximum, increment, units, options, ac, dc = m.groups()
+    if minimum is not None:
+        return PowerSetting(guid, name or "", alias or "", int(minimum, 16), int(maximum, 16),
+                            int(increment, 16), units, None, int(ac, 16), int(dc, 16))
+    return PowerSetting(guid, name or "", alias or "", None, None, None, "",
+                        {int(i): option for i, option in _OPTION.findall(options)},
+                        int(ac, 16), int(dc, 16))
+
+
+def parse_query(text):
+    """解析 powercfg /Q 的输出，返回 PowerScheme 列表（含子组与设置）
+
+    带有 AC/DC 当前值的 GUID 行是设置；其余 GUID 行按缩进区分方案（最外层）
+    与子组。每个条目由一次匹配读出，不逐行处理。
+    """
+    schemes = []
+    scheme = subgroup = None
+    scheme_indent = -1
+
+    for m in _QUERY_ENTRY.finditer(text):
+        start = m.start()
+        if start < 8:
+            continue
+        name, alias, minimum, maximum, increment, units, options, ac, dc = m.groups()
+        guid = text[start - 8:start + 28].lower()
+
+        if ac is not None:
+            if subgroup is not None:
+                subgroup.settings[guid] = _make_setting(guid, m)
+            continue
+
+        line_start = text.rfind("\n", 0, start) + 1
+        indent = _INDENT.match(text, line_start).end() - line_start
+        if scheme is None or indent <= scheme_indent:
+            scheme = PowerScheme(guid, name or "", alias=alias or "")
+            schemes.append(scheme)
+            scheme_indent = indent
+            subgroup = None
+        else:
+            subgroup = PowerSubgroup(guid, name or "", alias or "")
+            scheme.subgroups[guid] = subgroup
+
+    return schemes
+
+
+def index_subgroups(text):
+    """只定位 powercfg /Q <方案> 输出中的子组，不解析其中的设置
+
+    返回 [(PowerSubgroup, 开始位置, 结束位置)]，子组的 settings 为空，需要时用
+    parse_subgroup(text, 开始位置, 结束位置) 解析对应片段。子组行的缩进由方案行之后
+    的第一个 GUID 行确定，之后只需查找这一缩进的行，设置行在缩进处即被跳过。
+    """
+    entries = _QUERY_ENTRY.finditer(text)
+    scheme = next(entries, None)
+    first = next(entries, None)
+    if scheme is None or first is None:
+        return []
+    line_start = text.rfind("\n", 0, first.start()) + 1
+    indent = text[line_start:_INDENT.match(text, line_start).end()]
+    header = re.compile(r"\n" + re.escape(indent) + r"[^ \t\r\n][^\n]*?(?=-[0-9a-fA-F]{4}-)")
+
+    # 匹配结束于 GUID 的第一个 "-"，即 _QUERY_ENTRY 的起点
+    starts = [m.end() for m in header.finditer(text, line_start - 1)]
+
+    result = []
+    for i, start in enumerate(starts):
+        m = _QUERY_ENTRY.match(text, start)
+        if m is None or m.group(8) is not None or start < 8:
+            continue
+        end = starts[i + 1] if i + 1 < len(starts) else len(text)
+        name, alias = m.group(1), m.group(2)
+        result.append((PowerSubgroup(text[start - 8:start + 28].lower(), name or "", alias or ""), start, end))
+    return result
+
+
+def parse_subgroup(text, start=0, end=None):
+    """解析 text[start:end] 中的设置，返回 {设置 GUID: PowerSetting}"""
+    settings = {}
+    for m in _QUERY_ENTRY.finditer(text, start, len(text) if end is None else end):
+        if m.group(8) is not None and m.start() >= 8:
+            guid = text[m.start() - 8:m.start() + 28].lower()
+            settings[guid] = _make_setting(guid, m)
+    return settings
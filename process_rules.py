@@ -0,0 +1,344 @@
+"""按进程切换电源计划
+
+规则把进程名称或路径（支持 * ? 通配符，不区分大小写）映射到电源计划，例如
+“blender* 运行时使用卓越性能”。多个规则同时命中时使用优先级最高的规则
+（相同优先级取列表中靠前的）；所有命中的进程都退出后恢复规则生效前的计划。
+
+ProcessWatcher 每次只比较 PID 集合，仅对新出现的 PID 读取名称和路径，
+已退出的 PID 直接从表中移除。目标计划变化后需保持 settle 秒不变才真正切换，
+短时间内反复启动、退出的进程不会引起连续的 powercfg 调用。
+
+进程来源只需提供 pids() 与 describe(pid):
+
+    WindowsProcessSource   EnumProcesses / QueryFullProcessImageNameW
+    ProcProcessSource      /proc（Linux）
+    StaticProcessSource    内存中的进程表，用于测试和模拟
+"""
+import collections
+import ctypes
+import fnmatch
+import os
+import re
+import sys
+import time
+
+from plans import PlanError, plan_guid, switch_plan
+from polling import PollingLoop
+from power_backend import BackendError
+
+
+class ProcessPattern:
+    """进程名称或路径的通配符；含路径分隔符时匹配完整路径，否则匹配文件名（可省略扩展名）"""
+
+    __slots__ = ("pattern", "by_path", "_regex")
+
+    def __init__(self, pattern):
+        self.pattern = pattern.strip()
+        if not self.pattern:
+            raise ValueError("进程规则不能为空")
+        self.by_path = "/" in self.pattern or "\\" in self.pattern
+        self._regex = re.compile(fnmatch.translate(self.pattern.lower()))
+
+    def matches(self, name, path):
+        if self.by_path:
+            return path is not None and self._regex.match(path.lower()) is not None
+        name = name.lower()
+        return self._regex.match(name) is not None or self._regex.match(os.path.splitext(name)[0]) is not None
+
+
+class ProcessRule(ProcessPattern):
+    """进程规则: 匹配的进程运行时切换到 plan"""
+
+    __slots__ = ("plan", "priority")
+
+    def __init__(self, pattern, plan, priority=0):
+        super().__init__(pattern)
+        self.plan = plan
+        self.priority = int(priority)
+
+    def to_dict(self):
+        return {"pattern": self.pattern, "plan": self.plan, "priority": self.priority}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["pattern"], data["plan"], data.get("priority", 0))
+
+    def __repr__(self):
+        return f"ProcessRule({self.pattern!r} -> {self.plan}, priority={self.priority})"
+
+
+# ---- 进程来源 ----
+
+class ProcProcessSource:
+    """Linux /proc"""
+
+    def __init__(self, root="/proc"):
+        self.root = root
+
+    def pids(self):
+        return {int(entry.name) for entry in os.scandir(self.root) if entry.name.isdigit()}
+
+    def describe(self, pid):
+        """返回 (名称, 路径)，进程已退出时返回 None；路径不可读（内核线程、权限不足）时为 None"""
+        base = f"{self.root}/{pid}"
+        try:
+            path = os.readlink(base + "/exe")
+        except OSError:
+            path = None
+        if path:
+            return os.path.basename(path), path
+        try:
+            with open(base + "/comm", "r", encoding="utf-8", errors="replace") as f:
+                return f.read().strip(), None
+        except OSError:
+            return None
+
+
+class WindowsProcessSource:
+    """EnumProcesses 获取 PID，QueryFullProcessImageNameW 获取路径"""
+
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+    def __init__(self):
+        from ctypes import wintypes
+
+        self._wintypes = wintypes
+        self._kernel32 = ctypes.windll.kernel32
+        self._psapi = ctypes.windll.psapi
+        self._kernel32.OpenProcess.restype = wintypes.HANDLE
+        self._buffer = (wintypes.DWORD * 1024)()
+        self._path = ctypes.create_unicode_buffer(1024)
+
+    def pids(self):
+        wintypes = self._wintypes
+        while True:
+            needed = wintypes.DWORD()
+            if not self._psapi.EnumProcesses(self._buffer, ctypes.sizeof(self._buffer), ctypes.byref(needed)):
+                raise ctypes.WinError()
+            if needed.value < ctypes.sizeof(self._buffer):
+                break
+            # 缓冲区已满，可能还有更多进程
+            self._buffer = (wintypes.DWORD * (len(self._buffer) * 2))()
+        count = needed.value // ctypes.sizeof(wintypes.DWORD)
+        return set(self._buffer[:count])
+
+    def describe(self, pid):
+        handle = self._kernel32.OpenProcess(self.PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            # 系统进程或已退出，不再重复查询
+            return None
+        try:
+            size = self._wintypes.DWORD(len(self._path))
+            if not self._kernel32.QueryFullProcessImageNameW(handle, 0, self._path, ctypes.byref(size)):
+                return None
+            path = self._path.value
+            return os.path.basename(path), path
+        finally:
+            self._kernel32.CloseHandle(handle)
+
+
+class StaticProcessSource:
+    """内存中的进程表 {PID: (名称, 路径)}，可以随时修改；describe_calls 记录查询次数"""
+
+    def __init__(self, processes=None):
+        self.processes = dict(processes or {})
+        self.describe_calls = 0
+
+    def pids(self):
+        return set(self.processes)
+
+    def describe(self, pid):
+        self.describe_calls += 1
+        return self.processes.get(pid)
+
+
+def create_process_source():
+    """返回当前平台的进程来源"""
+    if sys.platform == "win32":
+        return WindowsProcessSource()
+    if os.path.isdir("/proc"):
+        return ProcProcessSource()
+    raise OSError("当前平台不支持枚举进程")
+
+
+class ProcessWatcher:
+    """增量跟踪进程列表
+
+    processes 为 {PID: (名称, 路径)}；无法读取信息的 PID 记为 None，同样不会
+    重复查询。poll() 返回 (新出现的 [(PID, (名称, 路径))], 已退出的 PID 集合)。
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.processes = {}
+
+    def poll(self):
+        current = self.source.pids()
+        processes = self.processes
+        exited = processes.keys() - current
+        for pid in exited:
+            del processes[pid]
+        started = []
+        for pid in current - processes.keys():
+            info = self.source.describe(pid)
+            processes[pid] = info
+            if info is not None:
+                started.append((pid, info))
+        return started, exited
+
+
+class RuleDecision:
+    """一次由进程规则引起的切换"""
+
+    __slots__ = ("time", "old", "new", "reason", "rule", "process", "matches", "error")
+
+    def __init__(self, time, old, new, reason, rule, process, matches, error=None):
+        self.time = time
+        self.old = old
+        self.new = new
+        self.reason = reason
+        self.rule = rule
+        self.process = process
+        self.matches = matches
+        self.error = error
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"RuleDecision({self.reason}: {self.old} -> {self.new}, rule={self.rule!r}, process={self.process!r})"
+
+
+class RuleEngine(PollingLoop):
+    """根据正在运行的进程选择电源计划
+
+    step() 轮询一次进程列表并在需要时切换，start() 在后台线程中每 interval
+    秒调用一次。on_decision 在轮询线程中执行。stats 记录轮询、新进程、命中、
+    切换、被合并的目标变化（coalesced）与失败次数。
+    """
+
+    thread_name = "apm-process-rules"
+
+    def __init__(self, cache, rules, source, interval=2.0, settle=3.0, on_decision=None,
+                 clock=time.monotonic, history=100):
+        super().__init__(interval)
+        self.cache = cache
+        # 按优先级从高到低排列，相同优先级保持原顺序
+        self.rules = sorted(rules, key=lambda rule: -rule.priority)
+        self.watcher = ProcessWatcher(source)
+        self.settle = settle
+        self.on_decision = on_decision
+        self.clock = clock
+        self.decisions = collections.deque(maxlen=history)
+        # 命中规则的进程 {PID: 规则} 及每个规则命中的进程数
+        self.matches = {}
+        self.rule_counts = collections.Counter()
+        # 规则切换到的计划（None 表示规则未生效）及规则生效前的计划
+        self.applied = None
+        self.baseline = None
+        self._pending = None
+
+    @staticmethod
+    def plan_guid(plan):
+        return (plan_guid(plan) or plan).lower()
+
+    def _match(self, name, path):
+        for rule in self.rules:
+            if rule.matches(name, path):
+                return rule
+        return None
+
+    def current_rule(self):
+        """当前生效的规则（命中进程的规则中优先级最高的），没有时返回 None"""
+        for rule in self.rules:
+            if self.rule_counts[rule]:
+                return rule
+        return None
+
+    def _process_of(self, rule):
+        for pid, matched in self.matches.items():
+            if matched is rule:
+                info = self.watcher.processes.get(pid)
+                return info[0] if info else str(pid)
+        return None
+
+    def step(self):
+        """轮询一次，发生切换时返回 RuleDecision，否则返回 None"""
+        started, exited = self.watcher.poll()
+        self.stats["polls"] += 1
+        self.stats["started"] += len(started)
+        for pid, (name, path) in started:
+            rule = self._match(name, path)
+            if rule is not None:
+                self.matches[pid] = rule
+                self.rule_counts[rule] += 1
+                self.stats["matched"] += 1
+        for pid in exited:
+            rule = self.matches.pop(pid, None)
+            if rule is not None:
+                self.rule_counts[rule] -= 1
+
+        rule = self.current_rule()
+        target = self.plan_guid(rule.plan) if rule else None
+        if target == self.applied:
+            if self._pending is not None:
+                self.stats["coalesced"] += 1
+                self._pending = None
+            return None
+
+        # 目标需要保持 settle 秒才切换
+        now = self.clock()
+        if self._pending is None or self._pending[0] != target:
+            if self._pending is not None:
+                self.stats["coalesced"] += 1
+            self._pending = (target, now)
+        if now - self._pending[1] < self.settle:
+            return None
+        self._pending = None
+        return self._apply(rule, target)
+
+    def _apply(self, rule, target):
+        previous = self.applied, self.baseline
+        active = self.cache.active_scheme()
+        current = active.guid if active else None
+        if target is None:
+            # 恢复规则生效前的计划；用户期间手动换过计划时保持用户的选择
+            new, reason = self.baseline, "revert"
+            self.baseline = None
+            if new is None or current != self.applied:
+                self.applied = None
+                return None
+        else:
+            new, reason = target, "rule"
+            if self.applied is None:
+                self.baseline = current
+        self.applied = target
+        if new == current:
+            return None
+
+        decision = RuleDecision(time.time(), current, new, reason, rule.pattern if rule else None,
+                                self._process_of(rule) if rule else None, len(self.matches))
+        try:
+            switch_plan(self.cache, new)
+        except (BackendError, PlanError, OSError) as e:
+            # 切换失败时保持原状态，下次轮询（再经过 settle 秒）重试
+            self.applied, self.baseline = previous
+            self.stats["errors"] += 1
+            decision.error = str(e)
+        else:
+            self.stats["switches"] += 1
+        self.decisions.append(decision)
+        if self.on_decision:
+            self.on_decision(decision)
+        return decision
+
+
+def load_rules(data):
+    """从配置中的列表创建规则，忽略无效的条目"""
+    rules = []
+    for item in data or ():
+        try:
+            rules.append(ProcessRule.from_dict(item))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return rules
@@ -0,0 +1,154 @@
+"""电源相关的注册表调整
+
+TWEAKS 声明每一项调整: 键路径（HKEY_LOCAL_MACHINE 下）、值名称、类型、调整后
+的值、安全默认值（None 表示删除该值，即恢复 Windows 的默认行为）和说明。
+
+TweakEngine 通过后端的 read_registry_values 一次读取全部调整项（Windows 后端
+缓存已打开的键句柄），apply() 把一组修改作为一个事务写入: 任何一项失败时按相反
+顺序恢复已写入的值，再抛出 TweakError。注册表本身不参与事务，回滚只针对本次
+写入的值。
+
+模拟后端在内存中保存注册表，可以在 Linux 上运行:
+
+    engine = TweakEngine(SimulatedPowerBackend())
+    engine.apply({"HiberbootEnabled": 0})
+"""
+from power_backend import POWER_KEY, REG_DWORD, BackendError
+
+SESSION_POWER_KEY = r"System\CurrentControlSet\Control\Session Manager\Power"
+POWER_THROTTLING_KEY = POWER_KEY + r"\PowerThrottling"
+
+
+class Tweak:
+    """一项注册表调整"""
+
+    __slots__ = ("name", "key", "value_name", "value_type", "value", "default", "description")
+
+    def __init__(self, key, value_name, value, default=None, description="", value_type=REG_DWORD, name=None):
+        self.name = name or value_name
+        self.key = key
+        self.value_name = value_name
+        self.value_type = value_type
+        self.value = value
+        self.default = default
+        self.description = description
+
+    def __repr__(self):
+        return f"Tweak({self.name}: {self.value!r}, default={self.default!r})"
+
+
+TWEAKS = (
+    Tweak(POWER_KEY, "PlatformAoAcOverride", 0,
+          description="禁用现代待机（S0 低功耗空闲），可能导致睡眠选项消失"),
+    Tweak(POWER_KEY, "CsEnabled", 0,
+          description="关闭连接待机（旧版 Windows 10），重启后生效"),
+    Tweak(SESSION_POWER_KEY, "HiberbootEnabled", 0, default=1,
+          description="关闭快速启动，关机时完全关闭内核"),
+    Tweak(POWER_KEY, "HibernateEnabled", 0, default=1,
+          description="关闭休眠"),
+    Tweak(POWER_THROTTLING_KEY, "PowerThrottlingOff", 1,
+          description="关闭电源限制，后台进程不再被降频"),
+)
+
+
+class TweakState:
+    """一项调整的当前值与目标值（None 表示值不存在）"""
+
+    __slots__ = ("tweak", "current", "desired")
+
+    def __init__(self, tweak, current, desired):
+        self.tweak = tweak
+        self.current = current
+        self.desired = desired
+
+    @property
+    def changed(self):
+        return self.current != self.desired
+
+    @property
+    def applied(self):
+        """当前值是否为调整后的值"""
+        return self.current == self.tweak.value
+
+    def to_dict(self):
+        return {"name": self.tweak.name, "key": self.tweak.key, "current": self.current,
+                "desired": self.desired, "tweak": self.tweak.value, "default": self.tweak.default}
+
+    def __repr__(self):
+        return f"TweakState({self.tweak.name}: {self.current!r} -> {self.desired!r})"
+
+
+class TweakError(Exception):
+    """事务中的写入失败
+
+    error 为引起失败的异常，state 为失败的一项；rollback_errors 记录回滚时
+    无法恢复的项 [(TweakState, 异常)]，为空表示已全部恢复。
+    """
+
+    def __init__(self, message, error, state, rollback_errors=()):
+        super().__init__(message)
+        self.error = error
+        self.state = state
+        self.rollback_errors = list(rollback_errors)
+
+
+class TweakEngine:
+    """读取与应用注册表调整"""
+
+    def __init__(self, backend, tweaks=TWEAKS):
+        self.backend = backend
+        self.tweaks = {tweak.name: tweak for tweak in tweaks}
+        self._names = [(tweak.key, tweak.value_name) for tweak in tweaks]
+
+    def tweak(self, name):
+        try:
+            return self.tweaks[name]
+        except KeyError:
+            raise ValueError(f"未知的注册表调整: {name}") from None
+
+    def read(self):
+        """一次读取所有调整项，返回 {名称: 当前值}"""
+        values = self.backend.read_registry_values(self._names)
+        return {name: values.get((tweak.key, tweak.value_name)) for name, tweak in self.tweaks.items()}
+
+    def states(self, desired=None, current=None):
+        """返回各项的 TweakState；desired 中没有的项目标值等于当前值"""
+        current = self.read() if current is None else current
+        desired = desired or {}
+        for name in desired:
+            self.tweak(name)
+        return [
+            TweakState(tweak, current.get(name), desired.get(name, current.get(name)))
+            for name, tweak in self.tweaks.items()
+        ]
+
+    def apply(self, desired):
+        """把 {名称: 目标值} 作为一个事务写入，返回实际修改的 TweakState 列表"""
+        changes = [state for state in self.states(desired) if state.changed]
+        written = []
+        for state in changes:
+            try:
+                self._write(state.tweak, state.desired)
+            except (BackendError, OSError) as e:
+                rollback_errors = self._rollback(written)
+                raise TweakError(f"写入 {state.tweak.name} 失败: {e}", e, state, rollback_errors) from e
+            written.append(state)
+        return changes
+
+    def _rollback(self, written):
+        errors = []
+        for state in reversed(written):
+            try:
+                self._write(state.tweak, state.current)
+            except (BackendError, OSError) as e:
+                errors.append((state, e))
+        return errors
+
+    def _write(self, tweak, value):
+        if value is None:
+            try:
+                self.backend.delete_registry_value(tweak.value_name, tweak.key)
+            except FileNotFoundError:
+                pass
+        else:
+            self.backend.set_registry_value(tweak.value_name, value, tweak.value_type, tweak.key)
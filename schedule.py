@@ -0,0 +1,498 @@
+"""按时间切换电源计划
+
+时间表由每周的时段组成，例如“工作日 09:00-18:00 使用高性能，每天 01:00-05:00
+批处理时使用高性能，其余时间使用节能”。保存在用户配置的 "schedule" 一节:
+
+    "schedule": {"enabled": true, "default": "eco",
+                 "rules": [{"plan": "high", "days": "mon-fri", "start": "09:00", "end": "18:00"},
+                           {"plan": "high", "days": "*", "start": "01:00", "end": "05:00"}]}
+
+days 的写法与 cron 的星期字段相同: *、mon-fri、sat,sun 或 0-6（0 和 7 为周日）。
+end 不晚于 start 时时段跨过午夜（22:00-06:00），start 与 end 相同表示整天。
+多个时段重叠时使用列表中靠前的，不在任何时段内时使用 default（为空时不切换）。
+
+PlanScheduler 不轮询: TimerQueue 是一个按到期时间排列的堆，后台线程只睡到
+最早的一项到期。每个时段边界在堆中占一项，到期后按当前时间重新计算应使用的
+计划，因此休眠唤醒或时钟被调整后不会补放错过的切换，而是直接切换到当前时刻
+的计划。睡眠期间每隔 max_sleep 秒醒来比较一次墙上时钟与单调时钟，两者走时
+不一致（时钟被调整、系统休眠）时重新排定所有边界。
+
+时钟可以替换，ManualClock 在等待时直接推进时间，用于测试和模拟:
+
+    clock = ManualClock(datetime.datetime(2024, 1, 1, 8, 0))
+    scheduler = PlanScheduler(cache, schedule, clock=clock)
+    scheduler.run(until=clock.time() + 7 * 86400)   # 立即完成一周的切换
+"""
+import collections
+import datetime
+import heapq
+import itertools
+import threading
+import time
+
+from plans import PlanError, resolve_plan, switch_plan
+from power_backend import BackendError
+
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+WEEK = 7 * 86400
+
+
+def parse_days(text):
+    """把星期字段转换为 frozenset（0 为周一），无效时抛出 ValueError"""
+    text = str(text).strip().lower()
+    if text in ("", "*"):
+        return frozenset(range(7))
+
+    def day(name):
+        name = name.strip()
+        if name.isdigit() and int(name) <= 7:
+            # cron 的写法: 0 和 7 为周日
+            return (int(name) - 1) % 7
+        if name[:3] in DAY_NAMES:
+            return DAY_NAMES.index(name[:3])
+        raise ValueError(f"无效的星期: {name}")
+
+    days = set()
+    for part in text.split(","):
+        first, sep, last = part.partition("-")
+        first = day(first)
+        last = day(last) if sep else first
+        while True:
+            days.add(first)
+            if first == last:
+                break
+            first = (first + 1) % 7
+    return frozenset(days)
+
+
+def format_days(days):
+    if len(days) == 7:
+        return "*"
+    return ",".join(DAY_NAMES[day] for day in sorted(days))
+
+
+def parse_time(text):
+    """"HH:MM" 转换为当天的分钟数（允许 24:00），无效时抛出 ValueError"""
+    hours, sep, minutes = str(text).strip().partition(":")
+    try:
+        value = int(hours) * 60 + (int(minutes) if sep else 0)
+    except ValueError:
+        raise ValueError(f"无效的时间: {text}") from None
+    if not 0 <= value <= 24 * 60 or (sep and not 0 <= int(minutes) < 60):
+        raise ValueError(f"无效的时间: {text}")
+    return value
+
+
+def format_time(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class ScheduleRule:
+    """每周的一个时段；start、end 为当天的分钟数"""
+
+    __slots__ = ("plan", "days", "start", "end")
+
+    def __init__(self, plan, days="*", start="00:00", end="00:00"):
+        if not plan:
+            raise ValueError("时间表需要指定计划")
+        self.plan = plan
+        self.days = parse_days(days) if isinstance(days, str) else frozenset(days)
+        self.start = parse_time(start) if isinstance(start, str) else int(start)
+        self.end = parse_time(end) if isinstance(end, str) else int(end)
+        if not self.days:
+            raise ValueError("时间表至少需要一天")
+
+    @property
+    def length(self):
+        """时段长度（分钟）"""
+        length = (self.end - self.start) % (24 * 60)
+        return length or 24 * 60
+
+    def contains(self, minute_of_week):
+        """一周中的第几分钟（周一 00:00 为 0）是否在时段内"""
+        for day in self.days:
+            offset = (minute_of_week - day * 24 * 60 - self.start) % (7 * 24 * 60)
+            if offset < self.length:
+                return True
+        return False
+
+    def edges(self):
+        """时段在一周中的开始与结束时刻（分钟）"""
+        for day in self.days:
+            start = day * 24 * 60 + self.start
+            yield start % (7 * 24 * 60)
+            yield (start + self.length) % (7 * 24 * 60)
+
+    def to_dict(self):
+        return {"plan": self.plan, "days": format_days(self.days),
+                "start": format_time(self.start), "end": format_time(self.end)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["plan"], data.get("days", "*"), data.get("start", "00:00"), data.get("end", "00:00"))
+
+    def __repr__(self):
+        return f"ScheduleRule({format_days(self.days)} {format_time(self.start)}-{format_time(self.end)} -> {self.plan})"
+
+
+def minute_of_week(moment):
+    return moment.weekday() * 24 * 60 + moment.hour * 60 + moment.minute
+
+
+class Schedule:
+    """一组时段与默认计划"""
+
+    def __init__(self, rules, default=None):
+        self.rules = list(rules)
+        self.default = default or None
+
+    def rule_at(self, moment):
+        """moment（本地时间）所在的时段，不在任何时段内时返回 None"""
+        minute = minute_of_week(moment)
+        for rule in self.rules:
+            if rule.contains(minute):
+                return rule
+        return None
+
+    def plan_at(self, moment):
+        rule = self.rule_at(moment)
+        return rule.plan if rule else self.default
+
+    def resolved(self, resolve):
+        """返回计划经 resolve(计划) 转换后的时间表（如把名称解析为 GUID），原时间表不变"""
+        rules = [ScheduleRule(resolve(rule.plan), rule.days, rule.start, rule.end) for rule in self.rules]
+        return Schedule(rules, resolve(self.default) if self.default else None)
+
+    def edges(self):
+        """所有时段边界（一周中的分钟数，去重后排序）"""
+        return sorted({edge for rule in self.rules for edge in rule.edges()})
+
+    @staticmethod
+    def next_edge(edge, moment):
+        """边界在 moment 之后的下一次出现（本地时间）"""
+        moment = moment.replace(microsecond=0)
+        now = moment.weekday() * 86400 + moment.hour * 3600 + moment.minute * 60 + moment.second
+        return moment + datetime.timedelta(seconds=(edge * 60 - now) % WEEK or WEEK)
+
+    def transitions(self, moment, count=5):
+        """moment 之后计划发生变化的时刻，返回 [(本地时间, 计划)]"""
+        result = []
+        current = self.plan_at(moment)
+        edges = self.edges()
+        end = moment + datetime.timedelta(seconds=WEEK)
+        while edges and len(result) < count:
+            moment = min(self.next_edge(edge, moment) for edge in edges)
+            if moment > end and not result:
+                # 一周内计划都不变
+                break
+            plan = self.plan_at(moment)
+            if plan != current:
+                result.append((moment, plan))
+                current = plan
+        return result
+
+    def to_dict(self):
+        return {"default": self.default, "rules": [rule.to_dict() for rule in self.rules]}
+
+
+def load_schedule(data):
+    """从配置中的一节创建时间表，忽略无效的时段"""
+    data = data or {}
+    rules = []
+    for item in data.get("rules") or ():
+        try:
+            rules.append(ScheduleRule.from_dict(item))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return Schedule(rules, data.get("default"))
+
+
+# ---- 时钟与定时器 ----
+
+class SystemClock:
+    """系统时钟: time() 为墙上时间（可能被调整），monotonic() 不受调整影响"""
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def wait(self, event, timeout):
+        return event.wait(timeout)
+
+
+class ManualClock:
+    """手动推进的时钟；wait() 不阻塞，直接把时间推进 timeout 秒"""
+
+    def __init__(self, start=None):
+        start = start or datetime.datetime(2024, 1, 1)
+        self._wall = start.timestamp() if isinstance(start, datetime.datetime) else float(start)
+        self._monotonic = 0.0
+
+    def time(self):
+        return self._wall
+
+    def monotonic(self):
+        return self._monotonic
+
+    def wait(self, event, timeout):
+        if event.is_set():
+            return True
+        self.advance(timeout)
+        return event.is_set()
+
+    def advance(self, seconds):
+        self._wall += seconds
+        self._monotonic += seconds
+
+    def jump(self, seconds):
+        """调整墙上时钟（单调时钟不变），模拟修改系统时间"""
+        self._wall += seconds
+
+    def suspend(self, seconds):
+        """模拟系统休眠: 墙上时钟前进，单调时钟不变（与 Linux 的 CLOCK_MONOTONIC 相同）"""
+        self._wall += seconds
+
+
+class TimerQueue:
+    """按到期时间（墙上时间戳）排列的定时器堆，由一个线程依次执行
+
+    线程只睡到最早的一项到期，最多睡 max_sleep 秒；每次醒来比较墙上时钟与
+    单调时钟经过的时间，相差超过 tolerance 秒时调用 on_clock_change(差值)。
+    回调在定时器线程中执行。
+    """
+
+    def __init__(self, clock=None, max_sleep=300.0, tolerance=2.0, on_clock_change=None):
+        self.clock = clock or SystemClock()
+        self.max_sleep = max_sleep
+        self.tolerance = tolerance
+        self.on_clock_change = on_clock_change
+        self.stats = collections.Counter()
+        self._heap = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return sum(1 for entry in self._heap if entry[2] is not None)
+
+    def call_at(self, when, callback):
+        """在时间戳 when 调用 callback()，返回可以传给 cancel() 的句柄"""
+        entry = [when, next(self._counter), callback]
+        with self._lock:
+            heapq.heappush(self._heap, entry)
+            earliest = self._heap[0] is entry
+        if earliest:
+            # 新的一项比线程正在等待的更早
+            self._wake.set()
+        return entry
+
+    def cancel(self, entry):
+        # 惰性删除: 到达堆顶时丢弃
+        entry[2] = None
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+        self._wake.set()
+
+    def next_due(self):
+        with self._lock:
+            while self._heap and self._heap[0][2] is None:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def run_due(self):
+        """执行所有已到期的项，返回执行的个数"""
+        count = 0
+        while True:
+            with self._lock:
+                if not self._heap or self._heap[0][0] > self.clock.time():
+                    return count
+                _, _, callback = heapq.heappop(self._heap)
+            if callback is not None:
+                count += 1
+                self.stats["fired"] += 1
+                callback()
+
+    def run(self, until=None):
+        """在当前线程中循环，直到 stop() 被调用或墙上时间到达 until"""
+        clock = self.clock
+        while not self._stop.is_set():
+            wall, monotonic = clock.time(), clock.monotonic()
+            self._wake.clear()
+            self.run_due()
+            now = clock.time()
+            if until is not None and now >= until:
+                return
+            due = self.next_due()
+            timeout = self.max_sleep if due is None else min(max(due - now, 0.0), self.max_sleep)
+            if until is not None:
+                timeout = min(timeout, until - now)
+            self.stats["wakeups"] += 1
+            clock.wait(self._wake, timeout)
+            drift = (clock.time() - wall) - (clock.monotonic() - monotonic)
+            if abs(drift) > self.tolerance:
+                self.stats["clock_changes"] += 1
+                if self.on_clock_change:
+                    self.on_clock_change(drift)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, name="apm-timers"):
+        """在后台线程中运行"""
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+# ---- 调度 ----
+
+class ScheduleDecision:
+    """一次由时间表引起的切换"""
+
+    __slots__ = ("time", "old", "new", "reason", "rule", "error")
+
+    def __init__(self, time, old, new, reason, rule, error=None):
+        self.time = time
+        self.old = old
+        self.new = new
+        self.reason = reason
+        self.rule = rule
+        self.error = error
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"ScheduleDecision({self.reason}: {self.old} -> {self.new}, rule={self.rule!r})"
+
+
+class PlanScheduler:
+    """按时间表切换电源计划
+
+    start() 立即切换到当前时刻的计划，之后在每个时段边界重新判断。只有时间表
+    要求的计划发生变化时才切换，用户在时段中途手动换的计划保持到下一次变化。
+    reason 为 startup（启动）、transition（到达边界）、clock_change（时钟被
+    调整或系统从休眠中恢复）或 retry（切换失败 retry_delay 秒后重试）。
+    on_decision 在定时器线程中执行。
+
+    时间表中的计划（快捷计划 ID、名称、别名或 GUID）在创建时按方案缓存解析为
+    GUID，无法解析时抛出 PlanError。
+    """
+
+    thread_name = "apm-schedule"
+
+    def __init__(self, cache, schedule, clock=None, on_decision=None, max_sleep=300.0, history=100,
+                 retry_delay=60.0):
+        self.cache = cache
+        self.schedule = schedule.resolved(lambda plan: resolve_plan(cache, plan))
+        self.timers = TimerQueue(clock, max_sleep, on_clock_change=self._on_clock_change)
+        self.clock = self.timers.clock
+        self.on_decision = on_decision
+        self.retry_delay = retry_delay
+        self.decisions = collections.deque(maxlen=history)
+        self.stats = collections.Counter()
+        # 时间表最近一次要求的计划
+        self.target = None
+        # 各时段边界在定时器堆中的项 {边界: 句柄}，以及切换失败后的重试
+        self._edges = {}
+        self._retry = None
+
+    def now(self):
+        return datetime.datetime.fromtimestamp(self.clock.time())
+
+    def next_transitions(self, count=5):
+        return self.schedule.transitions(self.now(), count)
+
+    def _startup(self):
+        self.reconcile("startup")
+        self._arm()
+
+    def _arm(self):
+        """为每个时段边界排定下一次出现"""
+        for entry in self._edges.values():
+            self.timers.cancel(entry)
+        self._edges.clear()
+        now = self.now()
+        for edge in self.schedule.edges():
+            self._arm_edge(edge, now)
+
+    def _arm_edge(self, edge, now):
+        when = Schedule.next_edge(edge, now)
+
+        def fire():
+            self.reconcile("transition")
+            self._arm_edge(edge, when)
+
+        self._edges[edge] = self.timers.call_at(when.timestamp(), fire)
+
+    def _on_clock_change(self, drift):
+        self.stats["clock_changes"] += 1
+        self._arm()
+        self.reconcile("clock_change")
+
+    def reconcile(self, reason):
+        """按当前时刻的计划切换，发生切换时返回 ScheduleDecision"""
+        rule = self.schedule.rule_at(self.now())
+        target = rule.plan if rule else self.schedule.default
+        if reason != "startup" and target == self.target:
+            return None
+        if self._retry is not None:
+            self.timers.cancel(self._retry)
+            self._retry = None
+        previous, self.target = self.target, target
+        if target is None:
+            return None
+        active = self.cache.active_scheme()
+        current = active.guid if active else None
+        if target == current:
+            return None
+
+        decision = ScheduleDecision(self.clock.time(), current, target, reason, rule.to_dict() if rule else None)
+        try:
+            switch_plan(self.cache, target)
+        except (BackendError, PlanError, OSError) as e:
+            # 不记为已切换，稍后重试（期间到达边界时按新的计划切换）
+            self.target = previous
+            self._retry = self.timers.call_at(self.clock.time() + self.retry_delay,
+                                              lambda: self.reconcile("retry"))
+            self.stats["errors"] += 1
+            decision.error = str(e)
+        else:
+            self.stats["switches"] += 1
+        self.decisions.append(decision)
+        if self.on_decision:
+            self.on_decision(decision)
+        return decision
+
+    def run(self, until=None):
+        """在当前线程中运行，直到 stop() 被调用或到达 until（时间戳）"""
+        self.timers.call_at(self.clock.time(), self._startup)
+        self.timers.run(until)
+
+    def is_running(self):
+        return self.timers.is_running()
+
+    def start(self):
+        """在后台线程中运行（启动时的切换也在后台线程中进行）"""
+        if self.is_running():
+            return
+        self.timers.call_at(self.clock.time(), self._startup)
+        self.timers.start(self.thread_name)
+
+    def stop(self, timeout=None):
+        self.timers.stop(timeout)
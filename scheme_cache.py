@@ -0,0 +1,186 @@
+"""电源方案缓存
+
+缓存最近一次 powercfg /L 的解析结果，本程序自己的操作（激活、复制、删除）
+执行成功后直接更新缓存，不再重新运行 powercfg /L。只有外部改动（由后端的
+变更通知器报告，Windows 上为电源方案注册表键的变更通知）才会使缓存失效，
+下一次读取时重新加载。
+"""
+import collections
+import threading
+import time
+
+from power_backend import POWER_SCHEMES_KEY
+from powercfg_parser import PowerScheme, parse_scheme_list
+
+
+class SchemeCache:
+    """电源方案的内存缓存
+
+    stats 记录读取次数（requests）、命中（hits）、加载（loads）、失效
+    （invalidations）、忽略的自身变更通知（ignored_notifications）以及乐观更新
+    （optimistic_updates）的次数。监听器在缓存内容变化或失效时被调用，
+    调用线程不固定。
+    """
+
+    # 自身修改完成后的这段时间内收到的变更通知视为由自身引起（秒）
+    SELF_CHANGE_WINDOW = 1.0
+
+    def __init__(self, backend, notifier=None, watch=True):
+        self.backend = backend
+        self.stats = collections.Counter()
+        self._lock = threading.RLock()
+        self._schemes = None
+        self._listeners = []
+        self._own_operations = 0
+        self._last_own_change = 0.0
+
+        # 短时间运行的调用方（如命令行）不需要监视外部改动
+        self.notifier = notifier or (backend.create_change_notifier() if watch else None)
+        if self.notifier:
+            self.notifier.start(self._on_external_change)
+
+    def close(self):
+        if self.notifier:
+            self.notifier.stop()
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in list(self._listeners):
+            callback()
+
+    # ---- 读取 ----
+
+    def schemes(self):
+        """返回方案列表，缓存有效时不访问后端"""
+        with self._lock:
+            self.stats["requests"] += 1
+            if self._schemes is None:
+                self._load()
+            else:
+                self.stats["hits"] += 1
+            return list(self._schemes.values())
+
+    def get(self, guid):
+        """返回指定 GUID 的方案，不存在时返回 None"""
+        with self._lock:
+            if self._schemes is None:
+                self.schemes()
+            return self._schemes.get(guid.lower())
+
+    def __contains__(self, guid):
+        return self.get(guid) is not None
+
+    def active_scheme(self):
+        for scheme in self.schemes():
+            if scheme.active:
+                return scheme
+        return None
+
+    def reload(self):
+        """强制重新加载"""
+        with self._lock:
+            self._load()
+        self._notify()
+        return self.schemes()
+
+    def _load(self):
+        self.stats["loads"] += 1
+        schemes = parse_scheme_list(self.backend.list_schemes())
+        self._schemes = collections.OrderedDict((s.guid, s) for s in schemes)
+
+    # ---- 失效 ----
+
+    def invalidate(self):
+        with self._lock:
+            self.stats["invalidations"] += 1
+            self._schemes = None
+        self._notify()
+
+    def _on_external_change(self):
+        # 自己的修改同样会触发注册表通知，这些通知不需要重新加载；修改刚完成时
+        # 再读一次注册表中的激活方案（不启动进程）确认没有被外部程序改掉
+        with self._lock:
+            busy = self._own_operations > 0
+            recent = time.monotonic() - self._last_own_change < self.SELF_CHANGE_WINDOW
+        if busy or (recent and not self._active_changed_externally()):
+            with self._lock:
+                self.stats["ignored_notifications"] += 1
+            return
+        self.invalidate()
+
+    def _active_changed_externally(self):
+        try:
+            active = str(self.backend.get_registry_value("ActivePowerScheme", POWER_SCHEMES_KEY)).lower()
+        except (OSError, NotImplementedError):
+            return False
+        with self._lock:
+            if self._schemes is None:
+                return False
+            cached = next((guid for guid, s in self._schemes.items() if s.active), None)
+        return active != cached
+
+    # ---- 修改（成功后乐观更新缓存）----
+
+    def _mutate(self, operation, update, notify=True):
+        with self._lock:
+            self._own_operations += 1
+        try:
+            result = operation()
+        finally:
+            with self._lock:
+                self._own_operations -= 1
+                self._last_own_change = time.monotonic()
+        with self._lock:
+            if self._schemes is not None:
+                self.stats["optimistic_updates"] += 1
+                update(result)
+        if notify:
+            self._notify()
+        return result
+
+    def activate(self, guid):
+        """激活方案"""
+        guid = guid.lower()
+
+        def update(_):
+            if guid not in self._schemes:
+                # 激活了列表中没有的方案（例如隐藏方案），无法推断名称，重新加载
+                self._schemes = None
+                return
+            for key, scheme in self._schemes.items():
+                if scheme.active != (key == guid):
+                    self._schemes[key] = PowerScheme(scheme.guid, scheme.name, key == guid, scheme.alias)
+
+        self._mutate(lambda: self.backend.activate_scheme(guid), update)
+
+    def duplicate(self, guid, new_guid=None):
+        """复制方案，返回新方案（无法解析输出时返回 None）"""
+
+        def update(output):
+            created = parse_scheme_list(output)
+            if created:
+                self._schemes[created[0].guid] = created[0]
+            else:
+                self._schemes = None
+
+        output = self._mutate(lambda: self.backend.duplicate_scheme(guid, new_guid), update)
+        created = parse_scheme_list(output)
+        return created[0] if created else None
+
+    def delete(self, guid):
+        """删除方案"""
+        guid = guid.lower()
+        self._mutate(lambda: self.backend.delete_scheme(guid), lambda _: self._schemes.pop(guid, None))
+
+    def ensure(self, guid):
+        """方案不存在时（如隐藏的卓越性能方案）以相同 GUID 复制出来"""
+        if guid not in self:
+            self.duplicate(guid, guid)
+
+    def write_settings(self, guid, values):
+        """批量写入方案的设置值（方案列表不变，只标记为自身修改，不通知监听器）"""
+        values = list(values)
+        self._mutate(lambda: self.backend.write_setting_values(guid, values), lambda _: None, notify=False)
+        return values
@@ -0,0 +1,161 @@
+"""电源方案列表模型
+
+SchemeListModel 以 GUID 为键保存方案，update() 只把两次刷新之间的差异（删除、
+插入、移动、名称或激活状态变化）通知给视图，视图的选择和滚动位置保持不变，
+未变化的行不会重绘。各行的数据通过角色读取，不需要从显示文本中解析 GUID:
+
+    GuidRole      方案 GUID
+    NameRole      方案名称
+    ActiveRole    是否为当前激活的方案
+    BuiltinRole   是否为系统内置方案
+    SearchRole    筛选用的文本（名称与 GUID）
+
+SchemeFilterProxy 在模型之上按名称或 GUID 筛选（不区分大小写），并可按名称
+排序；不排序时保持 powercfg 列出的顺序。
+"""
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, QSortFilterProxyModel, Qt
+from PyQt6.QtGui import QFont
+
+from plans import is_builtin
+
+GuidRole = Qt.ItemDataRole.UserRole
+NameRole = Qt.ItemDataRole.UserRole + 1
+ActiveRole = Qt.ItemDataRole.UserRole + 2
+BuiltinRole = Qt.ItemDataRole.UserRole + 3
+SearchRole = Qt.ItemDataRole.UserRole + 4
+
+
+class SchemeListModel(QAbstractListModel):
+    """按 GUID 增量更新的方案列表；tr 用于翻译“激活”标记"""
+
+    def __init__(self, tr=None, parent=None):
+        super().__init__(parent)
+        self.tr = tr or (lambda text: text)
+        self._schemes = []
+        self._rows = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._schemes)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._schemes):
+            return None
+        scheme = self._schemes[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if scheme.active:
+                return f"[{self.tr('激活')}] {scheme.name} ({scheme.guid})"
+            return f"{scheme.name} ({scheme.guid})"
+        if role == GuidRole:
+            return scheme.guid
+        if role == NameRole:
+            return scheme.name
+        if role == ActiveRole:
+            return scheme.active
+        if role == BuiltinRole:
+            return is_builtin(scheme.guid)
+        if role == SearchRole:
+            return f"{scheme.name} {scheme.guid}"
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return scheme.guid
+        if role == Qt.ItemDataRole.FontRole and scheme.active:
+            font = QFont()
+            font.setBold(True)
+            return font
+        return None
+
+    def scheme(self, row):
+        return self._schemes[row]
+
+    def schemes(self):
+        return list(self._schemes)
+
+    def row_of(self, guid):
+        """GUID 所在的行，不存在时返回 -1"""
+        return self._rows.get(guid, -1)
+
+    def index_of(self, guid):
+        row = self.row_of(guid)
+        return self.index(row) if row >= 0 else QModelIndex()
+
+    def _reindex(self, start=0):
+        for row in range(start, len(self._schemes)):
+            self._rows[self._schemes[row].guid] = row
+
+    def update(self, schemes):
+        """与上次的列表比较，只通知变化的部分；返回 (插入, 删除, 修改) 的行数"""
+        schemes = list(schemes)
+        wanted = {scheme.guid for scheme in schemes}
+        removed = inserted = changed = 0
+
+        # 删除: 从后往前，连续的行合并为一次通知
+        row = len(self._schemes) - 1
+        while row >= 0:
+            if self._schemes[row].guid in wanted:
+                row -= 1
+                continue
+            last = row
+            while row > 0 and self._schemes[row - 1].guid not in wanted:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row, last)
+            for scheme in self._schemes[row:last + 1]:
+                del self._rows[scheme.guid]
+            del self._schemes[row:last + 1]
+            self.endRemoveRows()
+            removed += last - row + 1
+            row -= 1
+        if removed:
+            self._reindex()
+
+        # 按新的顺序逐行比较: 相同则检查内容，已有但位置不同则移动，没有则插入
+        row = 0
+        while row < len(schemes):
+            scheme = schemes[row]
+            if row < len(self._schemes) and self._schemes[row].guid == scheme.guid:
+                if self._schemes[row] != scheme:
+                    self._schemes[row] = scheme
+                    index = self.index(row)
+                    self.dataChanged.emit(index, index)
+                    changed += 1
+                row += 1
+                continue
+            source = self._rows.get(scheme.guid)
+            if source is not None:
+                self.beginMoveRows(QModelIndex(), source, source, QModelIndex(), row)
+                self._schemes.insert(row, self._schemes.pop(source))
+                self.endMoveRows()
+                self._reindex(row)
+                continue
+            # 连续的新方案合并为一次插入
+            end = row
+            while end + 1 < len(schemes) and schemes[end + 1].guid not in self._rows:
+                end += 1
+            self.beginInsertRows(QModelIndex(), row, end)
+            self._schemes[row:row] = schemes[row:end + 1]
+            self._reindex(row)
+            self.endInsertRows()
+            inserted += end - row + 1
+            row = end + 1
+        return inserted, removed, changed
+
+    def relabel(self, _=None):
+        """语言切换后重新显示“激活”标记"""
+        for row, scheme in enumerate(self._schemes):
+            if scheme.active:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
+
+
+class SchemeFilterProxy(QSortFilterProxyModel):
+    """按名称或 GUID 筛选方案，可选按名称排序"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFilterRole(SearchRole)
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.setSortRole(NameRole)
+        self.setSortCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.setSortLocaleAware(True)
+
+    def set_sorted(self, enabled):
+        # 列号 -1 恢复源模型的顺序
+        self.sort(0 if enabled else -1)
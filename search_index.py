@@ -0,0 +1,308 @@
+"""方案、设置与别名的搜索索引
+
+SearchIndex 在内存中为电源方案、设置子组和设置建立倒排索引，可以按名称、
+GUID、powercfg 别名（如 PROCTHROTTLEMAX）搜索。名称同时按 locales/*.json 中
+所有语言的译文建立索引，界面语言或系统语言不同时也能找到同一个条目。
+
+    index = build_index()
+    index.update_schemes(cache.schemes())
+    index.search("proc max")        # 每个词按前缀匹配，所有词都需要命中
+    index.search("procesor")        # 没有前缀命中时按编辑距离模糊匹配
+
+文本先转为小写并去掉重音符号再分词；中文没有空格，按每个位置开始的后缀
+建立索引，因此可以搜索名称中间的一段。词表保持有序，前缀查找为二分查找；
+模糊匹配先用三字母组筛选候选词，再计算前缀编辑距离。
+
+方案列表变化时 update_schemes() 只更新变化的方案；设置在读取 /Q 输出后用
+add_subgroups() 加入，同一设置在不同语言下的名称都会保留。
+"""
+import bisect
+import collections
+import re
+import unicodedata
+
+import power_catalog
+from i18n import default_catalogs
+from plans import QUICK_PLANS
+
+KINDS = ("scheme", "subgroup", "setting")
+
+_WORD = re.compile(r"[^\W_]+")
+_ALIAS = re.compile(r"\w+_\w+")
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+
+def normalize(text):
+    """小写并去掉重音符号（é -> e）"""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    """索引用的词: 单词、带下划线的完整别名，以及中日韩文本的所有后缀"""
+    text = normalize(text)
+    tokens = set(_WORD.findall(text))
+    tokens.update(_ALIAS.findall(text))
+    for word in list(tokens):
+        if _CJK.search(word):
+            tokens.update(word[i:] for i in range(1, len(word)))
+    return tokens
+
+
+def _grams(token):
+    # 只在开头补位，三字母组同时反映前缀
+    padded = "$$" + token
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _max_distance(token):
+    return 0 if len(token) < 3 else 1 if len(token) < 6 else 2
+
+
+def prefix_distance(query, token, limit):
+    """query 与 token 任意前缀之间的最小编辑距离，超过 limit 时返回 limit + 1"""
+    previous = list(range(len(token) + 1))
+    for i, char in enumerate(query, 1):
+        current = [i]
+        for j, other in enumerate(token, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous)
+
+
+class SearchEntry:
+    """一个可搜索的条目；parent 为设置所在子组的 GUID"""
+
+    __slots__ = ("kind", "guid", "name", "alias", "parent", "terms", "tokens")
+
+    def __init__(self, kind, guid, name, alias="", parent=None, terms=()):
+        self.kind = kind
+        self.guid = guid
+        self.name = name
+        self.alias = alias
+        self.parent = parent
+        self.terms = frozenset(t for t in (name, alias, guid, *terms) if t)
+        self.tokens = frozenset().union(*(tokenize(t) for t in self.terms))
+
+    @property
+    def key(self):
+        return self.kind, self.guid
+
+    def to_dict(self):
+        data = {"kind": self.kind, "guid": self.guid, "name": self.name, "alias": self.alias}
+        if self.parent:
+            data["parent"] = self.parent
+        return data
+
+    def __repr__(self):
+        return f"SearchEntry({self.kind}, {self.name!r}, {self.guid})"
+
+
+class SearchIndex:
+    """方案、子组与设置的倒排索引
+
+    stats 记录查询次数（queries）、使用模糊匹配的查询（fuzzy）以及条目的
+    增加（added）、替换（replaced）和删除（removed）次数。
+    """
+
+    # 得分相同时方案排在子组、设置之前
+    KIND_ORDER = {kind: i for i, kind in enumerate(KINDS)}
+
+    def __init__(self, catalogs=None):
+        self.catalogs = catalogs or default_catalogs()
+        self.stats = collections.Counter()
+        self._entries = {}
+        self._postings = {}
+        self._tokens = []
+        self._grams = collections.defaultdict(set)
+        # 内置方案的固定搜索词，方案不在列表中（如隐藏的卓越性能）时也能找到
+        self._builtin = {}
+        self._schemes = set()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, kind, guid):
+        return self._entries.get((kind, guid.lower()))
+
+    def localized(self, text):
+        """text 在所有语言中的名称（不在翻译表中时只有其本身）"""
+        return self.catalogs.variants(text) or (text,)
+
+    # ---- 维护 ----
+
+    def _link(self, key, tokens):
+        for token in tokens:
+            keys = self._postings.get(token)
+            if keys is None:
+                keys = self._postings[token] = set()
+                bisect.insort(self._tokens, token)
+                for gram in _grams(token):
+                    self._grams[gram].add(token)
+            keys.add(key)
+
+    def _unlink(self, key, tokens):
+        for token in tokens:
+            keys = self._postings[token]
+            keys.discard(key)
+            if keys:
+                continue
+            del self._postings[token]
+            del self._tokens[bisect.bisect_left(self._tokens, token)]
+            for gram in _grams(token):
+                self._grams[gram].discard(token)
+                if not self._grams[gram]:
+                    del self._grams[gram]
+
+    def _put(self, entry):
+        old = self._entries.get(entry.key)
+        if old is not None:
+            self._unlink(old.key, old.tokens - entry.tokens)
+            self._link(entry.key, entry.tokens - old.tokens)
+            self.stats["replaced"] += 1
+        else:
+            self._link(entry.key, entry.tokens)
+            self.stats["added"] += 1
+        self._entries[entry.key] = entry
+
+    def add(self, kind, guid, name, alias="", parent=None, terms=()):
+        """加入条目；已存在时保留原有的搜索词（如其他语言的名称），返回条目"""
+        guid = guid.lower()
+        old = self._entries.get((kind, guid))
+        terms = set(terms)
+        for text in (name, alias):
+            if text:
+                terms.update(self.localized(text))
+        if old is not None:
+            if terms <= old.terms and name == old.name and (not alias or alias == old.alias):
+                return old
+            terms |= old.terms
+            alias = alias or old.alias
+            parent = parent or old.parent
+        entry = SearchEntry(kind, guid, name or (old.name if old else "") or alias or guid, alias, parent, terms)
+        self._put(entry)
+        return entry
+
+    def remove(self, kind, guid):
+        entry = self._entries.pop((kind, guid.lower()), None)
+        if entry is not None:
+            self._unlink(entry.key, entry.tokens)
+            self.stats["removed"] += 1
+        return entry
+
+    def add_builtin_scheme(self, guid, alias, name, terms=()):
+        """内置方案: 方案被删除或隐藏时仍保留这些搜索词"""
+        terms = set(terms)
+        for text in (name, *terms):
+            terms.update(self.localized(text))
+        self._builtin[guid] = (alias, name, terms)
+        if guid not in self._schemes:
+            self._put(SearchEntry("scheme", guid, name, alias, terms=terms))
+
+    def update_schemes(self, schemes):
+        """与上次的方案列表比较，只更新增加、删除或改名的方案；返回 (增加, 删除, 修改) 的数量"""
+        added = removed = changed = 0
+        current = {}
+        for scheme in schemes:
+            current[scheme.guid] = scheme
+        for guid in self._schemes - current.keys():
+            builtin = self._builtin.get(guid)
+            if builtin is not None:
+                alias, name, terms = builtin
+                self._put(SearchEntry("scheme", guid, name, alias, terms=terms))
+            else:
+                self.remove("scheme", guid)
+            removed += 1
+        for guid, scheme in current.items():
+            entry = self._entries.get(("scheme", guid))
+            if guid in self._schemes and entry is not None and entry.name == scheme.name:
+                continue
+            alias, _, terms = self._builtin.get(guid, (scheme.alias, None, ()))
+            terms = set(terms).union(self.localized(scheme.name))
+            self._put(SearchEntry("scheme", guid, scheme.name, alias, terms=terms))
+            if guid in self._schemes:
+                changed += 1
+            else:
+                added += 1
+        self._schemes = set(current)
+        return added, removed, changed
+
+    def add_subgroups(self, subgroups):
+        """加入子组及其中的设置（powercfg_parser.PowerSubgroup）"""
+        for subgroup in subgroups:
+            self.add("subgroup", subgroup.guid, subgroup.name, subgroup.alias)
+            for setting in subgroup.settings.values():
+                self.add("setting", setting.guid, setting.name, setting.alias, subgroup.guid)
+
+    # ---- 查询 ----
+
+    def _prefix(self, token):
+        start = bisect.bisect_left(self._tokens, token)
+        end = bisect.bisect_left(self._tokens, token + "\uffff", start)
+        return self._tokens[start:end]
+
+    def _fuzzy(self, token):
+        limit = _max_distance(token)
+        if not limit:
+            return []
+        grams = _grams(token)
+        counts = collections.Counter()
+        for gram in grams:
+            counts.update(self._grams.get(gram, ()))
+        # 每处编辑最多影响三个三字母组
+        needed = len(grams) - 3 * limit
+        return [candidate for candidate, count in counts.items()
+                if count >= needed and prefix_distance(token, candidate, limit) <= limit]
+
+    def search(self, query, limit=20, kinds=None):
+        """返回匹配的条目，按匹配程度排序
+
+        每个词的得分: 完全相同 3，前缀 2，模糊 1；条目需要命中所有词。
+        """
+        words = _WORD.findall(normalize(query))
+        if not words:
+            return []
+        self.stats["queries"] += 1
+        scores = None
+        for word in words:
+            matches = {}
+            tokens = self._prefix(word)
+            if not tokens:
+                tokens = self._fuzzy(word)
+                if tokens:
+                    self.stats["fuzzy"] += 1
+                weight = 1
+            else:
+                weight = 2
+            for token in tokens:
+                score = 3 if token == word else weight
+                for key in self._postings[token]:
+                    if matches.get(key, 0) < score:
+                        matches[key] = score
+            if scores is None:
+                scores = matches
+            else:
+                scores = {key: score + matches[key] for key, score in scores.items() if key in matches}
+            if not scores:
+                return []
+        entries = [self._entries[key] for key in scores if kinds is None or key[0] in kinds]
+        entries.sort(key=lambda e: (-scores[e.key], self.KIND_ORDER[e.kind], len(e.name), e.name))
+        return entries[:limit] if limit else entries
+
+
+def build_index(catalogs=None):
+    """包含内置方案与 power_catalog 中常用设置的索引"""
+    index = SearchIndex(catalogs)
+    names = {guid: (plan_id, name) for plan_id, (guid, name) in QUICK_PLANS.items()}
+    for guid, (alias, english) in power_catalog.BUILTIN_SCHEMES.items():
+        index.add_builtin_scheme(guid, alias, english, names.get(guid, ()))
+    for subgroup_guid, alias, name, settings in power_catalog.SETTINGS:
+        index.add("subgroup", subgroup_guid, name, alias)
+        for guid, setting_alias, setting_name, *_ in settings:
+            index.add("setting", guid, setting_name, setting_alias, subgroup_guid)
+    return index
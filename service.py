@@ -0,0 +1,482 @@
+"""常驻电源服务
+
+服务进程持有方案缓存与后端，在本机的命名管道（Windows）或 Unix 域套接字上
+接受 JSON-RPC 2.0 请求，其他程序切换计划时不必每次启动 main.py 或 powercfg:
+
+    python main.py service                      # 前台运行，Ctrl+C 停止
+    python main.py --backend service set high   # 命令行作为客户端
+    python main.py --attach                     # 图形界面连接到服务，不自己调用系统
+
+方法:
+    list                     方案列表
+    get                      当前激活的方案
+    set {"plan": ...}        切换计划（快捷 ID、GUID、别名或名称），已激活时不调用后端
+    subscribe                此后在同一连接上推送 {"method": "changed", "params": {...}}
+    stats                    请求计数与缓存统计
+    backend {"op", "args"}   后端操作（供 RemotePowerBackend 使用）
+
+所有请求由同一把锁串行执行。消息通过 multiprocessing.connection 按长度分帧，
+内容为 UTF-8 JSON（不使用 pickle）。地址默认为 \\\\.\\pipe\\apm-service 或配置
+目录下的 apm-service.sock，可以用环境变量 APM_SERVICE_ADDRESS 修改。
+"""
+import collections
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+from multiprocessing.connection import Client, Listener
+
+from app_config import config_dir
+from instrumentation import measure
+from plans import PlanError, resolve_plan, switch_plan
+from power_backend import POWER_KEY, REG_DWORD, BackendError, PowerBackend
+from scheme_cache import SchemeCache
+
+# JSON-RPC 错误码
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+APPLICATION_ERROR = -32000
+
+# 可以通过服务调用的后端操作
+BACKEND_OPS = (
+    "list_schemes", "get_active_scheme", "query_scheme", "activate_scheme", "duplicate_scheme",
+    "delete_scheme", "write_setting_values", "get_registry_value", "set_registry_value",
+    "delete_registry_value", "read_registry_values", "is_admin",
+)
+
+
+class ServiceError(ConnectionError):
+    """无法连接服务、连接中断或服务返回了未知的错误"""
+
+
+def default_address():
+    address = os.environ.get("APM_SERVICE_ADDRESS")
+    if address:
+        return address
+    if sys.platform == "win32":
+        return r"\\.\pipe\apm-service"
+    return os.path.join(config_dir(), "apm-service.sock")
+
+
+def _scheme_json(scheme):
+    return {"guid": scheme.guid, "name": scheme.name, "active": scheme.active}
+
+
+def _scheme_line(scheme, marker=True):
+    # 与 powercfg /L 的行格式一致，客户端用同一个解析器读取
+    return f"Power Scheme GUID: {scheme.guid}  ({scheme.name}){' *' if marker and scheme.active else ''}"
+
+
+class _Connection:
+    """一个客户端连接；发送加锁，推送通知与响应可能来自不同线程"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.subscribed = False
+        self._send_lock = threading.Lock()
+
+    def send(self, message):
+        data = json.dumps(message, ensure_ascii=False).encode("utf-8")
+        with self._send_lock:
+            self.conn.send_bytes(data)
+
+    def close(self):
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+
+class PowerService:
+    """JSON-RPC 服务端
+
+    start() 在后台线程中接受连接，serve_forever() 在当前线程中运行。方案缓存的
+    变化（本服务的操作或外部改动）会推送给已订阅的连接。
+    """
+
+    def __init__(self, backend, address=None, cache=None):
+        self.backend = backend
+        self.address = address or default_address()
+        self.cache = cache or SchemeCache(backend)
+        self.stats = collections.Counter()
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+        self._events = queue.Queue()
+        self._listener = None
+        self._stopping = threading.Event()
+        self._threads = []
+        self.cache.add_listener(lambda: self._events.put("changed"))
+
+    # ---- 生命周期 ----
+
+    def _listen(self):
+        if sys.platform != "win32" and os.path.exists(self.address):
+            # 上次异常退出留下的套接字文件；仍能连接说明服务已在运行
+            try:
+                Client(self.address).close()
+            except OSError:
+                os.unlink(self.address)
+            else:
+                raise ServiceError(f"服务已在运行: {self.address}")
+        if sys.platform != "win32":
+            os.makedirs(os.path.dirname(self.address) or ".", exist_ok=True)
+            old_umask = os.umask(0o177)
+            try:
+                return Listener(self.address)
+            finally:
+                os.umask(old_umask)
+        return Listener(self.address)
+
+    def start(self):
+        self._listener = self._listen()
+        for target, name in ((self._accept_loop, "apm-service-accept"), (self._event_loop, "apm-service-events")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def serve_forever(self):
+        if self._listener is None:
+            self.start()
+        try:
+            self._stopping.wait()
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self._listener is None:
+            return
+        self._stopping.set()
+        self._events.put(None)
+        try:
+            # 唤醒阻塞在 accept() 中的线程
+            Client(self.address).close()
+        except OSError:
+            pass
+        self._listener.close()
+        self._listener = None
+        with self._connections_lock:
+            connections = list(self._connections)
+        for connection in connections:
+            connection.close()
+        for thread in self._threads:
+            thread.join(2)
+        self._threads = []
+        self.cache.close()
+
+    def _accept_loop(self):
+        while not self._stopping.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._stopping.is_set():
+                    return
+                continue
+            if self._stopping.is_set():
+                conn.close()
+                return
+            connection = _Connection(conn)
+            with self._connections_lock:
+                self._connections.add(connection)
+            threading.Thread(target=self._serve, args=(connection,), name="apm-service-conn", daemon=True).start()
+
+    def _serve(self, connection):
+        self.stats["connections"] += 1
+        try:
+            while True:
+                try:
+                    data = connection.conn.recv_bytes()
+                except (EOFError, OSError):
+                    return
+                response = self.handle(data, connection)
+                if response is not None:
+                    connection.send(response)
+        except OSError:
+            return
+        finally:
+            with self._connections_lock:
+                self._connections.discard(connection)
+            connection.close()
+
+    def _event_loop(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            # 合并积压的通知，只推送最新状态
+            while not self._events.empty():
+                if self._events.get_nowait() is None:
+                    return
+            with self._connections_lock:
+                subscribers = [c for c in self._connections if c.subscribed]
+            if not subscribers:
+                continue
+            try:
+                with self._lock:
+                    active = self.cache.active_scheme()
+                    params = {"active": active and active.guid, "schemes": len(self.cache.schemes())}
+            except (BackendError, OSError) as e:
+                params = {"active": None, "error": str(e)}
+            message = {"jsonrpc": "2.0", "method": "changed", "params": params}
+            for connection in subscribers:
+                try:
+                    connection.send(message)
+                except OSError:
+                    connection.close()
+            self.stats["notifications"] += len(subscribers)
+
+    # ---- 请求处理 ----
+
+    def handle(self, data, connection=None):
+        """处理一条请求（bytes），返回响应 dict；通知（没有 id）返回 None"""
+        try:
+            request = json.loads(data)
+        except ValueError:
+            return _error_response(None, PARSE_ERROR, "无法解析请求")
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return _error_response(None, INVALID_REQUEST, "无效的请求")
+        request_id = request.get("id")
+        method = request["method"]
+        params = request.get("params") or {}
+        handler = getattr(self, "rpc_" + method, None)
+        self.stats["requests"] += 1
+        if handler is None:
+            return _error_response(request_id, METHOD_NOT_FOUND, f"未知方法: {method}")
+        if not isinstance(params, dict):
+            return _error_response(request_id, INVALID_PARAMS, "params 必须是对象")
+        try:
+            with self._lock:
+                if method == "subscribe":
+                    result = handler(connection, **params)
+                else:
+                    result = handler(**params)
+        except TypeError as e:
+            return _error_response(request_id, INVALID_PARAMS, str(e))
+        except Exception as e:
+            self.stats["errors"] += 1
+            return _error_response(request_id, APPLICATION_ERROR, str(e), _error_data(e))
+        if request_id is None:
+            return None
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def rpc_list(self):
+        return [_scheme_json(scheme) for scheme in self.cache.schemes()]
+
+    def rpc_get(self):
+        active = self.cache.active_scheme()
+        return active and _scheme_json(active)
+
+    def rpc_set(self, plan):
+        guid = resolve_plan(self.cache, plan)
+        scheme = self.cache.get(guid)
+        if scheme is not None and scheme.active:
+            self.stats["set_unchanged"] += 1
+            return dict(_scheme_json(scheme), changed=False)
+        return dict(_scheme_json(switch_plan(self.cache, guid)), changed=True)
+
+    def rpc_subscribe(self, connection):
+        if connection is None:
+            raise ValueError("subscribe 需要连接")
+        connection.subscribed = True
+        return True
+
+    def rpc_stats(self):
+        return {"service": dict(self.stats), "cache": dict(self.cache.stats),
+                "backend": dict(self.backend.call_counts)}
+
+    def rpc_backend(self, op, args=()):
+        """后端操作；方案相关的读写经过缓存，与服务自身的状态保持一致"""
+        if op not in BACKEND_OPS:
+            raise ValueError(f"不支持的后端操作: {op}")
+        cache = self.cache
+        if op == "list_schemes":
+            lines = ["", "Existing Power Schemes (* Active)", "-----------------------------------"]
+            return "\n".join(lines + [_scheme_line(scheme) for scheme in cache.schemes()]) + "\n"
+        if op == "get_active_scheme":
+            active = cache.active_scheme()
+            return _scheme_line(active, marker=False) + "\n" if active else ""
+        if op == "activate_scheme":
+            return cache.activate(*args)
+        if op == "duplicate_scheme":
+            scheme = cache.duplicate(*args)
+            return _scheme_line(scheme, marker=False) + "\n" if scheme else ""
+        if op == "delete_scheme":
+            return cache.delete(*args)
+        if op == "write_setting_values":
+            guid, values = args
+            cache.write_settings(guid, [tuple(value) for value in values])
+            return None
+        if op == "read_registry_values":
+            values = self.backend.read_registry_values([tuple(name) for name in args[0]])
+            return [[key_path, name, value] for (key_path, name), value in values.items()]
+        return getattr(self.backend, op)(*args)
+
+
+def _error_response(request_id, code, message, data=None):
+    error = {"code": code, "message": message}
+    if data:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+def _error_data(e):
+    data = {"type": type(e).__name__}
+    if isinstance(e, BackendError):
+        data.update(returncode=e.returncode, stderr=e.stderr)
+    elif isinstance(e, OSError) and e.errno is not None:
+        data.update(errno=e.errno, strerror=e.strerror)
+    return data
+
+
+# 需要保留类型的系统错误（权限不足、注册表值不存在）
+_OS_ERRORS = {"PermissionError": PermissionError, "FileNotFoundError": FileNotFoundError}
+
+
+def _raise_error(error):
+    """把服务返回的错误还原为本地异常"""
+    message = error.get("message", "")
+    data = error.get("data") or {}
+    kind = data.get("type")
+    if kind == "BackendError":
+        raise BackendError(message, data.get("returncode", 1), data.get("stderr", ""))
+    if kind == "PlanError":
+        raise PlanError(message)
+    if kind in _OS_ERRORS:
+        raise _OS_ERRORS[kind](data.get("errno", 0), data.get("strerror") or message)
+    if kind == "ValueError" or error.get("code") == INVALID_PARAMS:
+        raise ValueError(message)
+    raise ServiceError(message)
+
+
+class ServiceClient:
+    """同步的 JSON-RPC 客户端，可以在多个线程中共用（请求按顺序发送）"""
+
+    def __init__(self, address=None):
+        self.address = address or default_address()
+        try:
+            self._conn = Client(self.address)
+        except OSError as e:
+            raise ServiceError(f"无法连接电源服务 {self.address}: {e}") from e
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def close(self):
+        self._conn.close()
+
+    def call(self, method, **params):
+        request_id = next(self._ids)
+        data = json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        with self._lock:
+            try:
+                self._conn.send_bytes(data.encode("utf-8"))
+                response = json.loads(self._conn.recv_bytes())
+            except (EOFError, OSError) as e:
+                raise ServiceError(f"与电源服务的连接已断开: {e}") from e
+        if "error" in response:
+            _raise_error(response["error"])
+        return response.get("result")
+
+    def subscribe(self, callback):
+        """在单独的连接上订阅变更，callback(params) 在接收线程中调用；返回 Subscription"""
+        return Subscription(self.address, callback)
+
+
+class Subscription:
+    """变更订阅；close() 后不再回调"""
+
+    def __init__(self, address, callback):
+        self._client = ServiceClient(address)
+        self._client.call("subscribe")
+        self._callback = callback
+        self._thread = threading.Thread(target=self._receive, name="apm-service-subscription", daemon=True)
+        self._thread.start()
+
+    def _receive(self):
+        conn = self._client._conn
+        while True:
+            try:
+                message = json.loads(conn.recv_bytes())
+            except (EOFError, OSError, ValueError):
+                return
+            callback = self._callback
+            if callback is not None and message.get("method") == "changed":
+                callback(message.get("params") or {})
+
+    def close(self):
+        self._callback = None
+        self._client.close()
+
+
+class ServiceChangeNotifier:
+    """通过服务订阅方案变更，接口与其他通知器相同"""
+
+    def __init__(self, client):
+        self.client = client
+        self._subscription = None
+
+    def start(self, callback):
+        self._subscription = self.client.subscribe(lambda params: callback())
+
+    def stop(self):
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
+
+
+class RemotePowerBackend(PowerBackend):
+    """把后端操作转发给常驻服务的瘦客户端"""
+
+    name = "service"
+
+    def __init__(self, address=None):
+        super().__init__()
+        self.client = ServiceClient(address)
+
+    def _call(self, op, *args):
+        self.call_counts[op] += 1
+        with measure(op, f"service {op}"):
+            return self.client.call("backend", op=op, args=list(args))
+
+    def create_change_notifier(self):
+        return ServiceChangeNotifier(self.client)
+
+    def list_schemes(self):
+        return self._call("list_schemes")
+
+    def get_active_scheme(self):
+        return self._call("get_active_scheme")
+
+    def query_scheme(self, scheme_guid=None, subgroup_guid=None):
+        return self._call("query_scheme", scheme_guid, subgroup_guid)
+
+    def activate_scheme(self, scheme_guid):
+        self._call("activate_scheme", scheme_guid)
+
+    def duplicate_scheme(self, scheme_guid, new_guid=None):
+        return self._call("duplicate_scheme", scheme_guid, new_guid)
+
+    def delete_scheme(self, scheme_guid):
+        self._call("delete_scheme", scheme_guid)
+
+    def write_setting_values(self, scheme_guid, values):
+        self._call("write_setting_values", scheme_guid, [list(value) for value in values])
+
+    def get_registry_value(self, name, key_path=POWER_KEY):
+        return self._call("get_registry_value", name, key_path)
+
+    def set_registry_value(self, name, value, value_type=REG_DWORD, key_path=POWER_KEY):
+        self._call("set_registry_value", name, value, value_type, key_path)
+
+    def delete_registry_value(self, name, key_path=POWER_KEY):
+        self._call("delete_registry_value", name, key_path)
+
+    def read_registry_values(self, names):
+        rows = self._call("read_registry_values", [list(name) for name in names])
+        return {(key_path, name): value for key_path, name, value in rows}
+
+    def is_admin(self):
+        return bool(self._call("is_admin"))
@@ -0,0 +1,314 @@
+"""常驻 shell 会话池
+
+每条命令都启动一个新的 powershell 进程要花费数百毫秒，并且变量无法保留。
+这里让 shell 进程常驻，通过标准输入逐条发送命令：命令以 base64 编码放在
+单独一行里，shell 执行后在 stdout 与 stderr 上各写一行带随机标记的结束行，
+据此切分每条命令的输出并取得退出码。
+
+ShellDialect 描述如何启动 shell 以及如何包装命令。除 PowerShell（Windows 上的
+powershell 或跨平台的 pwsh）外还提供 PythonDialect，用 Python 解释器充当
+替身，可以在没有 PowerShell 的环境中验证会话与池的行为。
+
+环境变量:
+    APM_SHELL=powershell|pwsh|python   使用的 shell，默认 Windows 上为 powershell，其它平台为 pwsh
+    APM_SHELL_POOL_SIZE=1              会话池大小
+    APM_SHELL_TIMEOUT=300              单条命令的超时（秒）
+"""
+import base64
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from instrumentation import measure
+
+_END_MARK = "<<<APM-END"
+
+
+class ShellError(Exception):
+    """shell 会话异常（进程退出、无法启动等）"""
+
+
+class ShellTimeout(ShellError):
+    """命令执行超时，会话已被重启"""
+
+
+class ShellCancelled(ShellError):
+    """命令被取消，会话已被重启"""
+
+
+class ShellResult:
+    """一条命令的执行结果；输出以回调逐行处理时 stdout / stderr 为空，output_size 仍为输出的总字符数"""
+
+    __slots__ = ("stdout", "stderr", "returncode", "elapsed", "output_size")
+
+    def __init__(self, stdout, stderr, returncode, elapsed, output_size=None):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = returncode
+        self.elapsed = elapsed
+        self.output_size = len(stdout) + len(stderr) if output_size is None else output_size
+
+
+class PowerShellDialect:
+    """Windows PowerShell / PowerShell 7"""
+
+    def __init__(self, executable="powershell"):
+        self.executable = executable
+
+    def argv(self):
+        return [self.executable, "-NoLogo", "-NoProfile", "-NonInteractive", "-Command", "-"]
+
+    def startup(self):
+        """会话启动后执行的初始化命令"""
+        return "[Console]::OutputEncoding = [Text.Encoding]::UTF8; $ProgressPreference = 'SilentlyContinue'"
+
+    def frame(self, command, token):
+        # 以点号调用脚本块，使命令在会话作用域中执行，定义的变量会保留下来
+        payload = base64.b64encode(command.encode("utf-8")).decode("ascii")
+        return (
+            "$global:LASTEXITCODE = 0; $__apm_ok = $true; "
+            "try { . ([ScriptBlock]::Create([Text.Encoding]::UTF8.GetString("
+            f"[Convert]::FromBase64String('{payload}')))) | Out-String -Stream -Width 4096 | "
+            "ForEach-Object { [Console]::Out.WriteLine($_) }; $__apm_ok = $? } "
+            "catch { $__apm_ok = $false; [Console]::Error.WriteLine($_.ToString()) }; "
+            "$__apm_code = if ($LASTEXITCODE) { $LASTEXITCODE } elseif ($__apm_ok) { 0 } else { 1 }; "
+            f"[Console]::Out.WriteLine('{_END_MARK} {token} ' + $__apm_code + '>>>'); "
+            f"[Console]::Error.WriteLine('{_END_MARK} {token}>>>'); "
+            "[Console]::Out.Flush(); [Console]::Error.Flush()"
+        )
+
+
+# Python 替身: 逐行读取 "<标记> <base64 代码>"，在同一个全局命名空间中执行
+_PYTHON_STUB = r"""
+import base64, sys, traceback
+scope = {"__name__": "__apm__"}
+for line in sys.stdin:
+    token, _, payload = line.strip().partition(" ")
+    code = 0
+    try:
+        exec(compile(base64.b64decode(payload).decode("utf-8"), "<apm>", "exec"), scope)
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    sys.stdout.flush()
+    sys.stdout.write("%s %s %d>>>\n" % (END, token, code))
+    sys.stdout.flush()
+    sys.stderr.write("%s %s>>>\n" % (END, token))
+    sys.stderr.flush()
+""".replace("END", repr(_END_MARK))
+
+
+class PythonDialect:
+    """用 Python 解释器模拟的 shell，命令为 Python 代码"""
+
+    def argv(self):
+        return [sys.executable, "-u", "-c", _PYTHON_STUB]
+
+    def startup(self):
+        return None
+
+    def frame(self, command, token):
+        return f"{token} {base64.b64encode(command.encode('utf-8')).decode('ascii')}"
+
+
+class ShellSession:
+    """一个常驻的 shell 进程，同一时刻只执行一条命令"""
+
+    def __init__(self, dialect):
+        self.dialect = dialect
+        self.process = None
+        self.starts = 0
+        self._lines = None
+        self._lock = threading.Lock()
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, timeout=30.0):
+        """启动（或重新启动）shell 进程"""
+        self.stop()
+        env = dict(os.environ, PYTHONIOENCODING="utf-8")
+        try:
+            with measure("shell_start", " ".join(self.dialect.argv())):
+                self.process = subprocess.Popen(
+                    self.dialect.argv(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE, encoding="utf-8", errors="replace", bufsize=1, env=env,
+                    creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+                )
+        except OSError as e:
+            self.process = None
+            raise ShellError(f"无法启动 shell: {e}") from e
+        self.starts += 1
+
+        # 每个进程使用独立的队列，旧进程残留的输出不会混入
+        self._lines = queue.Queue()
+        for name in ("stdout", "stderr"):
+            threading.Thread(
+                target=self._pump, args=(getattr(self.process, name), name, self._lines),
+                name=f"apm-shell-{name}", daemon=True
+            ).start()
+
+        init = self.dialect.startup()
+        if init:
+            self._execute(init, timeout, None, None)
+
+    @staticmethod
+    def _pump(stream, name, lines):
+        for line in iter(stream.readline, ""):
+            lines.put((name, line))
+        lines.put((name, None))
+
+    def stop(self):
+        process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            process.kill()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+    def run(self, command, timeout=None, on_output=None, cancel_event=None):
+        """执行一条命令并返回 ShellResult
+
+        on_output(stream_name, line) 在调用 run 的线程中逐行回调，此时输出不再保存到
+        结果中（长时间运行的命令不会占用越来越多的内存）；cancel_event 被设置或
+        超时后会杀掉 shell 进程（会话状态随之丢失）并抛出相应异常。
+        """
+        with self._lock:
+            if not self.is_alive():
+                self.start()
+            return self._execute(command, timeout, on_output, cancel_event)
+
+    def ensure_started(self):
+        with self._lock:
+            if not self.is_alive():
+                self.start()
+
+    def _execute(self, command, timeout, on_output, cancel_event):
+        token = uuid.uuid4().hex
+        out_mark = f"{_END_MARK} {token} "
+        err_mark = f"{_END_MARK} {token}>>>"
+        start = time.perf_counter()
+        deadline = start + timeout if timeout else None
+
+        try:
+            self.process.stdin.write(self.dialect.frame(command, token) + "\n")
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            self.stop()
+            raise ShellError(f"shell 已退出: {e}") from e
+
+        stdout, stderr = [], []
+        output_size = 0
+        returncode = None
+        stderr_done = False
+        while returncode is None or not stderr_done:
+            if cancel_event is not None and cancel_event.is_set():
+                self.stop()
+                raise ShellCancelled("命令已取消")
+            wait = 0.05 if cancel_event is not None else None
+            if deadline is not None:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self.stop()
+                    raise ShellTimeout(f"命令执行超过 {timeout} 秒")
+                wait = remaining if wait is None else min(wait, remaining)
+            try:
+                name, line = self._lines.get(timeout=wait)
+            except queue.Empty:
+                continue
+
+            if line is None:
+                self.stop()
+                raise ShellError("shell 进程意外退出")
+            mark = line.rfind(out_mark if name == "stdout" else err_mark)
+            if mark >= 0:
+                if name == "stdout":
+                    code = line[mark + len(out_mark):].strip().rstrip(">")
+                    returncode = int(code) if code.lstrip("-").isdigit() else 1
+                else:
+                    stderr_done = True
+                # 最后一段输出没有换行时，结束标记跟在这段输出后面
+                line = line[:mark]
+                if not line:
+                    continue
+
+            output_size += len(line)
+            if on_output:
+                on_output(name, line)
+            else:
+                (stdout if name == "stdout" else stderr).append(line)
+
+        return ShellResult("".join(stdout), "".join(stderr), returncode, time.perf_counter() - start, output_size)
+
+
+class ShellPool:
+    """固定大小的 shell 会话池
+
+    会话在第一次使用时启动，进程崩溃、超时或被取消后在下一次使用时自动重启。
+    restarts 记录重启次数。
+    """
+
+    def __init__(self, dialect=None, size=1, timeout=300.0):
+        self.dialect = dialect or default_dialect()
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.restarts = 0
+        self._sessions = [ShellSession(self.dialect) for _ in range(self.size)]
+        self._idle = queue.Queue()
+        for session in self._sessions:
+            self._idle.put(session)
+        self._closed = False
+
+    def warm_up(self):
+        """在后台启动尚未运行的会话"""
+        def start_idle():
+            for session in self._sessions:
+                try:
+                    session.ensure_started()
+                except ShellError as e:
+                    print(f"shell 预启动失败: {e}")
+        threading.Thread(target=start_idle, name="apm-shell-warmup", daemon=True).start()
+
+    def run(self, command, timeout=None, on_output=None, cancel_event=None):
+        """在空闲会话中执行命令，没有空闲会话时等待"""
+        if self._closed:
+            raise ShellError("会话池已关闭")
+        session = self._idle.get()
+        try:
+            if session.starts and not session.is_alive():
+                self.restarts += 1
+            with measure("shell_command", command.strip().split("\n", 1)[0][:200]) as call:
+                result = session.run(command, timeout or self.timeout, on_output, cancel_event)
+                call.exit_code = result.returncode
+                call.output_size = result.output_size
+            return result
+        finally:
+            self._idle.put(session)
+
+    def close(self):
+        self._closed = True
+        for session in self._sessions:
+            session.stop()
+
+
+def default_dialect():
+    name = os.environ.get("APM_SHELL") or ("powershell" if sys.platform == "win32" else "pwsh")
+    if name == "python":
+        return PythonDialect()
+    return PowerShellDialect(name)
+
+
+def create_shell_pool():
+    """按环境变量创建会话池"""
+    return ShellPool(
+        size=int(os.environ.get("APM_SHELL_POOL_SIZE", "1")),
+        timeout=float(os.environ.get("APM_SHELL_TIMEOUT", "300")),
+    )
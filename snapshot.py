@@ -0,0 +1,192 @@
+"""电源方案快照与差异比较
+
+快照保存一个或多个方案中每个设置的 AC/DC 值。磁盘格式为 gzip 压缩的 JSON，
+所有 GUID 只在 guids 表中出现一次，其余位置用下标引用:
+
+    {"format": "apm-snapshot", "version": 1, "created": <时间戳>,
+     "guids": [GUID, ...], "names": [名称, ...],
+     "schemes": [[方案下标, [[子组下标, 设置下标, AC, DC], ...]], ...]}
+
+比较两个快照时以 (子组, 设置) 为键做一次哈希连接，耗时与设置数量成线性关系。
+恢复方案时先比较当前值与快照，只写入不同的设置。
+"""
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from power_backend import BackendError
+from powercfg_parser import parse_query
+
+SNAPSHOT_FORMAT = "apm-snapshot"
+SNAPSHOT_VERSION = 1
+
+
+class SchemeSnapshot:
+    """一个方案的快照，values 为 {(子组 GUID, 设置 GUID): (AC, DC)}"""
+
+    __slots__ = ("guid", "name", "values")
+
+    def __init__(self, guid, name="", values=None):
+        self.guid = guid.lower()
+        self.name = name
+        self.values = values if values is not None else {}
+
+
+class SettingDiff:
+    """一个设置的差异；old / new 为 (AC, DC)，设置只存在于一侧时另一侧为 None"""
+
+    __slots__ = ("scheme", "subgroup", "setting", "old", "new")
+
+    def __init__(self, scheme, subgroup, setting, old, new):
+        self.scheme = scheme
+        self.subgroup = subgroup
+        self.setting = setting
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        return f"SettingDiff({self.scheme}, {self.subgroup}, {self.setting}, {self.old!r} -> {self.new!r})"
+
+
+class Snapshot:
+    """若干方案的快照；names 记录方案、子组、设置的显示名称（GUID -> 名称）"""
+
+    def __init__(self, schemes=None, names=None, created=None):
+        self.schemes = schemes if schemes is not None else {}
+        self.names = names if names is not None else {}
+        self.created = created if created is not None else time.time()
+
+    def add(self, scheme):
+        self.schemes[scheme.guid] = scheme
+
+    def name_of(self, guid):
+        return self.names.get(guid, guid)
+
+    # ---- 磁盘格式 ----
+
+    def to_dict(self):
+        index = {}
+        guids = []
+
+        def ref(guid):
+            i = index.get(guid)
+            if i is None:
+                i = index[guid] = len(guids)
+                guids.append(guid)
+            return i
+
+        schemes = [
+            [ref(scheme.guid), [[ref(sub), ref(setting), ac, dc]
+                                for (sub, setting), (ac, dc) in scheme.values.items()]]
+            for scheme in self.schemes.values()
+        ]
+        return {
+            "format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION, "created": self.created,
+            "guids": guids, "names": [self.names.get(guid, "") for guid in guids], "schemes": schemes,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format") != SNAPSHOT_FORMAT or data.get("version") != SNAPSHOT_VERSION:
+            raise ValueError("不支持的快照格式")
+        guids = data["guids"]
+        names = {guid: name for guid, name in zip(guids, data["names"]) if name}
+        snapshot = cls(names=names, created=data["created"])
+        for scheme_ref, entries in data["schemes"]:
+            guid = guids[scheme_ref]
+            values = {(guids[sub], guids[setting]): (ac, dc) for sub, setting, ac, dc in entries}
+            snapshot.add(SchemeSnapshot(guid, names.get(guid, ""), values))
+        return snapshot
+
+    def save(self, path):
+        """写入文件（先写临时文件再替换，避免留下损坏的快照）"""
+        data = json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        temp = path + ".tmp"
+        with gzip.open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rb") as f:
+            return cls.from_dict(json.loads(f.read().decode("utf-8")))
+
+
+def _query(backend, guid):
+    schemes = parse_query(backend.query_scheme(guid))
+    if not schemes:
+        raise BackendError(f"无法解析方案 {guid} 的设置")
+    return schemes[0]
+
+
+def take_snapshot(backend, scheme_guids, max_workers=8):
+    """并行查询各方案的 /Q 输出并生成快照"""
+    scheme_guids = [guid.lower() for guid in scheme_guids]
+    snapshot = Snapshot()
+    if not scheme_guids:
+        return snapshot
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(scheme_guids))),
+                            thread_name_prefix="apm-snapshot") as pool:
+        parsed = list(pool.map(lambda guid: _query(backend, guid), scheme_guids))
+
+    for guid, scheme in zip(scheme_guids, parsed):
+        snapshot.names[guid] = scheme.name
+        values = {}
+        for subgroup in scheme.subgroups.values():
+            snapshot.names[subgroup.guid] = subgroup.name
+            for setting in subgroup.settings.values():
+                snapshot.names[setting.guid] = setting.name
+                values[(subgroup.guid, setting.guid)] = (setting.ac_value, setting.dc_value)
+        snapshot.add(SchemeSnapshot(guid, scheme.name, values))
+    return snapshot
+
+
+def diff_values(old, new, scheme=""):
+    """比较两组设置值，返回 SettingDiff 列表（顺序: old 中的设置在前，仅 new 中有的在后）"""
+    diffs = []
+    for key, old_value in old.items():
+        new_value = new.get(key)
+        if new_value != old_value:
+            diffs.append(SettingDiff(scheme, key[0], key[1], old_value, new_value))
+    for key, new_value in new.items():
+        if key not in old:
+            diffs.append(SettingDiff(scheme, key[0], key[1], None, new_value))
+    return diffs
+
+
+def diff_schemes(old, new):
+    """比较两个方案快照（可以是不同的方案）"""
+    return diff_values(old.values, new.values, new.guid)
+
+
+def diff_snapshots(old, new):
+    """比较两个快照中都存在的方案，返回 {方案 GUID: [SettingDiff]}（只包含有差异的方案）"""
+    result = {}
+    for guid, scheme in old.schemes.items():
+        other = new.schemes.get(guid)
+        if other is not None:
+            diffs = diff_schemes(scheme, other)
+            if diffs:
+                result[guid] = diffs
+    return result
+
+
+def restore_scheme(backend, baseline, write=None):
+    """把方案恢复为快照中的值，只写入与当前值不同的设置
+
+    write(scheme_guid, values) 默认为 backend.write_setting_values，可以传入
+    SchemeCache.write_settings 以便缓存识别为自身修改。返回实际写入的差异列表。
+    """
+    current = take_snapshot(backend, [baseline.guid]).schemes[baseline.guid]
+    diffs = [d for d in diff_schemes(current, baseline) if d.new is not None]
+    values = []
+    for d in diffs:
+        old_ac, old_dc = d.old if d.old is not None else (None, None)
+        new_ac, new_dc = d.new
+        values.append((d.subgroup, d.setting,
+                       None if new_ac == old_ac else new_ac, None if new_dc == old_dc else new_dc))
+    if values:
+        (write or backend.write_setting_values)(baseline.guid, values)
+    return diffs
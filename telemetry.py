@@ -0,0 +1,407 @@
+"""电源遥测记录
+
+按固定间隔采样 CPU 利用率、CPU 频率、电池电量与充放电功率，并记录当前
+激活的方案，用于观察切换计划的效果。
+
+数据保存在若干级固定容量的环形缓冲中（array 存储，所有指标共用时间列）:
+第一级保存原始样本，其余各级按更粗的时间粒度保存平均值，默认为
+
+    1 秒 x 10 分钟、10 秒 x 2 小时、1 分钟 x 1 天、10 分钟 x 7 天
+
+运行多久内存占用都不变。导出时由粗到细拼接各级数据，得到完整的时间线。
+
+采样来源只需提供 sample()，按 METRICS 的顺序返回数值，不可用的指标为 None:
+
+    LinuxTelemetrySource     /proc/stat、/proc/cpuinfo、/sys/class/power_supply
+    WindowsTelemetrySource   GetSystemTimes、CallNtPowerInformation、GetSystemPowerStatus
+    SyntheticTelemetrySource 确定性的合成数据，用于测试和模拟
+
+环境变量 APM_TELEMETRY=off|synthetic 可以关闭记录或使用合成数据。
+"""
+import array
+import csv
+import ctypes
+import glob
+import json
+import math
+import os
+import sys
+import threading
+import time
+import zipfile
+
+from governor import ProcStatSampler, WindowsCpuSampler
+from polling import PollingLoop
+
+# 指标名称 -> 单位
+METRICS = (
+    ("cpu_percent", "%"),
+    ("cpu_mhz", "MHz"),
+    ("battery_percent", "%"),
+    ("battery_watts", "W"),  # 充电为正，放电为负
+)
+METRIC_NAMES = tuple(name for name, _ in METRICS)
+
+# (时间粒度秒数, 容量)
+DEFAULT_TIERS = ((1, 600), (10, 720), (60, 1440), (600, 1008))
+
+NAN = float("nan")
+
+
+class Tier:
+    """一级环形缓冲；resolution 为 0 表示保存原始样本"""
+
+    def __init__(self, resolution, capacity, width):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.times = array.array("d", bytes(8 * capacity))
+        self.columns = [array.array("d", bytes(8 * capacity)) for _ in range(width)]
+        self.next = 0
+        self.count = 0
+        # 尚未结束的时间段的累计值
+        self.bucket = None
+        self.sums = array.array("d", bytes(8 * width))
+        self.counts = array.array("l", bytes(array.array("l").itemsize * width))
+
+    def append(self, t, row):
+        i = self.next
+        self.times[i] = t
+        for column, value in zip(self.columns, row):
+            column[i] = value
+        self.next = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def accumulate(self, t, row):
+        bucket = int(t // self.resolution)
+        if bucket != self.bucket:
+            self.flush()
+            self.bucket = bucket
+        sums, counts = self.sums, self.counts
+        for i, value in enumerate(row):
+            if value == value:  # 跳过 NaN
+                sums[i] += value
+                counts[i] += 1
+
+    def flush(self):
+        """把当前时间段的平均值写入缓冲"""
+        if self.bucket is None:
+            return
+        sums, counts = self.sums, self.counts
+        self.append(self.bucket * self.resolution,
+                    [sums[i] / counts[i] if counts[i] else NAN for i in range(len(sums))])
+        for i in range(len(sums)):
+            sums[i] = 0.0
+            counts[i] = 0
+        self.bucket = None
+
+    def _order(self):
+        start = (self.next - self.count) % self.capacity
+        return [(start + k) % self.capacity for k in range(self.count)]
+
+    def rows(self):
+        """按时间顺序返回 [(时间, (各指标值...))]"""
+        return [(self.times[i], tuple(column[i] for column in self.columns)) for i in self._order()]
+
+    def tail(self, index, count):
+        """最近 count 个样本中第 index 个指标的值"""
+        count = min(count, self.count)
+        column = self.columns[index]
+        return [column[(self.next - count + k) % self.capacity] for k in range(count)]
+
+    def first_time(self):
+        return self.times[(self.next - self.count) % self.capacity] if self.count else None
+
+
+class TelemetryStore:
+    """多级环形缓冲；第一级保存原始样本，其余各级保存平均值"""
+
+    def __init__(self, metrics=METRIC_NAMES, tiers=DEFAULT_TIERS):
+        self.metrics = tuple(metrics)
+        self.tiers = [Tier(0 if level == 0 else resolution, capacity, len(self.metrics))
+                      for level, (resolution, capacity) in enumerate(tiers)]
+        self._lock = threading.Lock()
+
+    def push(self, t, row):
+        row = [NAN if value is None else float(value) for value in row]
+        with self._lock:
+            self.tiers[0].append(t, row)
+            for tier in self.tiers[1:]:
+                tier.accumulate(t, row)
+
+    def tail(self, metric, count):
+        """某个指标最近 count 个原始样本（用于迷你曲线）"""
+        index = self.metrics.index(metric)
+        with self._lock:
+            return self.tiers[0].tail(index, count)
+
+    def latest(self):
+        """最近一个原始样本 {指标: 值}，没有数据时返回 {}"""
+        with self._lock:
+            tier = self.tiers[0]
+            if not tier.count:
+                return {}
+            i = (tier.next - 1) % tier.capacity
+            return {metric: tier.columns[k][i] for k, metric in enumerate(self.metrics)}
+
+    def timeline(self):
+        """由粗到细拼接各级数据: 每一级只取比下一级更早的部分"""
+        with self._lock:
+            rows = []
+            limit = math.inf
+            for tier in self.tiers:
+                first = tier.first_time()
+                tier_rows = [row for row in tier.rows() if row[0] < limit]
+                rows.append(tier_rows)
+                if first is not None:
+                    limit = min(limit, first)
+        merged = []
+        for tier_rows in reversed(rows):
+            merged.extend(tier_rows)
+        return merged
+
+    def memory_bytes(self):
+        return sum(8 * tier.capacity * (1 + len(self.metrics)) for tier in self.tiers)
+
+
+# ---- 采样来源 ----
+
+class LinuxTelemetrySource:
+    """/proc 与 /sys/class/power_supply"""
+
+    def __init__(self, power_supply="/sys/class/power_supply"):
+        self.cpu = ProcStatSampler()
+        self.freq_files = sorted(glob.glob("/sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq"))
+        self.batteries = [path for path in glob.glob(os.path.join(power_supply, "*"))
+                          if _read(os.path.join(path, "type")) == "Battery"]
+
+    def close(self):
+        self.cpu.close()
+
+    def _cpu_mhz(self):
+        if self.freq_files:
+            values = [_read_number(path) for path in self.freq_files]
+            values = [v for v in values if v is not None]
+            return sum(values) / len(values) / 1000 if values else None
+        # 没有 cpufreq（虚拟机等）时使用 /proc/cpuinfo
+        try:
+            with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+                values = [float(line.split(":", 1)[1]) for line in f if line.startswith("cpu MHz")]
+        except (OSError, ValueError):
+            return None
+        return sum(values) / len(values) if values else None
+
+    def _battery(self):
+        if not self.batteries:
+            return None, None
+        path = self.batteries[0]
+        percent = _read_number(os.path.join(path, "capacity"))
+        power = _read_number(os.path.join(path, "power_now"))
+        if power is None:
+            current = _read_number(os.path.join(path, "current_now"))
+            voltage = _read_number(os.path.join(path, "voltage_now"))
+            power = current * voltage / 1e6 if current is not None and voltage is not None else None
+        watts = power / 1e6 if power is not None else None
+        if watts is not None and _read(os.path.join(path, "status")) == "Discharging":
+            watts = -watts
+        return percent, watts
+
+    def sample(self):
+        cpu = self.cpu.sample()
+        battery, watts = self._battery()
+        return (None if cpu is None else cpu * 100, self._cpu_mhz(), battery, watts)
+
+
+class WindowsTelemetrySource:
+    """GetSystemTimes、CallNtPowerInformation(ProcessorInformation)、GetSystemPowerStatus"""
+
+    def __init__(self):
+        from ctypes import wintypes
+
+        class ProcessorPowerInformation(ctypes.Structure):
+            _fields_ = [("Number", wintypes.ULONG), ("MaxMhz", wintypes.ULONG), ("CurrentMhz", wintypes.ULONG),
+                        ("MhzLimit", wintypes.ULONG), ("MaxIdleState", wintypes.ULONG),
+                        ("CurrentIdleState", wintypes.ULONG)]
+
+        class SystemPowerStatus(ctypes.Structure):
+            _fields_ = [("ACLineStatus", wintypes.BYTE), ("BatteryFlag", wintypes.BYTE),
+                        ("BatteryLifePercent", wintypes.BYTE), ("SystemStatusFlag", wintypes.BYTE),
+                        ("BatteryLifeTime", wintypes.DWORD), ("BatteryFullLifeTime", wintypes.DWORD)]
+
+        self.cpu = WindowsCpuSampler()
+        self._cpus = os.cpu_count() or 1
+        self._processors = (ProcessorPowerInformation * self._cpus)()
+        self._power_status = SystemPowerStatus()
+        self._call_nt_power_information = ctypes.windll.powrprof.CallNtPowerInformation
+        self._get_system_power_status = ctypes.windll.kernel32.GetSystemPowerStatus
+
+    def close(self):
+        pass
+
+    def sample(self):
+        cpu = self.cpu.sample()
+        mhz = None
+        # 11 = ProcessorInformation
+        if self._call_nt_power_information(11, None, 0, self._processors, ctypes.sizeof(self._processors)) == 0:
+            mhz = sum(p.CurrentMhz for p in self._processors) / self._cpus
+        battery = None
+        if self._get_system_power_status(ctypes.byref(self._power_status)):
+            percent = self._power_status.BatteryLifePercent & 0xFF
+            battery = None if percent == 255 else percent
+        # 充放电功率需要 WMI（BatteryStatus），这里不提供
+        return (None if cpu is None else cpu * 100, mhz, battery, None)
+
+
+class SyntheticTelemetrySource:
+    """确定性的合成数据: 利用率与频率按正弦变化，电池缓慢放电"""
+
+    def __init__(self, period=120.0, clock=time.time):
+        self.period = period
+        self.clock = clock
+        self.start = clock()
+
+    def close(self):
+        pass
+
+    def sample(self):
+        t = self.clock() - self.start
+        phase = math.sin(2 * math.pi * t / self.period)
+        cpu = 50 + 45 * phase
+        return (cpu, 1200 + 24 * cpu, max(0.0, 100 - t / 60), -8 - 0.2 * cpu)
+
+
+def _read(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _read_number(path):
+    text = _read(path)
+    try:
+        return float(text) if text else None
+    except ValueError:
+        return None
+
+
+def create_telemetry_source():
+    """按平台与 APM_TELEMETRY 返回采样来源，关闭或不支持时返回 None"""
+    mode = os.environ.get("APM_TELEMETRY", "")
+    if mode == "off":
+        return None
+    if mode == "synthetic":
+        return SyntheticTelemetrySource()
+    try:
+        if sys.platform == "win32":
+            return WindowsTelemetrySource()
+        if os.path.exists("/proc/stat"):
+            return LinuxTelemetrySource()
+    except OSError as e:
+        print(f"无法启动遥测采样: {e}")
+    return None
+
+
+class TelemetryRecorder(PollingLoop):
+    """定时采样并写入 TelemetryStore；active_scheme 为返回当前方案 GUID 的函数
+
+    方案变化以事件形式记录（schemes: [(时间, GUID)]，最多保留 max_events 条）。
+    """
+
+    thread_name = "apm-telemetry"
+
+    def __init__(self, source, interval=1.0, store=None, active_scheme=None, clock=time.time, max_events=10000):
+        super().__init__(interval)
+        self.source = source
+        self.store = store or TelemetryStore()
+        self.active_scheme = active_scheme
+        self.clock = clock
+        self.max_events = max_events
+        self.schemes = []
+
+    def prepare(self):
+        self.source.sample()  # 建立利用率的基准
+
+    def step(self):
+        t = self.clock()
+        self.store.push(t, self.source.sample())
+        self.stats["samples"] += 1
+        if self.active_scheme is not None:
+            guid = self.active_scheme()
+            if guid and (not self.schemes or self.schemes[-1][1] != guid):
+                self.schemes.append((t, guid))
+                if len(self.schemes) > self.max_events:
+                    del self.schemes[:len(self.schemes) - self.max_events]
+
+    def scheme_at(self, t):
+        """t 时刻激活的方案 GUID"""
+        guid = None
+        for at, scheme in self.schemes:
+            if at > t:
+                break
+            guid = scheme
+        return guid
+
+    # ---- 导出 ----
+
+    def _rows_with_scheme(self):
+        rows = self.store.timeline()
+        schemes = self.schemes
+        k = 0
+        guid = None
+        for t, values in rows:
+            while k < len(schemes) and schemes[k][0] <= t:
+                guid = schemes[k][1]
+                k += 1
+            yield t, values, guid
+
+    def export_csv(self, path):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time", *(f"{name} ({unit})" for name, unit in METRICS), "active_scheme"])
+            for t, values, guid in self._rows_with_scheme():
+                writer.writerow([f"{t:.3f}", *("" if v != v else f"{v:.6g}" for v in values), guid or ""])
+
+    def export_columns(self, path):
+        """列式文件: zip 中每列一个小端 float64 数组（numpy.frombuffer 可直接读取），
+        schema.json 描述列名、单位与方案表，active_scheme 列为方案表下标（-1 表示未知）"""
+        rows = list(self._rows_with_scheme())
+        guids = []
+        index = {}
+        columns = {"time": array.array("d", (t for t, _, _ in rows))}
+        for k, name in enumerate(METRIC_NAMES):
+            columns[name] = array.array("d", (values[k] for _, values, _ in rows))
+        scheme_column = array.array("d")
+        for _, _, guid in rows:
+            if guid is not None and guid not in index:
+                index[guid] = len(guids)
+                guids.append(guid)
+            scheme_column.append(index.get(guid, -1))
+        columns["active_scheme"] = scheme_column
+        if sys.byteorder != "little":
+            for column in columns.values():
+                column.byteswap()
+        schema = {
+            "format": "apm-telemetry", "version": 1, "rows": len(rows), "dtype": "<f8",
+            "columns": [{"name": name, "unit": dict(METRICS).get(name, "")} for name in columns],
+            "schemes": guids,
+        }
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as f:
+            f.writestr("schema.json", json.dumps(schema, indent=2))
+            for name, column in columns.items():
+                f.writestr(f"{name}.f64", column.tobytes())
+
+
+def load_columns(path):
+    """读取 export_columns 写出的文件，返回 (schema, {列名: array})"""
+    with zipfile.ZipFile(path) as f:
+        schema = json.loads(f.read("schema.json"))
+        columns = {}
+        for column in schema["columns"]:
+            values = array.array("d")
+            values.frombytes(f.read(column["name"] + ".f64"))
+            if sys.byteorder != "little":
+                values.byteswap()
+            columns[column["name"]] = values
+    return schema, columns
@@ -0,0 +1,90 @@
+"""fleet: 用 LoopbackTransport 验证并发上限、超时、重试与结果汇总"""
+import asyncio
+
+from fleet import FleetRunner, LoopbackTransport, PowerProfile, run_fleet
+
+HIGH = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+PROFILE = PowerProfile("high")
+
+
+class CountingTransport(LoopbackTransport):
+    """记录同时进行中的调用数的峰值"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def apply(self, host, profile):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            return await super().apply(host, profile)
+        finally:
+            self.in_flight -= 1
+
+
+def test_applies_profile_to_every_host():
+    transport = LoopbackTransport.simulate(5, latency=0.001, seed=1)
+    report = run_fleet(transport, list(transport.backends), PROFILE, concurrency=2)
+    assert [r.ok for r in report.results] == [True] * 5
+    assert all(r.result["scheme"] == HIGH and r.attempts == 1 for r in report.results)
+    assert all(cache.active_scheme().guid == HIGH for cache in transport.caches.values())
+
+
+def test_concurrency_is_bounded():
+    transport = CountingTransport.simulate(20, latency=0.01, seed=1)
+    report = run_fleet(transport, list(transport.backends), PROFILE, concurrency=4)
+    assert len(report.succeeded) == 20
+    assert transport.peak == 4
+
+
+def test_concurrency_limited_by_host_count():
+    transport = CountingTransport.simulate(3, latency=0.01, seed=1)
+    run_fleet(transport, list(transport.backends), PROFILE, concurrency=8)
+    assert transport.peak == 3
+
+
+def test_hung_host_times_out():
+    transport = LoopbackTransport.simulate(3, latency=0.001, hang_rate=1.0, seed=1)
+    report = run_fleet(transport, list(transport.backends), PROFILE, timeout=0.05, retries=1, backoff=0)
+    assert report.succeeded == []
+    for result in report.results:
+        assert result.attempts == 2
+        assert "超时" in result.error
+        assert result.duration < 1
+
+
+def test_unreachable_host_is_retried():
+    transport = LoopbackTransport(["a", "b"], latency=0.001, unreachable=["b"], seed=1)
+    report = run_fleet(transport, ["a", "b"], PROFILE, retries=2, backoff=0)
+    a, b = report.results
+    assert (a.ok, a.attempts) == (True, 1)
+    assert (b.ok, b.attempts) == (False, 3)
+    assert "连接被重置" in b.error
+    assert transport.calls == 4
+
+
+def test_remote_error_is_not_retried():
+    transport = LoopbackTransport(["a"], latency=0.001, seed=1)
+    report = run_fleet(transport, ["a", "ghost"], PowerProfile("no such plan"), retries=3, backoff=0)
+    assert [(r.ok, r.attempts) for r in report.results] == [(False, 1), (False, 1)]
+    assert "no such plan" in report.results[0].error
+    assert "ghost" in report.results[1].error
+    assert transport.calls == 2
+
+
+def test_summary_aggregates_results():
+    transport = LoopbackTransport(["a", "b", "c", "d"], latency=0.001, unreachable=["d"], seed=1)
+    seen = []
+    runner = FleetRunner(transport, concurrency=2, retries=1, backoff=0, on_result=seen.append)
+    report = asyncio.run(runner.run(["a", "b", "a", "c", "d", "ghost"], PROFILE))
+    summary = report.summary()
+    assert [r.host for r in report.results] == ["a", "b", "c", "d", "ghost"]
+    assert sorted(r.host for r in seen) == ["a", "b", "c", "d", "ghost"]
+    assert {k: summary[k] for k in ("hosts", "succeeded", "failed", "attempts")} == \
+        {"hosts": 5, "succeeded": 3, "failed": 2, "attempts": 3 + 2 + 1}
+    assert [r.host for r in report.failed] == ["d", "ghost"]
+    assert summary["p50"] <= summary["p95"] <= summary["max"]
+    assert summary["max"] == round(max(r.duration for r in report.results), 4)
+    assert report.to_dict()["summary"] == summary
@@ -0,0 +1,126 @@
+"""perf_profiles.ProfileManager: 用模拟的进程表与 SimulatedProcessController 验证启用与恢复"""
+import os
+
+import pytest
+
+from perf_profiles import (PerformanceProfile, ProcessTuning, ProfileManager, SimulatedProcessController,
+                           parse_cpus)
+from power_backend import BackendError, SimulatedPowerBackend
+from process_rules import StaticProcessSource
+from scheme_cache import SchemeCache
+
+BALANCED = "381b4222-f694-41f0-9685-ff5bb260df2e"
+HIGH = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+ALL_CPUS = frozenset(range(8))
+
+PROFILE = PerformanceProfile("低延迟", "high", [
+    ProcessTuning("game*", priority="high", affinity="2-5", throttling="off"),
+    ProcessTuning("backup", priority="idle", throttling="eco"),
+])
+
+
+class FailingBackend(SimulatedPowerBackend):
+    """激活方案总是失败"""
+
+    def activate_scheme(self, scheme_guid):
+        raise BackendError(f"激活电源方案 {scheme_guid} 失败")
+
+
+def make_manager(backend=None, denied=(), state_path=None):
+    source = StaticProcessSource({
+        100: ("game.exe", "C:\\games\\game.exe"),
+        101: ("backup.exe", "C:\\tools\\backup.exe"),
+        102: ("editor.exe", "C:\\tools\\editor.exe"),
+        103: ("game-helper.exe", "C:\\games\\game-helper.exe"),
+    })
+    controller = SimulatedProcessController(source.processes, cpus=8, denied=denied)
+    cache = SchemeCache(backend or SimulatedPowerBackend(), watch=False)
+    return ProfileManager(cache, controller, source, state_path), controller, source
+
+
+def untouched(controller, pid):
+    return controller.state[pid] == {"priority": 0, "affinity": ALL_CPUS, "throttling": None}
+
+
+def test_parse_cpus():
+    assert parse_cpus("0-3,6") == frozenset({0, 1, 2, 3, 6})
+    assert parse_cpus([1, 2]) == frozenset({1, 2})
+    for text in ("", "3-1", "a", "-1"):
+        with pytest.raises(ValueError):
+            parse_cpus(text)
+
+
+def test_activate_and_restore_on_deactivate():
+    manager, controller, _ = make_manager()
+    activation = manager.activate(PROFILE)
+    assert (activation.previous_scheme, activation.scheme, activation.errors) == (BALANCED, HIGH, [])
+    assert sorted(change.pid for change in activation.changes) == [100, 101, 103]
+    assert controller.state[100] == {"priority": -10, "affinity": frozenset(range(2, 6)), "throttling": "off"}
+    assert controller.state[101] == {"priority": 19, "affinity": ALL_CPUS, "throttling": "eco"}
+    assert untouched(controller, 102)
+    assert manager.cache.active_scheme().guid == HIGH
+
+    assert manager.deactivate() == []
+    assert all(untouched(controller, pid) for pid in controller.state)
+    assert manager.cache.active_scheme().guid == BALANCED
+    assert manager.active is None
+    assert manager.deactivate() is None
+
+
+def test_manual_plan_change_kept_on_deactivate():
+    manager, _, _ = make_manager()
+    manager.activate(PROFILE)
+    manager.cache.activate("a1841308-3541-4fab-bc81-f71556f20b4a")
+    manager.deactivate()
+    assert manager.cache.active_scheme().guid == "a1841308-3541-4fab-bc81-f71556f20b4a"
+
+
+def test_denied_process_recorded_as_error():
+    manager, controller, _ = make_manager(denied=[100])
+    activation = manager.activate(PROFILE)
+    assert [(pid, name) for pid, name, _ in activation.errors] == [(100, "game.exe")]
+    assert "权限" in activation.errors[0][2]
+    assert 100 not in [change.pid for change in activation.changes]
+    assert untouched(controller, 100)
+    assert controller.state[103]["priority"] == -10
+    assert manager.deactivate() == []
+    assert all(untouched(controller, pid) for pid in controller.state)
+
+
+def test_process_changes_rolled_back_when_plan_switch_fails():
+    manager, controller, _ = make_manager(FailingBackend())
+    with pytest.raises(BackendError):
+        manager.activate(PROFILE)
+    assert all(untouched(controller, pid) for pid in controller.state)
+    assert manager.active is None
+    assert manager.cache.active_scheme().guid == BALANCED
+
+
+def test_reused_pid_is_skipped():
+    manager, controller, source = make_manager()
+    manager.activate(PROFILE)
+    # game.exe 退出后 PID 100 被另一个进程使用，backup.exe 已退出
+    source.processes[100] = ("other.exe", "C:\\other.exe")
+    del source.processes[101]
+    assert manager.deactivate() == []
+    assert controller.state[100]["priority"] == -10
+    assert controller.state[101]["priority"] == 19
+    assert untouched(controller, 103)
+
+
+def test_state_persisted_across_instances(tmp_path):
+    path = str(tmp_path / "state" / "perf_state.json")
+    manager, controller, source = make_manager(state_path=path)
+    manager.activate(PROFILE)
+    assert os.path.exists(path)
+
+    # 新的实例（如命令行的第二次调用）读取记录并恢复
+    other = ProfileManager(manager.cache, controller, source, path)
+    assert other.active.profile == PROFILE.name
+    assert other.active.previous_scheme == BALANCED
+    assert sorted(change.pid for change in other.active.changes) == [100, 101, 103]
+    assert other.deactivate() == []
+    assert all(untouched(controller, pid) for pid in controller.state)
+    assert manager.cache.active_scheme().guid == BALANCED
+    assert not os.path.exists(path)
+    assert ProfileManager(manager.cache, controller, source, path).active is None
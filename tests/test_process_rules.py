@@ -0,0 +1,90 @@
+"""process_rules.RuleEngine: 规则生效、恢复以及切换失败后的重试"""
+from power_backend import BackendError, SimulatedPowerBackend
+from process_rules import ProcessRule, RuleEngine, StaticProcessSource
+from scheme_cache import SchemeCache
+
+BALANCED = "381b4222-f694-41f0-9685-ff5bb260df2e"
+HIGH = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+
+
+class FlakyBackend(SimulatedPowerBackend):
+    """前 failures 次激活方案失败"""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def activate_scheme(self, scheme_guid):
+        if self.failures:
+            self.failures -= 1
+            raise BackendError(f"激活电源方案 {scheme_guid} 失败")
+        super().activate_scheme(scheme_guid)
+
+
+def make_engine(backend):
+    now = [0.0]
+    source = StaticProcessSource()
+    engine = RuleEngine(SchemeCache(backend, watch=False), [ProcessRule("blender*", "high")], source,
+                        settle=3.0, clock=lambda: now[0])
+
+    def step(seconds=0.0):
+        now[0] += seconds
+        return engine.step()
+
+    return engine, source, step
+
+
+def active(engine):
+    return engine.cache.active_scheme().guid
+
+
+def test_rule_applies_after_settle_and_reverts():
+    engine, source, step = make_engine(SimulatedPowerBackend())
+    source.processes[100] = ("blender.exe", "C:\\blender\\blender.exe")
+    assert step() is None
+    decision = step(3.0)
+    assert (decision.reason, decision.new, decision.error) == ("rule", HIGH, None)
+    assert active(engine) == HIGH
+
+    del source.processes[100]
+    step()
+    decision = step(3.0)
+    assert (decision.reason, decision.new) == ("revert", BALANCED)
+    assert active(engine) == BALANCED
+    assert engine.applied is None
+
+
+def test_failed_switch_is_retried():
+    engine, source, step = make_engine(FlakyBackend(failures=1))
+    source.processes[100] = ("blender.exe", "C:\\blender\\blender.exe")
+    step()
+    decision = step(3.0)
+    assert decision.error
+    assert engine.applied is None
+    assert active(engine) == BALANCED
+
+    step()
+    decision = step(3.0)
+    assert (decision.reason, decision.new, decision.error) == ("rule", HIGH, None)
+    assert active(engine) == HIGH
+    assert engine.stats["errors"] == 1 and engine.stats["switches"] == 1
+
+
+def test_failed_revert_is_retried():
+    engine, source, step = make_engine(FlakyBackend(failures=0))
+    source.processes[100] = ("blender.exe", "C:\\blender\\blender.exe")
+    step()
+    step(3.0)
+    engine.cache.backend.failures = 1
+
+    del source.processes[100]
+    step()
+    decision = step(3.0)
+    assert decision.reason == "revert" and decision.error
+    assert active(engine) == HIGH
+
+    step()
+    decision = step(3.0)
+    assert (decision.reason, decision.new, decision.error) == ("revert", BALANCED, None)
+    assert active(engine) == BALANCED
+    assert engine.applied is None and engine.baseline is None
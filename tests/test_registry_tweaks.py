@@ -0,0 +1,96 @@
+"""registry_tweaks.TweakEngine: 在模拟后端的内存注册表上验证事务与回滚"""
+import pytest
+
+from power_backend import POWER_KEY, REG_DWORD, BackendError, SimulatedPowerBackend
+from registry_tweaks import SESSION_POWER_KEY, TweakEngine, TweakError
+
+
+class FailingBackend(SimulatedPowerBackend):
+    """记录注册表写入；fail(值名称, 值) 返回 True 时写入失败"""
+
+    def __init__(self, fail=None, **kwargs):
+        super().__init__(**kwargs)
+        self.fail = fail or (lambda name, value: False)
+        self.writes = []
+
+    def set_registry_value(self, name, value, value_type=REG_DWORD, key_path=POWER_KEY):
+        if self.fail(name, value):
+            raise BackendError(f"写入 {name} 失败", 5)
+        self.writes.append(("set", name, value))
+        super().set_registry_value(name, value, value_type, key_path)
+
+    def delete_registry_value(self, name, key_path=POWER_KEY):
+        if self.fail(name, None):
+            raise BackendError(f"删除 {name} 失败", 5)
+        self.writes.append(("delete", name))
+        super().delete_registry_value(name, key_path)
+
+
+def make_backend(fail=None):
+    # 快速启动默认开启，其余调整项都不存在
+    return FailingBackend(fail, registry={(SESSION_POWER_KEY, "HiberbootEnabled"): (1, REG_DWORD)})
+
+
+DESIRED = {"PlatformAoAcOverride": 0, "HiberbootEnabled": 0, "HibernateEnabled": 0}
+
+
+def test_apply_writes_only_changes():
+    backend = make_backend()
+    engine = TweakEngine(backend)
+    changed = engine.apply(dict(DESIRED, CsEnabled=None))
+    assert [state.tweak.name for state in changed] == ["PlatformAoAcOverride", "HiberbootEnabled", "HibernateEnabled"]
+    assert backend.writes == [("set", "PlatformAoAcOverride", 0), ("set", "HiberbootEnabled", 0),
+                              ("set", "HibernateEnabled", 0)]
+    current = engine.read()
+    assert {name: current[name] for name in DESIRED} == DESIRED
+    assert engine.apply(DESIRED) == []
+
+
+def test_failure_rolls_back_in_reverse_order():
+    backend = make_backend(lambda name, value: name == "HibernateEnabled")
+    engine = TweakEngine(backend)
+    before = engine.read()
+    with pytest.raises(TweakError) as info:
+        engine.apply(DESIRED)
+    error = info.value
+    assert error.state.tweak.name == "HibernateEnabled"
+    assert isinstance(error.error, BackendError)
+    assert error.rollback_errors == []
+    assert backend.writes == [
+        ("set", "PlatformAoAcOverride", 0),
+        ("set", "HiberbootEnabled", 0),
+        # 回滚: 先恢复后写入的项；原来不存在的值被删除
+        ("set", "HiberbootEnabled", 1),
+        ("delete", "PlatformAoAcOverride"),
+    ]
+    assert engine.read() == before
+
+
+def test_failure_on_first_write_needs_no_rollback():
+    backend = make_backend(lambda name, value: name == "PlatformAoAcOverride")
+    with pytest.raises(TweakError) as info:
+        TweakEngine(backend).apply(DESIRED)
+    assert info.value.rollback_errors == []
+    assert backend.writes == []
+
+
+def test_rollback_errors_reported():
+    # HibernateEnabled 写入失败，回滚时恢复 HiberbootEnabled=1 也失败
+    backend = make_backend(lambda name, value: name == "HibernateEnabled" or (name, value) == ("HiberbootEnabled", 1))
+    engine = TweakEngine(backend)
+    with pytest.raises(TweakError) as info:
+        engine.apply(DESIRED)
+    (state, error), = info.value.rollback_errors
+    assert (state.tweak.name, state.current, state.desired) == ("HiberbootEnabled", 1, 0)
+    assert isinstance(error, BackendError)
+    # 其余项仍然回滚
+    assert backend.writes[-1] == ("delete", "PlatformAoAcOverride")
+    current = engine.read()
+    assert (current["PlatformAoAcOverride"], current["HiberbootEnabled"]) == (None, 0)
+
+
+def test_unknown_tweak_rejected():
+    backend = make_backend()
+    with pytest.raises(ValueError):
+        TweakEngine(backend).apply({"NoSuchTweak": 1})
+    assert backend.writes == []
@@ -0,0 +1,245 @@
+"""schedule 模块: 时段解析、跨午夜的时段以及用 ManualClock 驱动的 PlanScheduler"""
+import datetime
+
+import pytest
+
+import schedule
+from plans import PlanError
+from power_backend import BackendError, SimulatedPowerBackend
+from scheme_cache import SchemeCache
+
+BALANCED = "381b4222-f694-41f0-9685-ff5bb260df2e"
+HIGH = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+
+# 2024-01-01 为周一
+MONDAY = datetime.datetime(2024, 1, 1)
+
+
+def at(day, hour, minute=0):
+    """第 day 天（0 为周一）的 hour:minute"""
+    return MONDAY + datetime.timedelta(days=day, hours=hour, minutes=minute)
+
+
+class ScriptedClock(schedule.ManualClock):
+    """墙上时间到达指定时刻时执行一次操作（如 suspend、jump）的 ManualClock"""
+
+    def __init__(self, start, actions=()):
+        super().__init__(start)
+        self.actions = sorted((moment.timestamp(), action) for moment, action in actions)
+
+    def wait(self, event, timeout):
+        if self.actions:
+            timeout = min(timeout, max(self.actions[0][0] - self.time(), 0.0))
+        result = super().wait(event, timeout)
+        while self.actions and self.actions[0][0] <= self.time():
+            _, action = self.actions.pop(0)
+            action(self)
+        return result
+
+
+class FlakyBackend(SimulatedPowerBackend):
+    """前 failures 次激活方案失败"""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def activate_scheme(self, scheme_guid):
+        if self.failures:
+            self.failures -= 1
+            raise BackendError(f"激活电源方案 {scheme_guid} 失败")
+        super().activate_scheme(scheme_guid)
+
+
+def make_scheduler(clock, rules=({"plan": "high", "start": "22:00", "end": "06:00"},), default="balanced",
+                   backend=None):
+    cache = SchemeCache(backend or SimulatedPowerBackend(), watch=False)
+    sched = schedule.load_schedule({"rules": list(rules), "default": default})
+    return schedule.PlanScheduler(cache, sched, clock=clock)
+
+
+def switches(scheduler):
+    return [(d.reason, d.new, datetime.datetime.fromtimestamp(d.time)) for d in scheduler.decisions]
+
+
+# ---- 解析 ----
+
+@pytest.mark.parametrize("text, days", [
+    ("*", range(7)),
+    ("", range(7)),
+    ("mon-fri", range(5)),
+    ("sat,sun", (5, 6)),
+    ("Saturday,SUNDAY", (5, 6)),
+    ("0-6", range(7)),
+    ("0", (6,)),
+    ("7", (6,)),
+    ("1,3,5", (0, 2, 4)),
+    ("fri-mon", (4, 5, 6, 0)),
+])
+def test_parse_days(text, days):
+    assert schedule.parse_days(text) == frozenset(days)
+
+
+@pytest.mark.parametrize("text", ["8", "xyz", "mon-", "1-9"])
+def test_parse_days_invalid(text):
+    with pytest.raises(ValueError):
+        schedule.parse_days(text)
+
+
+@pytest.mark.parametrize("text, minutes", [
+    ("00:00", 0), ("9:05", 545), ("18", 1080), ("23:59", 1439), ("24:00", 1440),
+])
+def test_parse_time(text, minutes):
+    assert schedule.parse_time(text) == minutes
+
+
+@pytest.mark.parametrize("text", ["", "ab:cd", "25:00", "24:01", "12:60", "-1:00"])
+def test_parse_time_invalid(text):
+    with pytest.raises(ValueError):
+        schedule.parse_time(text)
+
+
+# ---- 时段 ----
+
+def test_window_across_midnight():
+    sched = schedule.Schedule([schedule.ScheduleRule("high", "*", "22:00", "06:00")], "eco")
+    assert sched.plan_at(at(0, 21, 59)) == "eco"
+    assert sched.plan_at(at(0, 22)) == "high"
+    assert sched.plan_at(at(1, 0)) == "high"
+    assert sched.plan_at(at(1, 5, 59)) == "high"
+    assert sched.plan_at(at(1, 6)) == "eco"
+    # 周日晚上的时段延续到下周一早上
+    assert sched.plan_at(at(6, 23)) == "high"
+    assert sched.plan_at(at(7, 3)) == "high"
+
+
+def test_window_across_midnight_belongs_to_start_day():
+    sched = schedule.Schedule([schedule.ScheduleRule("high", "mon", "22:00", "06:00")], "eco")
+    assert sched.plan_at(at(0, 3)) == "eco"
+    assert sched.plan_at(at(0, 23)) == "high"
+    assert sched.plan_at(at(1, 3)) == "high"
+    assert sched.plan_at(at(1, 23)) == "eco"
+    assert sched.transitions(at(0, 12), 2) == [(at(0, 22), "high"), (at(1, 6), "eco")]
+
+
+def test_whole_day_and_first_rule_wins():
+    sched = schedule.Schedule([schedule.ScheduleRule("high", "sat,sun", "12:00", "13:00"),
+                               schedule.ScheduleRule("eco", "sat,sun")], None)
+    assert sched.plan_at(at(5, 12, 30)) == "high"
+    assert sched.plan_at(at(5, 3)) == "eco"
+    assert sched.plan_at(at(4, 3)) is None
+
+
+# ---- PlanScheduler ----
+
+def test_plan_names_resolved_when_built():
+    scheduler = make_scheduler(schedule.ManualClock(at(0, 8)), default="Balanced")
+    assert scheduler.schedule.default == BALANCED
+    assert scheduler.schedule.rules[0].plan == HIGH
+    with pytest.raises(PlanError):
+        make_scheduler(schedule.ManualClock(at(0, 8)), rules=({"plan": "no such plan"},))
+
+
+def test_startup_switches_to_current_plan():
+    clock = schedule.ManualClock(at(0, 23))
+    scheduler = make_scheduler(clock)
+    scheduler.run(until=clock.time())
+    assert switches(scheduler) == [("startup", HIGH, at(0, 23))]
+    assert scheduler.cache.active_scheme().guid == HIGH
+
+
+def test_startup_without_change_does_not_switch():
+    clock = schedule.ManualClock(at(0, 8))
+    scheduler = make_scheduler(clock)
+    scheduler.run(until=clock.time())
+    assert not scheduler.decisions
+    assert scheduler.target == BALANCED
+
+
+def test_transitions_over_two_days():
+    clock = schedule.ManualClock(at(0, 8))
+    scheduler = make_scheduler(clock)
+    scheduler.run(until=at(2, 8).timestamp())
+    assert switches(scheduler) == [
+        ("transition", HIGH, at(0, 22)),
+        ("transition", BALANCED, at(1, 6)),
+        ("transition", HIGH, at(1, 22)),
+        ("transition", BALANCED, at(2, 6)),
+    ]
+    assert scheduler.stats["switches"] == 4
+    assert scheduler.stats["clock_changes"] == 0
+
+
+def test_manual_change_kept_until_next_transition():
+    clock = schedule.ManualClock(at(0, 8))
+    scheduler = make_scheduler(clock)
+    scheduler.run(until=at(0, 12).timestamp())
+    scheduler.cache.activate(HIGH)
+    scheduler.timers.run(until=at(1, 8).timestamp())
+    assert switches(scheduler) == [("transition", BALANCED, at(1, 6))]
+
+
+def test_rearm_after_suspend():
+    # 10:00 休眠，23:00 唤醒: 不补放错过的边界，直接切换到当前的计划
+    clock = ScriptedClock(at(0, 8), [(at(0, 10), lambda c: c.suspend(13 * 3600))])
+    scheduler = make_scheduler(clock)
+    scheduler.run(until=at(1, 8).timestamp())
+    decisions = switches(scheduler)
+    assert [d[:2] for d in decisions] == [("clock_change", HIGH), ("transition", BALANCED)]
+    assert at(0, 23) <= decisions[0][2] <= at(0, 23, 5)
+    assert decisions[1][2] == at(1, 6)
+    assert scheduler.stats["clock_changes"] == 1
+
+
+def test_rearm_after_clock_set_back():
+    # 23:30 时钟被调回 21:30: 切回默认计划，22:00 的边界需要重新排定到当天
+    clock = ScriptedClock(at(0, 23), [(at(0, 23, 30), lambda c: c.jump(-2 * 3600))])
+    scheduler = make_scheduler(clock)
+    scheduler.run(until=at(1, 0).timestamp())
+    decisions = switches(scheduler)
+    assert [d[:2] for d in decisions] == [("startup", HIGH), ("clock_change", BALANCED), ("transition", HIGH)]
+    assert decisions[2][2] == at(0, 22)
+    assert scheduler.stats["clock_changes"] == 1
+
+
+def test_rearm_after_clock_set_forward():
+    # 12:00 时钟被调到次日 12:00: 期间的边界全部跳过，之后仍按时切换
+    clock = ScriptedClock(at(0, 8), [(at(0, 12), lambda c: c.jump(86400))])
+    scheduler = make_scheduler(clock)
+    scheduler.run(until=at(2, 8).timestamp())
+    assert switches(scheduler) == [
+        ("transition", HIGH, at(1, 22)),
+        ("transition", BALANCED, at(2, 6)),
+    ]
+    assert scheduler.stats["clock_changes"] == 1
+    assert scheduler.timers.stats["clock_changes"] == 1
+
+
+def test_failed_switch_is_retried():
+    clock = schedule.ManualClock(at(0, 8))
+    backend = FlakyBackend(failures=0)
+    scheduler = make_scheduler(clock, backend=backend)
+    scheduler.run(until=at(0, 21).timestamp())
+    backend.failures = 2
+    scheduler.timers.run(until=at(1, 8).timestamp())
+    decisions = [(d.reason, d.new, datetime.datetime.fromtimestamp(d.time), bool(d.error)) for d in scheduler.decisions]
+    assert decisions == [
+        ("transition", HIGH, at(0, 22), True),
+        ("retry", HIGH, at(0, 22, 1), True),
+        ("retry", HIGH, at(0, 22, 2), False),
+        ("transition", BALANCED, at(1, 6), False),
+    ]
+    assert scheduler.stats["errors"] == 2 and scheduler.stats["switches"] == 2
+
+
+def test_retry_dropped_when_next_boundary_arrives():
+    # 重试期间到达边界时按新的计划切换，不再重试旧的计划
+    clock = schedule.ManualClock(at(0, 8))
+    backend = FlakyBackend(failures=0)
+    scheduler = make_scheduler(clock, rules=({"plan": "high", "start": "22:00", "end": "22:01"},), backend=backend)
+    scheduler.run(until=at(0, 21).timestamp())
+    backend.failures = 1
+    scheduler.timers.run(until=at(0, 23).timestamp())
+    assert switches(scheduler) == [("transition", HIGH, at(0, 22))]
+    assert scheduler.cache.active_scheme().guid == BALANCED
+    assert len(scheduler.timers) == len(scheduler.schedule.edges())
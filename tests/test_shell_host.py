@@ -0,0 +1,47 @@
+"""shell_host: 用 Python 替身验证会话的输出切分、退出码与超时"""
+import pytest
+
+from shell_host import PythonDialect, ShellSession, ShellTimeout
+
+
+@pytest.fixture
+def session():
+    session = ShellSession(PythonDialect())
+    yield session
+    session.stop()
+
+
+def test_output_and_returncode(session):
+    result = session.run('print("abc"); import sys; print("err", file=sys.stderr)', timeout=30)
+    assert (result.stdout, result.stderr, result.returncode) == ("abc\n", "err\n", 0)
+    assert session.run("raise SystemExit(3)", timeout=30).returncode == 3
+
+
+def test_state_kept_between_commands(session):
+    session.run("x = 41", timeout=30)
+    assert session.run("print(x + 1)", timeout=30).stdout == "42\n"
+
+
+def test_output_without_trailing_newline(session):
+    session.run("x = 1", timeout=30)
+    result = session.run('import sys; sys.stdout.write("abc"); sys.stderr.write("def")', timeout=5)
+    assert (result.stdout, result.stderr, result.returncode) == ("abc", "def", 0)
+    # 会话没有因超时被重启
+    assert session.starts == 1
+    assert session.run("print(x)", timeout=30).stdout == "1\n"
+
+
+def test_output_without_trailing_newline_streamed(session):
+    lines = []
+    result = session.run('import sys; print("a"); sys.stdout.write("b")', timeout=5,
+                         on_output=lambda name, line: lines.append((name, line)))
+    assert lines == [("stdout", "a\n"), ("stdout", "b")]
+    assert result.output_size == 3
+
+
+def test_timeout_restarts_session(session):
+    with pytest.raises(ShellTimeout):
+        session.run("import time; time.sleep(10)", timeout=0.5)
+    assert not session.is_alive()
+    assert session.run("print(1)", timeout=30).stdout == "1\n"
+    assert session.starts == 2
@@ -0,0 +1,54 @@
+"""启动时间线
+
+记录启动过程中各阶段（导入、窗口构建、首次绘制、首次数据）距进程启动的
+时间，用于跟踪启动耗时的变化。起点为本模块首次被导入的时刻，入口脚本应
+尽早导入本模块。
+
+    python main.py --timeline        # 或设置环境变量 APM_TIMELINE=1
+"""
+import sys
+import time
+
+
+class Timeline:
+    """按顺序记录的时间点，同名的时间点只记录第一次"""
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.marks = []
+        self._names = set()
+
+    def mark(self, name):
+        if name not in self._names:
+            self._names.add(name)
+            self.marks.append((name, time.perf_counter()))
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def elapsed(self, name):
+        """返回时间点距起点的毫秒数，未记录时返回 None"""
+        for mark, at in self.marks:
+            if mark == name:
+                return (at - self.start) * 1000
+        return None
+
+    def report(self):
+        """返回 [(名称, 距起点毫秒数, 距上一时间点毫秒数)]"""
+        rows = []
+        previous = self.start
+        for name, at in self.marks:
+            rows.append((name, (at - self.start) * 1000, (at - previous) * 1000))
+            previous = at
+        return rows
+
+    def print_report(self, stream=None):
+        stream = stream or sys.stderr
+        stream.write(f"{'启动阶段':<16}{'累计(ms)':>12}{'本阶段(ms)':>14}\n")
+        for name, total, delta in self.report():
+            stream.write(f"{name:<20}{total:>12.1f}{delta:>14.1f}\n")
+        stream.flush()
+
+
+# 进程级的启动时间线
+startup = Timeline()
@@ -0,0 +1,272 @@
+"""系统托盘快速切换
+
+python main.py --tray 只显示托盘图标，不创建主窗口（也不导入 gui 模块），
+内存占用比完整窗口小。托盘菜单列出所有电源方案，内容由方案缓存预先生成:
+缓存变化时才在后台重建，打开菜单时不访问 powercfg。单击菜单项即切换，结果以
+托盘气泡提示，不弹出模态对话框。
+
+配置文件中的 "tray" 一节可以为计划设置全局热键（仅 Windows）:
+
+    "tray": {"hotkeys": {"eco": "Ctrl+Alt+1", "high": "Ctrl+Alt+3"}}
+
+热键的目标与命令行相同，可以是快捷计划 ID、GUID、别名或方案名称。
+"""
+import ctypes
+import sys
+
+from PyQt6.QtCore import QAbstractNativeEventFilter, QObject, Qt, pyqtSignal
+from PyQt6.QtGui import QAction, QActionGroup, QIcon, QKeySequence
+from PyQt6.QtWidgets import QApplication, QMenu, QSystemTrayIcon
+
+import app_config
+import i18n
+import plans
+from executor import CommandExecutor
+from power_backend import create_backend, elevate_if_needed
+from scheme_cache import SchemeCache
+
+ICON_PATH = "icon/power_manager.ico"
+
+
+class GlobalHotkeys(QAbstractNativeEventFilter):
+    """RegisterHotKey 注册的全局热键，WM_HOTKEY 到达时调用 callback(目标)"""
+
+    WM_HOTKEY = 0x0312
+    MOD_NOREPEAT = 0x4000
+    MODIFIERS = (
+        (Qt.KeyboardModifier.AltModifier, 0x1), (Qt.KeyboardModifier.ControlModifier, 0x2),
+        (Qt.KeyboardModifier.ShiftModifier, 0x4), (Qt.KeyboardModifier.MetaModifier, 0x8),
+    )
+
+    def __init__(self, callback):
+        super().__init__()
+        if sys.platform != "win32":
+            raise OSError("全局热键只支持 Windows")
+        from ctypes import wintypes
+
+        self._msg_type = wintypes.MSG
+        self._user32 = ctypes.windll.user32
+        self.callback = callback
+        self.targets = {}
+
+    @classmethod
+    def parse(cls, text):
+        """把 "Ctrl+Alt+H" 转换为 (修饰键, 虚拟键码)，不支持的按键抛出 ValueError"""
+        sequence = QKeySequence.fromString(text)
+        if sequence.count() != 1:
+            raise ValueError(f"无效的热键: {text}")
+        combination = sequence[0]
+        key = combination.key()
+        modifiers = 0
+        for flag, value in cls.MODIFIERS:
+            if combination.keyboardModifiers() & flag:
+                modifiers |= value
+        if Qt.Key.Key_A.value <= key.value <= Qt.Key.Key_Z.value or \
+                Qt.Key.Key_0.value <= key.value <= Qt.Key.Key_9.value:
+            vk = key.value
+        elif Qt.Key.Key_F1.value <= key.value <= Qt.Key.Key_F24.value:
+            vk = 0x70 + key.value - Qt.Key.Key_F1.value
+        else:
+            raise ValueError(f"不支持的热键: {text}")
+        if not modifiers:
+            raise ValueError(f"热键需要至少一个修饰键: {text}")
+        return modifiers, vk
+
+    def register(self, text, target):
+        modifiers, vk = self.parse(text)
+        hotkey_id = len(self.targets) + 1
+        if not self._user32.RegisterHotKey(None, hotkey_id, modifiers | self.MOD_NOREPEAT, vk):
+            raise ctypes.WinError()
+        self.targets[hotkey_id] = target
+
+    def unregister_all(self):
+        for hotkey_id in self.targets:
+            self._user32.UnregisterHotKey(None, hotkey_id)
+        self.targets.clear()
+
+    def nativeEventFilter(self, event_type, message):
+        if bytes(event_type) == b"windows_generic_MSG":
+            msg = self._msg_type.from_address(int(message))
+            if msg.message == self.WM_HOTKEY and msg.wParam in self.targets:
+                self.callback(self.targets[msg.wParam])
+                return True, 0
+        return False, 0
+
+
+class TrayApp(QObject):
+    """托盘图标与方案菜单；主窗口在第一次打开时才创建，与托盘共用缓存和语言"""
+
+    # 方案缓存发生变化（可能来自工作线程）
+    schemes_changed = pyqtSignal()
+
+    def __init__(self, backend, config=None, translator=None):
+        super().__init__()
+        config = config or {}
+        self.backend = backend
+        self.i18n = translator or i18n.Translator("en_US")
+        self.executor = CommandExecutor(self)
+        self.scheme_cache = SchemeCache(backend)
+        self.scheme_cache.add_listener(self.schemes_changed.emit)
+        self.schemes_changed.connect(lambda: self.executor.debounce("refresh", self.reload))
+        self.window = None
+        self._menu_key = None
+
+        self.icon = QSystemTrayIcon(QIcon(ICON_PATH), self)
+        self.menu = QMenu()
+        self.plan_group = QActionGroup(self.menu)
+        self.plan_group.setExclusive(True)
+        self.plan_actions = {}
+        self.plan_separator = self.menu.addSeparator()
+        self.open_action = QAction(self.menu)
+        self.i18n.bind(self.open_action.setText, "打开主窗口")
+        self.open_action.triggered.connect(self.show_window)
+        self.menu.addAction(self.open_action)
+        self.quit_action = QAction(self.menu)
+        self.i18n.bind(self.quit_action.setText, "退出")
+        self.quit_action.triggered.connect(self.quit)
+        self.menu.addAction(self.quit_action)
+        self.icon.setContextMenu(self.menu)
+        self.icon.activated.connect(self.on_activated)
+        self.i18n.bind(self.icon.setToolTip, self.tooltip_text)
+
+        self.hotkeys = None
+        self.register_hotkeys(config.get("hotkeys") or {})
+        self.reload()
+
+    def tr(self, text):
+        return self.i18n.tr(text)
+
+    # ---- 方案菜单 ----
+
+    def reload(self):
+        """在后台读取方案列表（缓存有效时不访问后端）后更新菜单"""
+        self.executor.submit(
+            self.tr("正在加载电源计划..."), self.scheme_cache.schemes, on_success=self.update_menu,
+            on_error=lambda e: self.notify(self.tr("获取电源计划失败:\n{0}").format(getattr(e, "stderr", e)), True),
+            key="refresh"
+        )
+
+    def update_menu(self, schemes):
+        """方案增删或改名时重建菜单项，否则只更新勾选状态"""
+        key = tuple((scheme.guid, scheme.name) for scheme in schemes)
+        if key != self._menu_key:
+            for action in self.plan_actions.values():
+                self.plan_group.removeAction(action)
+                self.menu.removeAction(action)
+            self.plan_actions = {}
+            for scheme in schemes:
+                action = QAction(scheme.name, self.menu)
+                action.setCheckable(True)
+                action.triggered.connect(lambda _, guid=scheme.guid: self.switch(guid))
+                self.plan_group.addAction(action)
+                self.menu.insertAction(self.plan_separator, action)
+                self.plan_actions[scheme.guid] = action
+            self._menu_key = key
+        for scheme in schemes:
+            self.plan_actions[scheme.guid].setChecked(scheme.active)
+        self.icon.setToolTip(self.tooltip_text())
+
+    def tooltip_text(self):
+        active = self.scheme_cache.active_scheme() if self._menu_key is not None else None
+        title = self.tr("高级电源管理工具")
+        return f"{title}\n{self.tr('当前激活计划: ')}{active.name}" if active else title
+
+    def on_activated(self, reason):
+        if reason in (QSystemTrayIcon.ActivationReason.DoubleClick, QSystemTrayIcon.ActivationReason.Trigger):
+            self.show_window()
+
+    # ---- 切换 ----
+
+    def switch(self, guid):
+        scheme = self.scheme_cache.get(guid)
+        if scheme is not None and scheme.active:
+            return
+        self.executor.submit(
+            self.tr("正在切换电源计划..."), plans.switch_plan, self.scheme_cache, guid,
+            on_success=lambda scheme: self.notify(self.tr("已切换到 {0}").format(scheme.name if scheme else guid)),
+            on_error=self.on_switch_error, mutating=True, key="switch"
+        )
+
+    def switch_to(self, target):
+        """热键: 按名称、ID 或 GUID 切换"""
+        def switch():
+            return plans.switch_plan(self.scheme_cache, plans.resolve_plan(self.scheme_cache, target))
+
+        self.executor.submit(
+            self.tr("正在切换电源计划..."), switch,
+            on_success=lambda scheme: self.notify(self.tr("已切换到 {0}").format(scheme.name if scheme else target)),
+            on_error=self.on_switch_error, mutating=True, key="switch"
+        )
+
+    def on_switch_error(self, e):
+        self.notify(self.tr("切换电源计划失败:\n{0}").format(getattr(e, "stderr", e)), True)
+        # 恢复菜单的勾选状态
+        self.reload()
+
+    def notify(self, message, error=False):
+        icon = QSystemTrayIcon.MessageIcon.Critical if error else QSystemTrayIcon.MessageIcon.Information
+        self.icon.showMessage(self.tr("高级电源管理工具"), message, icon, 3000)
+
+    def register_hotkeys(self, hotkeys):
+        if not hotkeys:
+            return
+        try:
+            self.hotkeys = GlobalHotkeys(self.switch_to)
+        except OSError as e:
+            print(f"无法注册全局热键: {e}")
+            return
+        QApplication.instance().installNativeEventFilter(self.hotkeys)
+        for target, text in hotkeys.items():
+            try:
+                self.hotkeys.register(text, target)
+            except (OSError, ValueError) as e:
+                print(f"无法注册热键 {text}: {e}")
+
+    # ---- 主窗口 ----
+
+    def show_window(self):
+        if self.window is None:
+            # 只在需要时导入完整界面
+            import gui
+
+            self.window = gui.PowerManager(self.backend, scheme_cache=self.scheme_cache, translator=self.i18n)
+            self.window.tray = self.icon
+        self.window.showNormal()
+        self.window.raise_()
+        self.window.activateWindow()
+
+    def quit(self):
+        if self.hotkeys is not None:
+            self.hotkeys.unregister_all()
+        if self.window is not None:
+            self.window.shutdown()
+        else:
+            self.scheme_cache.close()
+        self.icon.hide()
+        QApplication.quit()
+
+
+def run_tray(argv):
+    """以托盘模式运行，返回退出码；系统不支持托盘时打开主窗口
+
+    与 gui.run_gui 相同，带 --attach 参数时连接到常驻服务。
+    """
+    attach = "--attach" in argv
+    argv = [arg for arg in argv if arg not in ("--tray", "--attach")]
+    try:
+        backend = create_backend("service" if attach else None)
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if elevate_if_needed(backend, argv):
+        return 0
+    app = QApplication(argv)
+    app.setQuitOnLastWindowClosed(False)
+    tray = TrayApp(backend, app_config.load_config().get("tray"))
+    if QSystemTrayIcon.isSystemTrayAvailable():
+        tray.icon.show()
+    else:
+        print("系统托盘不可用，改为显示主窗口")
+        app.setQuitOnLastWindowClosed(True)
+        tray.show_window()
+    return app.exec()